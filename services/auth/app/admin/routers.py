@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, status, Query
+import typing
+
+from fastapi import APIRouter, Depends, status, Query, Body
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.admin import views
-from app.admin.schemas import UsersPaginate, UserMaximal, RegisterAdmin, UpdateUser
+from app.admin.schemas import UsersPaginate, UserMaximal, RegisterAdmin, UpdateUser, LevelChangeCreate, UserLevel
 from app.schemas import Message
 from app.views import is_superuser
 from db import get_db
@@ -69,9 +71,28 @@ async def create_user(schema: RegisterAdmin, db: AsyncSession = Depends(get_db))
 async def update_level(
     user_id: int,
     level: int = Query(default=1, gt=0),
+    reason: str = Query(default='admin'),
+    key: typing.Optional[str] = Query(default=None),
+    db: AsyncSession = Depends(get_db)
+):
+    return await views.update_level(db, user_id, level, reason, key)
+
+
+@admin_router.post(
+    '/user/levels',
+    name='Update users levels',
+    description='Update users levels in batch, changes with used idempotency key or for customers are skipped',
+    response_description='New levels of changed users',
+    status_code=status.HTTP_200_OK,
+    response_model=list[UserLevel],
+    tags=['admin'],
+    dependencies=[Depends(is_superuser)],
+)
+async def update_levels(
+    changes: list[LevelChangeCreate] = Body(..., max_items=1000),
     db: AsyncSession = Depends(get_db)
 ):
-    return await views.update_level(db, user_id, level)
+    return await views.update_levels(db, changes)
 
 
 @admin_router.put(
@@ -1,7 +1,7 @@
 import datetime
 import typing
 
-from pydantic import validator, BaseModel, EmailStr
+from pydantic import validator, BaseModel, EmailStr, Field
 
 from app.auth.schemas import Register
 from app.schemas import Paginate
@@ -74,3 +74,23 @@ class UpdateUser(BaseModel):
         if (level is not None) and (level <= 0):
             raise ValueError('Level cannot be less than or equal to 0')
         return level
+
+
+class LevelChangeCreate(BaseModel):
+    """ Level change create """
+
+    user_id: int
+    amount: int = Field(..., gt=0)
+    reason: str = 'admin'
+    key: typing.Optional[str] = None
+
+
+class UserLevel(BaseModel):
+    """ User level """
+
+    id: int
+    level: int
+
+    @validator('level')
+    def set_level(cls, level):
+        return level / 100
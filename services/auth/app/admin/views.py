@@ -2,9 +2,11 @@ import typing
 
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.admin.schemas import RegisterAdmin, UpdateUser
-from app.crud import user_crud, github_crud
+from app.admin.schemas import RegisterAdmin, UpdateUser, LevelChangeCreate
+from app.crud import user_crud, github_crud, level_change_crud
+from app.models import User
 from app.security import get_password_hash
 from app.service import paginate
 from config import SERVER_AUTH_BACKEND, API
@@ -41,7 +43,7 @@ async def get_user(db: AsyncSession, user_id: int) -> dict[str, typing.Any]:
 
     if not await user_crud.exist(db, id=user_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='User not found')
-    user = await user_crud.get(db, id=user_id)
+    user = await user_crud.get(db, id=user_id, options=(selectinload(User.github),))
     return {**user.__dict__, 'github': user.github.__dict__ if user.github else None}
 
 
@@ -72,15 +74,21 @@ async def create_user(db: AsyncSession, schema: RegisterAdmin) -> dict[str, str]
     return {'msg': 'User has been created'}
 
 
-async def update_level(db: AsyncSession, user_id: int, level: int) -> dict[str, typing.Any]:
+async def update_level(
+        db: AsyncSession, user_id: int, level: int, reason: str = 'admin', key: typing.Optional[str] = None,
+) -> dict[str, typing.Any]:
     """
-        Update level
+        Update level (add to ledger)
         :param db: DB
         :type db: AsyncSession
         :param user_id: User ID
         :type user_id: int
         :param level: Level
         :type level: int
+        :param reason: Reason
+        :type reason: str
+        :param key: Idempotency key, level change with used key is skipped
+        :type key: str
         :return: User
         :rtype: dict
         :raise HTTPException 400: User not found
@@ -90,14 +98,29 @@ async def update_level(db: AsyncSession, user_id: int, level: int) -> dict[str,
     if not await user_crud.exist(db, id=user_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='User not found')
 
-    user = await user_crud.get(db, id=user_id)
+    user = await user_crud.get(db, id=user_id, options=(selectinload(User.github),))
     if not user.freelancer:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='User is customer')
 
-    user = await user_crud.update(db, {'id': user_id}, level=user.level + level)
+    await level_change_crud.credit(db, user_id, level, reason, key)
     return {**user.__dict__, 'github': user.github.__dict__ if user.github else None}
 
 
+async def update_levels(db: AsyncSession, changes: list[LevelChangeCreate]) -> list[dict[str, int]]:
+    """
+        Update levels in batch (add to ledger)
+        :param db: DB
+        :type db: AsyncSession
+        :param changes: Level changes
+        :type changes: list
+        :return: New levels of changed users
+        :rtype: list
+    """
+
+    levels = await level_change_crud.apply(db, [change.dict() for change in changes])
+    return [{'id': user_id, 'level': level} for user_id, level in levels.items()]
+
+
 async def update_user(db: AsyncSession, schema: UpdateUser, user_id: int) -> dict[str, typing.Any]:
     """
         Update user
@@ -127,7 +150,9 @@ async def update_user(db: AsyncSession, schema: UpdateUser, user_id: int) -> dic
         if schema.level:
             level = schema.level
 
-    user = await user_crud.update(db, {'id': user_id}, **{**schema.dict(), 'level': level})
+    user = await user_crud.update(
+        db, {'id': user_id}, options=(selectinload(User.github),), **{**schema.dict(), 'level': level},
+    )
     return {**user.__dict__, 'github': user.github.__dict__ if user.github else None}
 
 
@@ -16,6 +16,8 @@ from app.auth.schemas import (
     UserSkills,
     Profile,
     PaginateFreelancers,
+    FreelancerRank,
+    RankedFreelancer,
 )
 from app.models import User
 from app.schemas import Message
@@ -133,6 +135,36 @@ async def search_freelancers(
     return await views.search_freelancers(db=db, page=page, page_size=page_size, search=search)
 
 
+@auth_router.get(
+    '/freelancers/rank/{user_id}',
+    name='Freelancer rank',
+    description='Freelancer rank in leaderboard',
+    response_description='Rank',
+    status_code=status.HTTP_200_OK,
+    response_model=FreelancerRank,
+    tags=['auth'],
+)
+async def get_freelancer_rank(user_id: int, db: AsyncSession = Depends(get_db)):
+    return await views.get_freelancer_rank(db, user_id)
+
+
+@auth_router.get(
+    '/freelancers/around/{user_id}',
+    name='Freelancers around',
+    description='Freelancers before and after freelancer in leaderboard',
+    response_description='Freelancers',
+    status_code=status.HTTP_200_OK,
+    response_model=list[RankedFreelancer],
+    tags=['auth'],
+)
+async def get_freelancers_around(
+    user_id: int,
+    window: int = Query(default=5, ge=0, le=50),
+    db: AsyncSession = Depends(get_db),
+):
+    return await views.get_freelancers_around(db, user_id, window)
+
+
 @auth_router.post(
     f'/profile/ids',
     name='Users profiles by ids',
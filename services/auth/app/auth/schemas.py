@@ -4,6 +4,7 @@ import typing
 
 from pydantic import BaseModel, validator, EmailStr
 
+from app.avatars import avatar_urls
 from app.schemas import Paginate
 from app.skills.schemas import GetSkill
 from config import SERVER_AUTH_BACKEND
@@ -96,6 +97,7 @@ class GetFreelancer(BaseModel):
     id: int
     username: str
     avatar: typing.Optional[str]
+    avatars: dict[int, str] = {}
     level: typing.Optional[int]
 
     @validator('level')
@@ -106,6 +108,10 @@ class GetFreelancer(BaseModel):
     def set_avatar(cls, avatar):
         return SERVER_AUTH_BACKEND + avatar if avatar else 'https://via.placeholder.com/400x400'
 
+    @validator('avatars', always=True)
+    def set_avatars(cls, avatars, values):
+        return avatar_urls(values.get('avatar'))
+
 
 class UserPublic(UserChangeData, GetFreelancer):
     """ User data """
@@ -138,3 +144,17 @@ class PaginateFreelancers(Paginate):
     """ Paginate freelancers """
 
     results: list[GetFreelancer]
+
+
+class RankedFreelancer(GetFreelancer):
+    """ Freelancer with leaderboard rank """
+
+    rank: int
+
+
+class FreelancerRank(BaseModel):
+    """ Freelancer leaderboard rank """
+
+    id: int
+    rank: int
+    total: int
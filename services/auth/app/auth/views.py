@@ -10,14 +10,28 @@ from fastapi import HTTPException, status, UploadFile, Request
 from fastapi.responses import RedirectResponse, StreamingResponse
 from pyotp import TOTP
 from qrcode.image.pil import PilImage
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
+from app.avatars import make_avatar, avatar_files
 from app.auth.schemas import Register, UserChangeData, ChangePassword, Password, VerificationCreate
-from app.crud import user_crud, verification_crud, github_crud, skill_crud, user_skill_crud
+from app.crud import user_crud, verification_crud, github_crud, user_skill_crud, level_change_crud
+from app.leaderboard import leaderboard
 from app.models import User
 from app.security import get_password_hash, verify_password_hash
 from app.send_email import send_register_email, send_reset_password_email, send_username_email
-from app.service import validate_login, remove_file, write_file, github_data, paginate
+from app.serializers import json_response, freelancer_row
+from app.service import (
+    validate_login,
+    remove_file,
+    write_file,
+    github_data,
+    paginate,
+    validate_upload_size,
+)
+from app.skills.catalogue import skill_catalogue
+from app.storage import storage
 from app.tokens import create_login_tokens, verify_token, create_access_token, create_reset_password_token
 from config import SERVER_AUTH_BACKEND, API, MEDIA_ROOT, social_auth, redirect_url, PROJECT_NAME
 
@@ -43,6 +57,7 @@ async def register(db: AsyncSession, schema: Register, link: typing.Optional[str
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Email exist')
 
     level = None
+    referral_user = None
     if schema.freelancer:
         level = 0
 
@@ -55,9 +70,6 @@ async def register(db: AsyncSession, schema: Register, link: typing.Optional[str
                         status_code=status.HTTP_400_BAD_REQUEST,
                         detail='Bad referral link. Referral user is customer'
                     )
-
-                await user_crud.update(db, {'referral_link': link}, level=referral_user.level + random.randint(70, 100))
-                level = random.randint(70, 100)
             else:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Bad referral link')
     elif link:
@@ -72,6 +84,17 @@ async def register(db: AsyncSession, schema: Register, link: typing.Optional[str
         **{**schema.dict(), 'password': get_password_hash(schema.password), 'level': level}
     )
 
+    if referral_user:
+        await level_change_crud.apply(db, [
+            {
+                'user_id': referral_user.id,
+                'amount': random.randint(70, 100),
+                'reason': 'referrer',
+                'key': f'referrer-{user.id}',
+            },
+            {'user_id': user.id, 'amount': random.randint(70, 100), 'reason': 'referral', 'key': f'referral-{user.id}'},
+        ])
+
     verification = await verification_crud.create(db, **VerificationCreate(user_id=user.id, link=str(uuid4())).dict())
 
     await send_register_email(user.email, user.username, f'{SERVER_AUTH_BACKEND}{API}/verify?link={verification.link}')
@@ -158,8 +181,9 @@ async def refresh(db: AsyncSession, token: str) -> dict[str, str]:
     return create_access_token(user_id)
 
 
+@json_response
 @paginate(user_crud.freelancers, user_crud.freelancers_exist, f'{SERVER_AUTH_BACKEND}{API}/freelancers')
-async def get_freelancers(*, db: AsyncSession, page: int, page_size: int, queryset: list[User]):
+async def get_freelancers(*, db: AsyncSession, page: int, page_size: int, queryset: list[Row]):
     """
         Get freelancers
         :param db: DB
@@ -172,11 +196,12 @@ async def get_freelancers(*, db: AsyncSession, page: int, page_size: int, querys
         :type queryset: list
         :return: Freelancers
     """
-    return (user.__dict__ for user in queryset)
+    return [freelancer_row(user) for user in queryset]
 
 
+@json_response
 @paginate(user_crud.search, user_crud.search_exist, f'{SERVER_AUTH_BACKEND}{API}/freelancers/search', 'search')
-async def search_freelancers(*, db: AsyncSession, page: int, page_size: int, search: str, queryset: list[User]):
+async def search_freelancers(*, db: AsyncSession, page: int, page_size: int, search: str, queryset: list[Row]):
     """
         Search freelancers
         :param db: DB
@@ -191,7 +216,48 @@ async def search_freelancers(*, db: AsyncSession, page: int, page_size: int, sea
         :type queryset: list
         :return: Freelancers
     """
-    return (user.__dict__ for user in queryset)
+    return [freelancer_row(user) for user in queryset]
+
+
+async def get_freelancer_rank(db: AsyncSession, user_id: int) -> dict[str, int]:
+    """
+        Get freelancer rank
+        :param db: DB
+        :type db: AsyncSession
+        :param user_id: User ID
+        :type user_id: int
+        :return: Rank
+        :rtype: dict
+        :raise HTTPException 400: Freelancer not found
+    """
+
+    rank = await leaderboard.rank(db, user_id)
+    if rank is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Freelancer not found')
+    return {'id': user_id, 'rank': rank, 'total': await leaderboard.count(db)}
+
+
+@json_response
+async def get_freelancers_around(db: AsyncSession, user_id: int, window: int) -> list[dict[str, typing.Any]]:
+    """
+        Get freelancers around freelancer in leaderboard
+        :param db: DB
+        :type db: AsyncSession
+        :param user_id: User ID
+        :type user_id: int
+        :param window: Freelancers before and after
+        :type window: int
+        :return: Ranked freelancers
+        :rtype: list
+        :raise HTTPException 400: Freelancer not found
+    """
+
+    ranks = await leaderboard.around(db, user_id, window)
+    if not ranks:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Freelancer not found')
+
+    users = {user.id: user for user in await user_crud.freelancer_rows(db, [pk for _, pk in ranks])}
+    return [{**freelancer_row(users[pk]), 'rank': rank} for rank, pk in ranks if pk in users]
 
 
 async def profiles_by_ids(db: AsyncSession, ids: list[int]) -> dict[str, typing.Any]:
@@ -209,7 +275,7 @@ async def profiles_by_ids(db: AsyncSession, ids: list[int]) -> dict[str, typing.
             **user.__dict__,
             'skills': (skill.__dict__ for skill in user.skills),
             'github': user.github.git_username if user.github else None,
-        } for user in await user_crud.get_by_ids(db, ids)
+        } for user in await user_crud.get_by_ids(db, ids, (selectinload(User.skills), selectinload(User.github)))
     }
 
 
@@ -227,7 +293,7 @@ async def profile(db: AsyncSession, user_id: int) -> dict[str, typing.Any]:
 
     if not await user_crud.exist(db, id=user_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='User not found')
-    user = await user_crud.get(db, id=user_id)
+    user = await user_crud.get(db, id=user_id, options=(selectinload(User.skills), selectinload(User.github)))
     return {
         **user.__dict__,
         'skills': (skill.__dict__ for skill in user.skills),
@@ -247,20 +313,34 @@ async def avatar(db: AsyncSession, user: User, file: UploadFile) -> dict[str, st
         :return: Message
         :rtype: dict
         :raise HTTPException 400: Avatar only in png format
+        :raise HTTPException 400: Invalid image
+        :raise HTTPException 413: File is too large
     """
 
     if file.content_type != 'image/png':
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Avatar only in png format')
 
-    if (user.avatar is not None) and (MEDIA_ROOT in user.avatar):
-        remove_file(user.avatar)
+    validate_upload_size([file])
 
     if not os.path.exists(MEDIA_ROOT + user.username):
         os.mkdir(MEDIA_ROOT + user.username)
 
     avatar_name = f'{MEDIA_ROOT}{user.username}/{datetime.utcnow().timestamp()}.png'
+    upload_name = f'{avatar_name}.upload'
+
+    await write_file(upload_name, file)
+    try:
+        await make_avatar(upload_name, avatar_name)
+    finally:
+        remove_file(upload_name)
+
+    for file_name in avatar_files(avatar_name):
+        await storage.put_file(file_name, file_name)
+
+    if (user.avatar is not None) and (MEDIA_ROOT in user.avatar):
+        for file_name in avatar_files(user.avatar):
+            await storage.delete(file_name)
 
-    await write_file(avatar_name, file)
     await user_crud.update(db, {'id': user.id}, avatar=avatar_name)
     return {'msg': 'Avatar has been saved'}
 
@@ -536,10 +616,10 @@ async def add_skill(db: AsyncSession, user: User, skill_id: int) -> dict[str, st
         :raise HTTPException 400: User already have this skill
     """
 
-    if not await skill_crud.exist(db, id=skill_id):
+    if await skill_catalogue.get(db, skill_id) is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Skill not found')
 
-    if await user_skill_crud.exist(db, user_id=user.id, skill_id=skill_id):
+    if skill_id in await user_skill_crud.skill_ids(db, user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='You already have this skill')
 
     await user_skill_crud.create(db, user_id=user.id, skill_id=skill_id)
@@ -561,10 +641,10 @@ async def remove_skill(db: AsyncSession, user: User, skill_id: int) -> dict[str,
         :raise HTTPException 400: User already haven't this skill
     """
 
-    if not await skill_crud.exist(db, id=skill_id):
+    if await skill_catalogue.get(db, skill_id) is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Skill not found')
 
-    if not await user_skill_crud.exist(db, user_id=user.id, skill_id=skill_id):
+    if skill_id not in await user_skill_crud.skill_ids(db, user.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='You already haven\'t this skill')
 
     await user_skill_crud.remove(db, user_id=user.id, skill_id=skill_id)
@@ -582,12 +662,5 @@ async def user_skills(db: AsyncSession, user: User) -> dict[str, typing.Any]:
         :rtype: dict
     """
 
-    user = await user_crud.get(db, id=user.id)
-    return {
-        'skills': (skill.__dict__ for skill in user.skills),
-        'other': (
-            skill.__dict__ for skill in filter(
-                lambda skill: skill not in user.skills, await skill_crud.all(db, limit=1000),
-            )
-        ),
-    }
+    skills, other = await skill_catalogue.split(db, await user_skill_crud.skill_ids(db, user.id))
+    return {'skills': skills, 'other': other}
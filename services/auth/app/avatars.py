@@ -0,0 +1,139 @@
+import asyncio
+import os
+import typing
+from concurrent.futures import ProcessPoolExecutor
+
+import sqlalchemy
+from PIL import Image, ImageOps, UnidentifiedImageError
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import User
+from app.storage import storage, LocalStorage
+from config import AVATAR_SIZES, AVATAR_MAX_SIZE, AVATAR_WORKERS, AVATAR_PLACEHOLDER, MEDIA_ROOT
+
+_pool: typing.Optional[ProcessPoolExecutor] = None
+
+
+def thumbnail_name(avatar: str, size: int) -> str:
+    """
+        Thumbnail name
+        :param avatar: Avatar name
+        :type avatar: str
+        :param size: Size
+        :type size: int
+        :return: Thumbnail name
+        :rtype: str
+    """
+
+    root, ext = os.path.splitext(avatar)
+    return f'{root}_{size}{ext}'
+
+
+def avatar_files(avatar: str) -> list[str]:
+    """
+        Avatar and its thumbnails
+        :param avatar: Avatar name
+        :type avatar: str
+        :return: File names
+        :rtype: list
+    """
+
+    return [avatar, *(thumbnail_name(avatar, size) for size in AVATAR_SIZES)]
+
+
+def avatar_urls(avatar: typing.Optional[str]) -> dict[int, str]:
+    """
+        Avatar URL for every size
+        :param avatar: Avatar URL
+        :type avatar: str
+        :return: URLs
+        :rtype: dict
+    """
+
+    if not avatar or avatar.startswith(AVATAR_PLACEHOLDER.split('{')[0]):
+        return {size: AVATAR_PLACEHOLDER.format(size=size) for size in AVATAR_SIZES}
+    return {size: thumbnail_name(avatar, size) for size in AVATAR_SIZES}
+
+
+def render_avatar(source: str, avatar: str) -> None:
+    """
+        Re-encode avatar and render thumbnails (runs in the worker pool)
+        :param source: Uploaded file
+        :type source: str
+        :param avatar: Avatar name
+        :type avatar: str
+        :return: None
+    """
+
+    with Image.open(source) as image:
+        image = ImageOps.fit(image.convert('RGBA'), (min(AVATAR_MAX_SIZE, *image.size),) * 2, Image.LANCZOS)
+
+    image.save(avatar, 'PNG', optimize=True)
+    for size in AVATAR_SIZES:
+        image.resize((size, size), Image.LANCZOS).save(thumbnail_name(avatar, size), 'PNG', optimize=True)
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """
+        Worker pool
+        :return: Pool
+        :rtype: ProcessPoolExecutor
+    """
+
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=AVATAR_WORKERS)
+    return _pool
+
+
+def shutdown_pool() -> None:
+    """
+        Shutdown worker pool
+        :return: None
+    """
+
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+async def make_avatar(source: str, avatar: str) -> None:
+    """
+        Make avatar off the event loop
+        :param source: Uploaded file
+        :type source: str
+        :param avatar: Avatar name
+        :type avatar: str
+        :return: None
+        :raise HTTPException 400: Invalid image
+    """
+
+    try:
+        await asyncio.get_running_loop().run_in_executor(get_pool(), render_avatar, source, avatar)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError):
+        for file_name in avatar_files(avatar):
+            if file_name != source and os.path.exists(file_name):
+                os.remove(file_name)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid image')
+
+
+async def backfill_thumbnails(db: AsyncSession) -> None:
+    """
+        Render missing thumbnails for avatars uploaded before them (local storage only)
+        :param db: DB
+        :type db: AsyncSession
+        :return: None
+    """
+
+    if not isinstance(storage, LocalStorage):
+        return
+
+    query = await db.execute(sqlalchemy.select(User.avatar).filter(User.avatar.startswith(MEDIA_ROOT)))
+    for avatar in query.scalars().all():
+        if os.path.exists(avatar) and not all(os.path.exists(file_name) for file_name in avatar_files(avatar)):
+            try:
+                await make_avatar(avatar, avatar)
+            except HTTPException:
+                pass
@@ -1,16 +1,27 @@
+import datetime
+import typing
 import uuid
 
 import sqlalchemy
+from sqlalchemy.dialects.postgresql import insert, ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Load
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
 
 from app.auth.schemas import Register, VerificationCreate
-from app.models import User, Verification, GitHub, Skill, UserSkill, Payment
+from app.leaderboard import leaderboard
+from app.models import User, Verification, GitHub, Skill, SkillImport, UserSkill, Payment, LevelChange
+from config import PAYMENT_OUTSTANDING
 from crud import CRUD
 
 
 class UserCRUD(CRUD[User, Register, Register]):
     """ User CRUD """
 
+    # Freelancer lists render only these columns
+    columns = (User.id, User.username, User.avatar, User.level)
+
     async def create(self, db: AsyncSession, **kwargs) -> User:
         """
             Create user
@@ -19,30 +30,82 @@ class UserCRUD(CRUD[User, Register, Register]):
             :param kwargs: kwargs
             :return: New user
         """
-        return await super().create(db, referral_link=f'{uuid.uuid4()}', **kwargs)
+        user = await super().create(db, referral_link=f'{uuid.uuid4()}', **kwargs)
+        # Committed attributes are expired on sessions with expire_on_commit
+        await db.refresh(user)
+        leaderboard.sync(user.id, user.level, user.freelancer)
+        return user
+
+    async def update(
+            self, db: AsyncSession, filter_by: dict, options: typing.Sequence[Load] = (), **kwargs,
+    ) -> User:
+        """
+            Update user
+            :param db: DB
+            :type db: AsyncSession
+            :param filter_by: Filter by
+            :type filter_by: dict
+            :param options: Loader options
+            :type options: list
+            :param kwargs: kwargs
+            :return: User
+        """
+        user = await super().update(db, filter_by, options, **kwargs)
+        if user is not None and ('level' in kwargs or 'freelancer' in kwargs):
+            leaderboard.sync(user.id, user.level, user.freelancer)
+        return user
+
+    async def remove(self, db: AsyncSession, **kwargs) -> None:
+        """
+            Remove user
+            :param db: DB
+            :type db: AsyncSession
+            :param kwargs: kwargs
+            :return: None
+        """
+        await super().remove(db, **kwargs)
+        if set(kwargs) == {'id'}:
+            leaderboard.discard(kwargs['id'])
+        else:
+            leaderboard.invalidate()
 
     @staticmethod
-    async def get_by_ids(db: AsyncSession, ids: list[int]) -> list[User]:
+    async def get_by_ids(db: AsyncSession, ids: list[int], options: typing.Sequence[Load] = ()) -> list[User]:
         """
             Get by ids
             :param db: DB
             :type db: AsyncSession
             :param ids: IDs
             :type ids: list
+            :param options: Loader options
+            :type options: list
             :return: Users
             :rtype: list
         """
         query = await db.execute(
-            sqlalchemy.select(User).filter(
+            sqlalchemy.select(User).options(*options).filter(
                 User.id.in_(ids)
             )
         )
         return query.scalars().all()
 
-    @staticmethod
-    async def freelancers(db: AsyncSession, skip: int = 0, limit: int = 100) -> list[User]:
+    async def freelancer_rows(self, db: AsyncSession, ids: list[int]) -> list[sqlalchemy.engine.Row]:
         """
-            Freelancers
+            Freelancers by IDs (read-only rows)
+            :param db: DB
+            :type db: AsyncSession
+            :param ids: IDs
+            :type ids: list
+            :return: Freelancers
+            :rtype: list
+        """
+        if not ids:
+            return []
+        return await self.rows(db, self.columns, User.id.in_(ids), limit=len(ids))
+
+    async def freelancers(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> list[sqlalchemy.engine.Row]:
+        """
+            Freelancers (page of leaderboard, read-only rows)
             :param db: DB
             :type db: AsyncSession
             :param skip: Skip
@@ -52,12 +115,9 @@ class UserCRUD(CRUD[User, Register, Register]):
             :return: Freelancers
             :rtype: list
         """
-        query = await db.execute(
-            sqlalchemy.select(User).filter_by(
-                freelancer=True
-            ).order_by(User.level.desc(), User.id.desc()).offset(skip).limit(limit)
-        )
-        return query.scalars().all()
+        ids = await leaderboard.page(db, skip, limit)
+        users = {user.id: user for user in await self.freelancer_rows(db, ids)}
+        return [users[pk] for pk in ids if pk in users]
 
     @staticmethod
     async def freelancers_exist(db: AsyncSession, skip: int = 0, limit: int = 100) -> bool:
@@ -72,19 +132,13 @@ class UserCRUD(CRUD[User, Register, Register]):
             :return: Freelancers exist?
             :rtype: bool
         """
-        query = await db.execute(
-            sqlalchemy.exists(
-                sqlalchemy.select(User.id).filter_by(freelancer=True).order_by(
-                    User.level.desc(), User.id.desc()
-                ).offset(skip).limit(limit)
-            ).select()
-        )
-        return query.scalar()
+        return await leaderboard.count(db) > skip
 
-    @staticmethod
-    async def search(db: AsyncSession, search: str, skip: int = 0, limit: int = 100) -> list[User]:
+    async def search(
+            self, db: AsyncSession, search: str, skip: int = 0, limit: int = 100,
+    ) -> list[sqlalchemy.engine.Row]:
         """
-            Search freelancers
+            Search freelancers (read-only rows)
             :param db: DB
             :type db: AsyncSession
             :param search: Search
@@ -96,15 +150,15 @@ class UserCRUD(CRUD[User, Register, Register]):
             :return: Freelancers
             :rtype: list
         """
-        query = await db.execute(
-            sqlalchemy.select(User).filter(
-                sqlalchemy.and_(
-                    User.username.ilike(f'%{search}%'),
-                    User.freelancer == True,
-                ),
-            ).order_by(User.level.desc(), User.id.desc()).offset(skip).limit(limit)
+        return await self.rows(
+            db,
+            self.columns,
+            User.username.ilike(f'%{search}%'),
+            User.freelancer == True,
+            order_by=(User.level.desc(), User.id.desc()),
+            skip=skip,
+            limit=limit,
         )
-        return query.scalars().all()
 
     @staticmethod
     async def search_exist(db: AsyncSession, search: str, skip: int = 0, limit: int = 100) -> bool:
@@ -147,39 +201,317 @@ class GitHubCRUD(CRUD[GitHub, GitHub, GitHub]):
 class SkillCRUD(CRUD[Skill, Skill, Skill]):
     """ Skill CRUD """
 
-    async def create_from_file(self, db: AsyncSession, data_list: list[list[str]], **kwargs) -> list[Skill]:
+    @staticmethod
+    async def create_many(db: AsyncSession, skills: list[dict[str, str]]) -> int:
         """
-            Create from file
+            Create skills, skip existing names and images
             :param db: DB
             :type db: AsyncSession
-            :param data_list: Skills data
-            :type data_list: list
-            :param kwargs: Kwargs
-            :return: New skills
-            :rtype: list
+            :param skills: Skills data
+            :type skills: list
+            :return: Created count
+            :rtype: int
+        """
+        query = await db.execute(insert(Skill).values(skills).on_conflict_do_nothing().returning(Skill.id))
+        created = len(query.scalars().all())
+        await db.commit()
+        return created
+
+
+class SkillImportCRUD(CRUD[SkillImport, SkillImport, SkillImport]):
+    """ Skill import CRUD """
+
+    @staticmethod
+    async def progress(db: AsyncSession, pk: int, **counts: int) -> None:
+        """
+            Add to import counters
+            :param db: DB
+            :type db: AsyncSession
+            :param pk: Skill import ID
+            :type pk: int
+            :param counts: Counters increments
+            :return: None
+        """
+        await db.execute(
+            sqlalchemy.update(SkillImport).filter_by(id=pk).values(
+                status='running',
+                **{name: getattr(SkillImport, name) + count for name, count in counts.items()},
+            )
+        )
+        await db.commit()
+
+    @staticmethod
+    async def interrupt(db: AsyncSession) -> None:
+        """
+            Fail imports left unfinished by a previous process
+            :param db: DB
+            :type db: AsyncSession
+            :return: None
         """
-        instances = []
-        for data in data_list:
-            if (await self.exist(db, image=data[0])) or (await self.exist(db, name=data[1])):
-                continue
-            new_instance = await self.create(db, image=data[0], name=data[1], **kwargs)
-            instances.append(new_instance.__dict__)
-        return instances
+        await db.execute(
+            sqlalchemy.update(SkillImport).filter(SkillImport.status.in_(('pending', 'running'))).values(
+                status='failed', detail='Interrupted', finished_at=datetime.datetime.utcnow(),
+            )
+        )
+        await db.commit()
 
 
 class UserSkillCRUD(CRUD[UserSkill, UserSkill, UserSkill]):
     """ User Skill CRUD """
-    pass
+
+    @staticmethod
+    async def skill_ids(db: AsyncSession, user_id: int) -> set[int]:
+        """
+            Skill IDs of user
+            :param db: DB
+            :type db: AsyncSession
+            :param user_id: User ID
+            :type user_id: int
+            :return: Skill IDs
+            :rtype: set
+        """
+        query = await db.execute(sqlalchemy.select(UserSkill.skill_id).filter_by(user_id=user_id))
+        return set(query.scalars().all())
 
 
 class PaymentCRUD(CRUD[Payment, Payment, Payment]):
     """ Payment CRUD """
-    pass
+
+    @staticmethod
+    async def claim(db: AsyncSession, limit: int, lease: int) -> list[sqlalchemy.engine.Row]:
+        """
+            Claim outstanding payments due for a check, they aren't claimed again until the lease expires
+            :param db: DB
+            :type db: AsyncSession
+            :param limit: Limit
+            :type limit: int
+            :param lease: Lease (seconds)
+            :type lease: int
+            :return: Payments (id, uuid, amount, attempts, created_at)
+            :rtype: list
+        """
+        now = datetime.datetime.utcnow()
+        due = sqlalchemy.select(Payment.id).filter(
+            Payment.is_completed == False, Payment.status.in_(PAYMENT_OUTSTANDING), Payment.next_check_at <= now,
+        ).order_by(Payment.next_check_at).limit(limit).with_for_update(skip_locked=True)
+        query = await db.execute(
+            sqlalchemy.update(Payment).filter(Payment.id.in_(due.scalar_subquery())).values(
+                next_check_at=now + datetime.timedelta(seconds=lease),
+            ).returning(
+                Payment.id, Payment.uuid, Payment.amount, Payment.attempts, Payment.created_at,
+            ).execution_options(synchronize_session=False)
+        )
+        payments = query.all()
+        await db.commit()
+        return payments
+
+    @staticmethod
+    async def replace(db: AsyncSession, user_id: int) -> None:
+        """
+            Mark waiting payments of user as replaced by a new one (they are still checked and credited if paid)
+            :param db: DB
+            :type db: AsyncSession
+            :param user_id: User ID
+            :type user_id: int
+            :return: None
+        """
+        await db.execute(
+            sqlalchemy.update(Payment).filter(
+                Payment.user_id == user_id, Payment.is_completed == False, Payment.status == 'WAITING',
+            ).values(status='REPLACED').execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+    @staticmethod
+    async def nudge(db: AsyncSession, pk: int, interval: int) -> bool:
+        """
+            Make outstanding payment due for a check now, if it wasn't checked for interval
+            :param db: DB
+            :type db: AsyncSession
+            :param pk: Payment ID
+            :type pk: int
+            :param interval: Minimal interval between checks (seconds)
+            :type interval: int
+            :return: Nudged?
+            :rtype: bool
+        """
+        now = datetime.datetime.utcnow()
+        query = await db.execute(
+            sqlalchemy.update(Payment).filter(
+                Payment.id == pk,
+                Payment.is_completed == False,
+                Payment.status.in_(PAYMENT_OUTSTANDING),
+                sqlalchemy.or_(
+                    Payment.checked_at == None, Payment.checked_at <= now - datetime.timedelta(seconds=interval),
+                ),
+            ).values(next_check_at=now).returning(Payment.id).execution_options(synchronize_session=False)
+        )
+        nudged = query.scalar() is not None
+        await db.commit()
+        return nudged
+
+    @staticmethod
+    async def reschedule(db: AsyncSession, delays: dict[int, int]) -> None:
+        """
+            Count failed checks and schedule next ones
+            :param db: DB
+            :type db: AsyncSession
+            :param delays: Payment ID -> delay until next check (seconds)
+            :type delays: dict
+            :return: None
+        """
+        now = datetime.datetime.utcnow()
+        for pk, delay in delays.items():
+            await db.execute(
+                sqlalchemy.update(Payment).filter(Payment.id == pk, Payment.is_completed == False).values(
+                    attempts=Payment.attempts + 1,
+                    checked_at=now,
+                    next_check_at=now + datetime.timedelta(seconds=delay),
+                ).execution_options(synchronize_session=False)
+            )
+        await db.commit()
+
+    @staticmethod
+    async def close(db: AsyncSession, statuses: dict[str, str]) -> None:
+        """
+            Close unpaid payments with final provider status (rejected, expired), they aren't checked anymore
+            :param db: DB
+            :type db: AsyncSession
+            :param statuses: Payment UUID -> status
+            :type statuses: dict
+            :return: None
+        """
+        now = datetime.datetime.utcnow()
+        for uuid_, status in statuses.items():
+            await db.execute(
+                sqlalchemy.update(Payment).filter(Payment.uuid == uuid_, Payment.is_completed == False).values(
+                    status=status, checked_at=now, next_check_at=None,
+                ).execution_options(synchronize_session=False)
+            )
+        await db.commit()
+
+    @staticmethod
+    async def complete(db: AsyncSession, uuids: list[str]) -> list[str]:
+        """
+            Complete paid payments and credit their levels in one transaction, already completed payments
+            are skipped so a payment is credited once
+            :param db: DB
+            :type db: AsyncSession
+            :param uuids: Payment UUIDs
+            :type uuids: list
+            :return: Completed payment UUIDs
+            :rtype: list
+        """
+        if not uuids:
+            return []
+
+        query = await db.execute(
+            sqlalchemy.update(Payment).filter(Payment.uuid.in_(uuids), Payment.is_completed == False).values(
+                is_completed=True, status='PAID', checked_at=datetime.datetime.utcnow(), next_check_at=None,
+            ).returning(Payment.uuid, Payment.user_id, Payment.amount).execution_options(synchronize_session=False)
+        )
+        payments = query.all()
+        if not payments:
+            await db.rollback()
+            return []
+
+        # Ledger keys make the credit idempotent even if the payment row is restored
+        await level_change_crud.apply(db, [
+            {'user_id': user_id, 'amount': amount, 'reason': 'payment', 'key': f'payment-{uuid_}'}
+            for uuid_, user_id, amount in payments
+        ])
+        return [uuid_ for uuid_, _, _ in payments]
+
+
+class LevelChangeCRUD(CRUD[LevelChange, LevelChange, LevelChange]):
+    """ Level change CRUD """
+
+    @staticmethod
+    def _array(values: list, type_) -> sqlalchemy.sql.ClauseElement:
+        """
+            Typed array parameter
+            :param values: Values
+            :type values: list
+            :param type_: Item type
+            :return: Array
+        """
+        return sqlalchemy.cast(sqlalchemy.literal(values, ARRAY(type_)), ARRAY(type_))
+
+    async def apply(self, db: AsyncSession, changes: list[dict[str, typing.Any]]) -> dict[int, int]:
+        """
+            Apply level changes in one statement: record them in the ledger (changes with an already used key
+            and changes for customers are skipped) and add them to user levels
+            :param db: DB
+            :type db: AsyncSession
+            :param changes: Changes (user_id, amount, reason, key)
+            :type changes: list
+            :return: New levels of changed users
+            :rtype: dict
+        """
+        if not changes:
+            return {}
+
+        ledger = sqlalchemy.func.unnest(
+            self._array([change['user_id'] for change in changes], sqlalchemy.Integer),
+            self._array([change['amount'] for change in changes], sqlalchemy.Integer),
+            self._array([change['reason'] for change in changes], sqlalchemy.String),
+            self._array([change.get('key') for change in changes], sqlalchemy.String),
+        ).table_valued('user_id', 'amount', 'reason', 'key').render_derived(name='changes')
+        inserted = insert(LevelChange).from_select(
+            ['user_id', 'amount', 'reason', 'key', 'created_at'],
+            sqlalchemy.select(
+                ledger.c.user_id, ledger.c.amount, ledger.c.reason, ledger.c.key,
+                sqlalchemy.func.timezone(sqlalchemy.literal_column("'utc'"), sqlalchemy.func.now()),
+            ).join(User, User.id == ledger.c.user_id).filter(User.freelancer == True),
+        ).on_conflict_do_nothing(index_elements=[LevelChange.key]).returning(
+            LevelChange.user_id, LevelChange.amount,
+        ).cte('inserted')
+        totals = sqlalchemy.select(
+            inserted.c.user_id, sqlalchemy.func.sum(inserted.c.amount).label('amount'),
+        ).group_by(inserted.c.user_id).subquery('totals')
+
+        query = await db.execute(
+            sqlalchemy.update(User).where(User.id == totals.c.user_id).values(
+                level=sqlalchemy.func.coalesce(User.level, 0) + totals.c.amount,
+            ).returning(User.id, User.level).execution_options(synchronize_session=False)
+        )
+        levels = dict(query.all())
+        await db.commit()
+
+        for user_id, level in levels.items():
+            user = db.sync_session.identity_map.get(identity_key(User, user_id))
+            if user is not None:
+                set_committed_value(user, 'level', level)
+            leaderboard.sync(user_id, level, True)
+        return levels
+
+    async def credit(
+            self, db: AsyncSession, user_id: int, amount: int, reason: str, key: typing.Optional[str] = None,
+    ) -> typing.Optional[int]:
+        """
+            Credit level
+            :param db: DB
+            :type db: AsyncSession
+            :param user_id: User ID
+            :type user_id: int
+            :param amount: Amount
+            :type amount: int
+            :param reason: Reason
+            :type reason: str
+            :param key: Idempotency key
+            :type key: str
+            :return: New level (None if key already used)
+            :rtype: int
+        """
+        levels = await self.apply(db, [{'user_id': user_id, 'amount': amount, 'reason': reason, 'key': key}])
+        return levels.get(user_id)
 
 
 user_crud = UserCRUD(User)
 verification_crud = VerificationCRUD(Verification)
 github_crud = GitHubCRUD(GitHub)
 skill_crud = SkillCRUD(Skill)
+skill_import_crud = SkillImportCRUD(SkillImport)
 user_skill_crud = UserSkillCRUD(UserSkill)
 payment_crud = PaymentCRUD(Payment)
+level_change_crud = LevelChangeCRUD(LevelChange)
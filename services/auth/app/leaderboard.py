@@ -0,0 +1,324 @@
+import bisect
+import typing
+
+import sqlalchemy
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import User
+
+Key = tuple[int, int]
+
+
+class RankedList:
+    """ Sorted list with positional access (sorted buckets indexed by a Fenwick tree over bucket sizes) """
+
+    load = 256
+
+    def __init__(self, keys: typing.Iterable[Key] = ()):
+        keys = sorted(keys)
+        self._buckets: list[list[Key]] = [keys[i:i + self.load] for i in range(0, len(keys), self.load)]
+        self._maxes: list[Key] = [bucket[-1] for bucket in self._buckets]
+        self._build()
+
+    def _build(self) -> None:
+        """
+            Rebuild Fenwick tree over bucket sizes
+            :return: None
+        """
+        self._tree = [0] * (len(self._buckets) + 1)
+        for i, bucket in enumerate(self._buckets, 1):
+            self._tree[i] += len(bucket)
+            parent = i + (i & -i)
+            if parent < len(self._tree):
+                self._tree[parent] += self._tree[i]
+        self._len = sum(len(bucket) for bucket in self._buckets)
+
+    def _add(self, bucket: int, delta: int) -> None:
+        """
+            Change bucket size in Fenwick tree
+            :param bucket: Bucket index
+            :type bucket: int
+            :param delta: Delta
+            :type delta: int
+            :return: None
+        """
+        self._len += delta
+        i = bucket + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, bucket: int) -> int:
+        """
+            Keys count before bucket
+            :param bucket: Bucket index
+            :type bucket: int
+            :return: Count
+            :rtype: int
+        """
+        count = 0
+        while bucket > 0:
+            count += self._tree[bucket]
+            bucket -= bucket & -bucket
+        return count
+
+    def _locate(self, position: int) -> tuple[int, int]:
+        """
+            Bucket and offset of position
+            :param position: Position
+            :type position: int
+            :return: Bucket index and offset
+            :rtype: tuple
+        """
+        bucket, step = 0, 1 << len(self._tree).bit_length()
+        while step:
+            if bucket + step < len(self._tree) and self._tree[bucket + step] <= position:
+                bucket += step
+                position -= self._tree[bucket]
+            step >>= 1
+        return bucket, position
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, key: Key) -> None:
+        """
+            Add key
+            :param key: Key
+            :type key: tuple
+            :return: None
+        """
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+            self._build()
+            return
+
+        i = min(bisect.bisect_left(self._maxes, key), len(self._buckets) - 1)
+        bucket = self._buckets[i]
+        bisect.insort(bucket, key)
+        self._maxes[i] = bucket[-1]
+        if len(bucket) > 2 * self.load:
+            self._buckets[i:i + 1] = [bucket[:self.load], bucket[self.load:]]
+            self._maxes[i:i + 1] = [bucket[self.load - 1], bucket[-1]]
+            self._build()
+        else:
+            self._add(i, 1)
+
+    def remove(self, key: Key) -> None:
+        """
+            Remove key
+            :param key: Key
+            :type key: tuple
+            :return: None
+            :raise ValueError: Key not found
+        """
+        i = bisect.bisect_left(self._maxes, key)
+        if i == len(self._buckets):
+            raise ValueError(key)
+        bucket = self._buckets[i]
+        j = bisect.bisect_left(bucket, key)
+        if bucket[j] != key:
+            raise ValueError(key)
+        del bucket[j]
+        if bucket:
+            self._maxes[i] = bucket[-1]
+            self._add(i, -1)
+        else:
+            del self._buckets[i]
+            del self._maxes[i]
+            self._build()
+
+    def index(self, key: Key) -> int:
+        """
+            Position of key
+            :param key: Key
+            :type key: tuple
+            :return: Position
+            :rtype: int
+            :raise ValueError: Key not found
+        """
+        i = bisect.bisect_left(self._maxes, key)
+        if i == len(self._buckets):
+            raise ValueError(key)
+        bucket = self._buckets[i]
+        j = bisect.bisect_left(bucket, key)
+        if bucket[j] != key:
+            raise ValueError(key)
+        return self._prefix(i) + j
+
+    def slice(self, start: int, stop: int) -> list[Key]:
+        """
+            Keys between positions
+            :param start: Start position
+            :type start: int
+            :param stop: Stop position (exclusive)
+            :type stop: int
+            :return: Keys
+            :rtype: list
+        """
+        start, stop = max(start, 0), min(stop, self._len)
+        if start >= stop:
+            return []
+        keys = []
+        bucket, offset = self._locate(start)
+        while len(keys) < stop - start:
+            keys.extend(self._buckets[bucket][offset:offset + stop - start - len(keys)])
+            bucket, offset = bucket + 1, 0
+        return keys
+
+
+class Leaderboard:
+    """ In-process freelancer leaderboard (level desc, id desc) """
+
+    def __init__(self):
+        self._ranked: typing.Optional[RankedList] = None
+        self._keys: dict[int, Key] = {}
+        self._version: int = 0
+
+    @staticmethod
+    def key(user_id: int, level: typing.Optional[int]) -> Key:
+        """
+            Leaderboard key
+            :param user_id: User ID
+            :type user_id: int
+            :param level: Level
+            :type level: int
+            :return: Key
+            :rtype: tuple
+        """
+        return -(level or 0), -user_id
+
+    async def load(self, db: AsyncSession) -> tuple[RankedList, dict[int, Key]]:
+        """
+            Load freelancers from DB
+            :param db: DB
+            :type db: AsyncSession
+            :return: Ranked freelancers and their keys
+            :rtype: tuple
+        """
+        version = self._version
+        query = await db.execute(sqlalchemy.select(User.id, User.level).filter_by(freelancer=True))
+        keys = {user_id: self.key(user_id, level) for user_id, level in query.all()}
+        ranked = RankedList(keys.values())
+        # Don't publish a snapshot that missed changes made while loading
+        if version == self._version:
+            self._ranked, self._keys = ranked, keys
+        return ranked, keys
+
+    def invalidate(self) -> None:
+        """
+            Invalidate leaderboard, next access reloads freelancers
+            :return: None
+        """
+        self._version += 1
+        self._ranked, self._keys = None, {}
+
+    def sync(self, user_id: int, level: typing.Optional[int], freelancer: bool) -> None:
+        """
+            Apply user level or freelancer change
+            :param user_id: User ID
+            :type user_id: int
+            :param level: Level
+            :type level: int
+            :param freelancer: Freelancer
+            :type freelancer: bool
+            :return: None
+        """
+        if self._ranked is None:
+            self._version += 1
+            return
+
+        key = self.key(user_id, level) if freelancer else None
+        old = self._keys.get(user_id)
+        if old == key:
+            return
+        if old is not None:
+            self._ranked.remove(old)
+            del self._keys[user_id]
+        if key is not None:
+            self._ranked.add(key)
+            self._keys[user_id] = key
+
+    def discard(self, user_id: int) -> None:
+        """
+            Remove user
+            :param user_id: User ID
+            :type user_id: int
+            :return: None
+        """
+        self.sync(user_id, None, False)
+
+    async def state(self, db: AsyncSession) -> tuple[RankedList, dict[int, Key]]:
+        """
+            Ranked freelancers and their keys
+            :param db: DB
+            :type db: AsyncSession
+            :return: Ranked freelancers and their keys
+            :rtype: tuple
+        """
+        if self._ranked is None:
+            return await self.load(db)
+        return self._ranked, self._keys
+
+    async def page(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> list[int]:
+        """
+            Freelancer IDs page
+            :param db: DB
+            :type db: AsyncSession
+            :param skip: Skip
+            :type skip: int
+            :param limit: Limit
+            :type limit: int
+            :return: User IDs
+            :rtype: list
+        """
+        ranked, _ = await self.state(db)
+        return [-user_id for _, user_id in ranked.slice(skip, skip + limit)]
+
+    async def count(self, db: AsyncSession) -> int:
+        """
+            Freelancers count
+            :param db: DB
+            :type db: AsyncSession
+            :return: Count
+            :rtype: int
+        """
+        ranked, _ = await self.state(db)
+        return len(ranked)
+
+    async def rank(self, db: AsyncSession, user_id: int) -> typing.Optional[int]:
+        """
+            Freelancer rank (from 1)
+            :param db: DB
+            :type db: AsyncSession
+            :param user_id: User ID
+            :type user_id: int
+            :return: Rank
+            :rtype: int
+        """
+        ranked, keys = await self.state(db)
+        key = keys.get(user_id)
+        return ranked.index(key) + 1 if key is not None else None
+
+    async def around(self, db: AsyncSession, user_id: int, window: int) -> list[tuple[int, int]]:
+        """
+            Freelancers around user
+            :param db: DB
+            :type db: AsyncSession
+            :param user_id: User ID
+            :type user_id: int
+            :param window: Freelancers before and after user
+            :type window: int
+            :return: Ranks and user IDs
+            :rtype: list
+        """
+        ranked, keys = await self.state(db)
+        if user_id not in keys:
+            return []
+        position = ranked.index(keys[user_id])
+        start = max(position - window, 0)
+        return [(start + i + 1, -key[1]) for i, key in enumerate(ranked.slice(start, position + window + 1))]
+
+
+leaderboard = Leaderboard()
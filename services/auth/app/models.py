@@ -63,6 +63,30 @@ class Skill(Base):
         return f'<Skill {self.name}>'
 
 
+class SkillImport(Base):
+    """ Skill import job """
+
+    __tablename__ = 'skill_import'
+
+    id: int = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
+    status: str = sqlalchemy.Column(sqlalchemy.String, nullable=False, default='pending')
+    processed: int = sqlalchemy.Column(sqlalchemy.Integer, nullable=False, default=0)
+    created: int = sqlalchemy.Column(sqlalchemy.Integer, nullable=False, default=0)
+    skipped: int = sqlalchemy.Column(sqlalchemy.Integer, nullable=False, default=0)
+    failed: int = sqlalchemy.Column(sqlalchemy.Integer, nullable=False, default=0)
+    detail: str = sqlalchemy.Column(sqlalchemy.String, nullable=True)
+    created_at: datetime.datetime = sqlalchemy.Column(
+        sqlalchemy.DateTime, default=datetime.datetime.utcnow, nullable=False
+    )
+    finished_at: datetime.datetime = sqlalchemy.Column(sqlalchemy.DateTime, nullable=True)
+
+    def __str__(self):
+        return f'<SkillImport {self.id}>'
+
+    def __repr__(self):
+        return f'<SkillImport {self.id}>'
+
+
 class UserSkill(Base):
     """ User skills """
 
@@ -109,13 +133,13 @@ class User(Base):
     referral_link: str = sqlalchemy.Column(sqlalchemy.String, nullable=False, unique=True)
 
     verification: typing.Union[relationship, Verification] = relationship(
-        Verification, backref='user', lazy='selectin', cascade='all, delete', uselist=False,
+        Verification, backref='user', lazy='raise', cascade='all, delete', uselist=False,
     )
     github: typing.Union[relationship, GitHub] = relationship(
-        GitHub, backref='user', lazy='selectin', cascade='all, delete', uselist=False,
+        GitHub, backref='user', lazy='raise', cascade='all, delete', uselist=False,
     )
     skills: typing.Union[relationship, list[UserSkill]] = relationship(
-        Skill, secondary='user_skill', lazy='selectin', cascade='all, delete',
+        Skill, secondary='user_skill', lazy='raise', cascade='all, delete',
     )
 
     def __str__(self):
@@ -125,6 +149,29 @@ class User(Base):
         return f'<User {self.username}>'
 
 
+class LevelChange(Base):
+    """ Level change (append-only ledger, user.level is its running total) """
+
+    __tablename__ = 'level_change'
+
+    id: int = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
+    user_id: int = sqlalchemy.Column(
+        sqlalchemy.Integer, sqlalchemy.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True,
+    )
+    amount: int = sqlalchemy.Column(sqlalchemy.Integer, nullable=False)
+    reason: str = sqlalchemy.Column(sqlalchemy.String, nullable=False)
+    key: typing.Optional[str] = sqlalchemy.Column(sqlalchemy.String, nullable=True, unique=True)
+    created_at: datetime.datetime = sqlalchemy.Column(
+        sqlalchemy.DateTime, default=datetime.datetime.utcnow, nullable=False
+    )
+
+    def __str__(self):
+        return f'<LevelChange {self.id}>'
+
+    def __repr__(self):
+        return f'<LevelChange {self.id}>'
+
+
 class Payment(Base):
     """ Payment """
 
@@ -138,6 +185,15 @@ class Payment(Base):
         sqlalchemy.Integer, sqlalchemy.ForeignKey('user.id', ondelete='CASCADE'), nullable=False,
     )
     is_completed: bool = sqlalchemy.Column(sqlalchemy.Boolean, default=False)
+    status: str = sqlalchemy.Column(sqlalchemy.String, nullable=False, default='WAITING')
+    attempts: int = sqlalchemy.Column(sqlalchemy.Integer, nullable=False, default=0)
+    created_at: datetime.datetime = sqlalchemy.Column(
+        sqlalchemy.DateTime, default=datetime.datetime.utcnow, nullable=False
+    )
+    checked_at: datetime.datetime = sqlalchemy.Column(sqlalchemy.DateTime, nullable=True)
+    next_check_at: datetime.datetime = sqlalchemy.Column(
+        sqlalchemy.DateTime, default=datetime.datetime.utcnow, nullable=True, index=True
+    )
 
     def __str__(self):
         return f'<Payment {self.id}>'
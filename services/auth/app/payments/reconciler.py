@@ -0,0 +1,116 @@
+import asyncio
+import datetime
+import typing
+
+import aiohttp
+import sqlalchemy
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import requests
+from app.crud import payment_crud
+from app.payments.service import outcome
+from config import (
+    PAYMENT_RECONCILE_INTERVAL,
+    PAYMENT_RECONCILE_BATCH,
+    PAYMENT_RECONCILE_CONCURRENCY,
+    PAYMENT_BACKOFF_BASE,
+    PAYMENT_BACKOFF_MAX,
+    PAYMENT_TTL,
+)
+from db import async_session
+
+
+def backoff(attempts: int) -> int:
+    """
+        Delay until next check
+        :param attempts: Failed checks
+        :type attempts: int
+        :return: Delay (seconds)
+        :rtype: int
+    """
+    return min(PAYMENT_BACKOFF_BASE * 2 ** min(attempts, 32), PAYMENT_BACKOFF_MAX)
+
+
+class Reconciler:
+    """ Background payment reconciler (polls outstanding bills in batches with backoff) """
+
+    def __init__(self):
+        self._wake: typing.Optional[asyncio.Event] = None
+
+    def wake(self) -> None:
+        """
+            Run next pass now
+            :return: None
+        """
+        if self._wake is not None:
+            self._wake.set()
+
+    @staticmethod
+    async def reconcile(db: AsyncSession) -> int:
+        """
+            Check a batch of outstanding payments with provider
+            :param db: DB
+            :type db: AsyncSession
+            :return: Checked payments count
+            :rtype: int
+        """
+        # Lease covers the slowest pass (every check timing out), a crashed pass is retried after it
+        rounds = -(-PAYMENT_RECONCILE_BATCH // PAYMENT_RECONCILE_CONCURRENCY)
+        payments = await payment_crud.claim(db, PAYMENT_RECONCILE_BATCH, PAYMENT_BACKOFF_BASE * (rounds + 1))
+        if not payments:
+            return 0
+
+        semaphore = asyncio.Semaphore(PAYMENT_RECONCILE_CONCURRENCY)
+
+        async def check(session: aiohttp.ClientSession, payment: sqlalchemy.engine.Row) -> typing.Optional[dict]:
+            async with semaphore:
+                try:
+                    return await requests.check_request(session, payment.uuid)
+                except Exception as _ex:
+                    print(_ex)
+                    return None
+
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=PAYMENT_BACKOFF_BASE)) as session:
+            bills = await asyncio.gather(*(check(session, payment) for payment in payments))
+
+        expired_at = datetime.datetime.utcnow() - datetime.timedelta(seconds=PAYMENT_TTL)
+        completed, closed, delays = [], {}, {}
+        for payment, bill in zip(payments, bills):
+            status = outcome(bill, payment.amount) if bill is not None else None
+            if status == 'PAID':
+                completed.append(payment.uuid)
+            elif status is not None:
+                closed[payment.uuid] = status
+            elif payment.created_at <= expired_at:
+                closed[payment.uuid] = 'EXPIRED'
+            else:
+                delays[payment.id] = backoff(payment.attempts)
+
+        await payment_crud.complete(db, completed)
+        await payment_crud.close(db, closed)
+        await payment_crud.reschedule(db, delays)
+        return len(payments)
+
+    async def run(self) -> None:
+        """
+            Reconciler loop
+            :return: None
+        """
+
+        self._wake = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), PAYMENT_RECONCILE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                async with async_session() as db:
+                    # Drain backlog in batches, a short batch means nothing else is due
+                    while await self.reconcile(db) == PAYMENT_RECONCILE_BATCH:
+                        pass
+            except Exception as _ex:
+                print(_ex)
+
+
+reconciler = Reconciler()
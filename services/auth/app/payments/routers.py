@@ -1,9 +1,9 @@
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, Header
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import User
 from app.payments import views
-from app.payments.schemas import GetPayment
+from app.payments.schemas import GetPayment, Notification, NotificationResponse
 from app.schemas import Message
 from app.views import is_freelancer
 from db import get_db
@@ -35,3 +35,20 @@ async def pay(amount: int, user: User = Depends(is_freelancer), db: AsyncSession
 )
 async def check(pk: int, db: AsyncSession = Depends(get_db)):
     return await views.check(db, pk)
+
+
+@payments_router.post(
+    '/payments/notify',
+    name='Payment notification',
+    description='Provider notification about bill status',
+    response_description='Provider response',
+    status_code=status.HTTP_200_OK,
+    response_model=NotificationResponse,
+    tags=['payments'],
+)
+async def notify(
+        notification: Notification,
+        sign: str = Header('', alias='X-Api-Signature-SHA256'),
+        db: AsyncSession = Depends(get_db),
+):
+    return await views.notify(db, notification, sign)
@@ -6,3 +6,38 @@ class GetPayment(BaseModel):
 
     url: str
     id: int
+
+
+class BillAmount(BaseModel):
+    """ Bill amount """
+
+    value: str
+    currency: str
+
+
+class BillStatus(BaseModel):
+    """ Bill status """
+
+    value: str
+
+
+class Bill(BaseModel):
+    """ Bill """
+
+    siteId: str
+    billId: str
+    amount: BillAmount
+    status: BillStatus
+
+
+class Notification(BaseModel):
+    """ Provider notification """
+
+    bill: Bill
+    version: str = '1'
+
+
+class NotificationResponse(BaseModel):
+    """ Notification response """
+
+    error: str
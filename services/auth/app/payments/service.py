@@ -0,0 +1,46 @@
+import decimal
+import hashlib
+import hmac
+import typing
+
+from config import SECRET_QIWI_KEY
+
+FINAL_STATUSES = ('REJECTED', 'EXPIRED')
+
+
+def signature(bill: dict) -> str:
+    """
+        Provider notification signature (HMAC-SHA256 of currency|value|billId|siteId|status)
+        :param bill: Provider bill
+        :type bill: dict
+        :return: Signature
+        :rtype: str
+    """
+    message = '|'.join((
+        str(bill['amount']['currency']),
+        str(bill['amount']['value']),
+        str(bill['billId']),
+        str(bill['siteId']),
+        str(bill['status']['value']),
+    ))
+    return hmac.new(SECRET_QIWI_KEY.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+
+def outcome(bill: dict, amount: int) -> typing.Optional[str]:
+    """
+        Final payment status from provider bill
+        :param bill: Provider bill
+        :type bill: dict
+        :param amount: Payment amount
+        :type amount: int
+        :return: PAID (paid in full), final unpaid status or None (still waiting)
+        :rtype: str
+    """
+    try:
+        status = bill['status']['value']
+        if status == 'PAID':
+            # Paid with a different amount is closed for manual review
+            return 'PAID' if decimal.Decimal(bill['amount']['value']) == amount else 'AMOUNT_MISMATCH'
+    except (KeyError, TypeError, decimal.InvalidOperation):
+        return None
+    return status if status in FINAL_STATUSES else None
@@ -1,12 +1,17 @@
+import datetime
+import hmac
 import uuid
+from urllib.parse import urlencode
 
 from fastapi import status, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app import requests
-from app.crud import payment_crud, user_crud
+from app.crud import payment_crud
 from app.models import User
-from config import PUBLIC_QIWI_KEY
+from app.payments.reconciler import reconciler
+from app.payments.schemas import Notification
+from app.payments.service import signature, outcome
+from config import PUBLIC_QIWI_KEY, QIWI_PAY_URL, PAYMENT_BACKOFF_BASE
 
 
 async def pay(db: AsyncSession, user: User, amount: int) -> dict[str, str]:
@@ -22,22 +27,23 @@ async def pay(db: AsyncSession, user: User, amount: int) -> dict[str, str]:
         :rtype: dict
     """
 
-    if await payment_crud.exist(db, user_id=user.id, is_completed=False):
-        await payment_crud.remove(db, user_id=user.id, is_completed=False)
+    # Previous bill may be paid already, it's replaced (not deleted) so notification and reconciler can credit it
+    await payment_crud.replace(db, user.id)
     payment = await payment_crud.create(
-        db, uuid=str(uuid.uuid4()), amount=amount, comment=f'Buy level for user {user.username}', user_id=user.id
+        db, uuid=str(uuid.uuid4()), amount=amount, comment=f'Buy level for user {user.username}', user_id=user.id,
+        next_check_at=datetime.datetime.utcnow() + datetime.timedelta(seconds=PAYMENT_BACKOFF_BASE),
     )
 
-    _url = f'https://oplata.qiwi.com/create?' \
-           f'publicKey={PUBLIC_QIWI_KEY}&billId={payment.uuid}&amount={payment.amount}&comment={payment.comment}'
-
-    payment_url = await requests.pay_request(_url)
-    return {'url': f'{payment_url}', **payment.__dict__}
+    # Provider creates the bill when user opens the form, nothing is requested here
+    query = urlencode({
+        'publicKey': PUBLIC_QIWI_KEY, 'billId': payment.uuid, 'amount': payment.amount, 'comment': payment.comment,
+    })
+    return {'url': f'{QIWI_PAY_URL}?{query}', **payment.__dict__}
 
 
 async def check(db: AsyncSession,  pk: int) -> dict[str, str]:
     """
-        Check payment and level up
+        Check payment, payments are credited by provider notifications and background reconciler
         :param db: DB
         :type db: AsyncSession
         :param pk: Payment ID
@@ -45,7 +51,6 @@ async def check(db: AsyncSession,  pk: int) -> dict[str, str]:
         :return: Message
         :rtype: dict
         :raise HTTPException 400: Payment not found
-        :raise HTTPException 400: The purchase has already been credited
         :raise HTTPException 400: Payment not paid
     """
 
@@ -54,14 +59,40 @@ async def check(db: AsyncSession,  pk: int) -> dict[str, str]:
     payment = await payment_crud.get(db, id=pk)
 
     if payment.is_completed:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='The purchase has already been credited')
+        return {'msg': 'Level has been up'}
+
+    if await payment_crud.nudge(db, pk, PAYMENT_BACKOFF_BASE):
+        reconciler.wake()
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Payment not paid')
+
+
+async def notify(db: AsyncSession, notification: Notification, sign: str) -> dict[str, str]:
+    """
+        Provider notification about bill status
+        :param db: DB
+        :type db: AsyncSession
+        :param notification: Notification
+        :type notification: Notification
+        :param sign: Notification signature
+        :type sign: str
+        :return: Provider response
+        :rtype: dict
+        :raise HTTPException 403: Bad signature
+    """
 
-    response = await requests.check_request(f'https://api.qiwi.com/partner/bill/v1/bills/{payment.uuid}')
+    bill = notification.bill.dict()
+    if not hmac.compare_digest(signature(bill).encode(), sign.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Bad signature')
 
-    if response.get('status').get('value') != 'PAID':
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Payment not paid')
+    # Repeated notifications and bills that were never created here are acknowledged, so provider doesn't resend them.
+    # Replaced bills are still outstanding and are completed as usual
+    payment = await payment_crud.get(db, uuid=notification.bill.billId)
+    if payment is None or payment.is_completed:
+        return {'error': '0'}
 
-    user = await user_crud.get(db, id=payment.user_id)
-    await user_crud.update(db, {'id': user.id}, level=user.level + payment.amount)
-    await payment_crud.update(db, {'id': payment.id}, is_completed=True)
-    return {'msg': 'Level has been up'}
+    final_status = outcome(bill, payment.amount)
+    if final_status == 'PAID':
+        await payment_crud.complete(db, [payment.uuid])
+    elif final_status is not None:
+        await payment_crud.close(db, {payment.uuid: final_status})
+    return {'error': '0'}
@@ -1,40 +1,27 @@
 import aiohttp
 from fastapi import HTTPException
 
-from config import SECRET_QIWI_KEY
+from config import SECRET_QIWI_KEY, QIWI_API_URL
 
 
-async def pay_request(url: str) -> str:
-    """
-        Pay request
-        :param url: URL
-        :type url: str
-        :return: URL
-        :rtype: str
-        :raise HTTPException: Bad response
-    """
-
-    async with aiohttp.ClientSession() as session:
-        response = await session.get(url, allow_redirects=True)
-
-        if not response.ok:
-            raise HTTPException(response.status, 'Error')
-    return f'{response.url}'
-
-
-async def check_request(url: str) -> dict:
+async def check_request(session: aiohttp.ClientSession, bill_id: str) -> dict:
     """
         Check request
-        :param url: URL
-        :type url: str
+        :param session: Session
+        :type session: ClientSession
+        :param bill_id: Bill ID
+        :type bill_id: str
         :return: Data
         :rtype: dict
         :raise HTTPException: Bad response
     """
 
-    async with aiohttp.ClientSession() as session:
-        response = await session.get(url, headers={'Authorization': f'Bearer {SECRET_QIWI_KEY}'}, allow_redirects=True)
-
+    response = await session.get(
+        f'{QIWI_API_URL}{bill_id}',
+        headers={'Authorization': f'Bearer {SECRET_QIWI_KEY}', 'Accept': 'application/json'},
+        allow_redirects=True,
+    )
+    async with response:
         json = await response.json()
 
         if not response.ok:
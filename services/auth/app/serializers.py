@@ -0,0 +1,89 @@
+import datetime
+import operator
+import typing
+from functools import wraps
+
+from fastapi.responses import ORJSONResponse
+
+from app.avatars import avatar_urls
+from config import SERVER_AUTH_BACKEND
+
+
+def utc(value: datetime.datetime) -> str:
+    """
+        UTC datetime in response format (same as schema validators)
+        :param value: Datetime
+        :type value: datetime
+        :return: ISO datetime
+        :rtype: str
+    """
+    return f'{value}Z'.replace(' ', 'T')
+
+
+class Serializer:
+    """ Response rows straight from ORM instance columns or Core rows (no __dict__ copies, no validation) """
+
+    def __init__(self, *fields: str, **formatters: typing.Callable[[typing.Any], typing.Any]):
+        self.fields = fields
+        self.formatters = tuple(formatters.items())
+        self._values = operator.attrgetter(*fields)
+
+    def row(self, instance: typing.Any) -> dict[str, typing.Any]:
+        """
+            Serialize row
+            :param instance: ORM instance or Core row
+            :return: Row
+            :rtype: dict
+        """
+        values = self._values(instance)
+        row = dict(zip(self.fields, values if len(self.fields) > 1 else (values,)))
+        for name, formatter in self.formatters:
+            if row[name] is not None:
+                row[name] = formatter(row[name])
+        return row
+
+    def rows(self, instances: typing.Iterable[typing.Any]) -> list[dict[str, typing.Any]]:
+        """
+            Serialize rows
+            :param instances: ORM instances or Core rows
+            :return: Rows
+            :rtype: list
+        """
+        return [self.row(instance) for instance in instances]
+
+
+def json_response(function):
+    """
+        Return view result as orjson response, response model validation is skipped for it
+        :param function: View
+        :return: Wrapper
+    """
+
+    @wraps(function)
+    async def wrapper(*args, **kwargs) -> ORJSONResponse:
+        """
+            Wrapper
+            :param args: args
+            :param kwargs: kwargs
+            :return: Response
+            :rtype: ORJSONResponse
+        """
+        return ORJSONResponse(await function(*args, **kwargs))
+
+    return wrapper
+
+
+freelancer_serializer = Serializer('id', 'username', 'avatar', 'level', level=lambda level: level / 100)
+
+
+def freelancer_row(instance: typing.Any) -> dict[str, typing.Any]:
+    """
+        Serialize freelancer (avatar and avatars same as GetFreelancer validators)
+        :param instance: User row
+        :return: Freelancer
+        :rtype: dict
+    """
+    row = freelancer_serializer.row(instance)
+    row['avatar'] = SERVER_AUTH_BACKEND + row['avatar'] if row['avatar'] else 'https://via.placeholder.com/400x400'
+    row['avatars'] = {str(size): url for size, url in avatar_urls(row['avatar']).items()}
+    return row
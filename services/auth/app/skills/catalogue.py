@@ -0,0 +1,84 @@
+import typing
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import skill_crud
+
+
+class SkillCatalogue:
+    """ In-process skill catalogue (skill ID -> skill) """
+
+    def __init__(self):
+        self._skills: typing.Optional[dict[int, dict[str, typing.Union[int, str]]]] = None
+        self._version: int = 0
+
+    async def load(self, db: AsyncSession) -> dict[int, dict[str, typing.Union[int, str]]]:
+        """
+            Load skills from DB
+            :param db: DB
+            :type db: AsyncSession
+            :return: Skills
+            :rtype: dict
+        """
+        version = self._version
+        skills = {
+            skill.id: {'id': skill.id, 'name': skill.name, 'image': skill.image}
+            for skill in await skill_crud.all(db, limit=1000)
+        }
+        # Don't publish a snapshot that was invalidated while loading
+        if version == self._version:
+            self._skills = skills
+        return skills
+
+    def invalidate(self) -> None:
+        """
+            Invalidate catalogue, next access reloads skills
+            :return: None
+        """
+        self._version += 1
+        self._skills = None
+
+    async def all(self, db: AsyncSession) -> dict[int, dict[str, typing.Union[int, str]]]:
+        """
+            All skills (newest first)
+            :param db: DB
+            :type db: AsyncSession
+            :return: Skills
+            :rtype: dict
+        """
+        skills = self._skills
+        if skills is None:
+            skills = await self.load(db)
+        return skills
+
+    async def get(self, db: AsyncSession, pk: int) -> typing.Optional[dict[str, typing.Union[int, str]]]:
+        """
+            Get skill
+            :param db: DB
+            :type db: AsyncSession
+            :param pk: Skill ID
+            :type pk: int
+            :return: Skill
+            :rtype: dict
+        """
+        return (await self.all(db)).get(pk)
+
+    async def split(
+            self, db: AsyncSession, skill_ids: set[int],
+    ) -> tuple[list[dict[str, typing.Union[int, str]]], list[dict[str, typing.Union[int, str]]]]:
+        """
+            Split skills into selected and other
+            :param db: DB
+            :type db: AsyncSession
+            :param skill_ids: Selected skill IDs
+            :type skill_ids: set
+            :return: Selected skills and other skills
+            :rtype: tuple
+        """
+        selected, other = [], []
+        for pk, skill in (await self.all(db)).items():
+            (selected if pk in skill_ids else other).append(skill)
+        return selected, other
+
+
+skill_catalogue = SkillCatalogue()
@@ -0,0 +1,106 @@
+import asyncio
+import datetime
+import itertools
+import typing
+
+import xlrd
+
+from app.crud import skill_crud, skill_import_crud
+from app.service import remove_file
+from app.skills.catalogue import skill_catalogue
+from config import SKILL_IMPORT_CHUNK_SIZE
+from db import async_session
+
+
+def read_rows(file_name: str) -> typing.Iterator[list]:
+    """
+        Read skill rows (image, name) from the first sheet, header skipped
+        :param file_name: File name
+        :type file_name: str
+        :return: Rows
+    """
+
+    book = xlrd.open_workbook(file_name, on_demand=True)
+    try:
+        sheet = book.sheet_by_index(0)
+        for row in range(1, sheet.nrows):
+            yield sheet.row_values(row, 0, 2)
+    finally:
+        book.release_resources()
+
+
+def read_chunks(file_name: str, size: int) -> typing.Iterator[list[list]]:
+    """
+        Read skill rows in chunks
+        :param file_name: File name
+        :type file_name: str
+        :param size: Chunk size
+        :type size: int
+        :return: Chunks
+    """
+
+    rows = read_rows(file_name)
+    while chunk := list(itertools.islice(rows, size)):
+        yield chunk
+
+
+def validate_rows(rows: list[list]) -> tuple[list[dict[str, str]], int, int]:
+    """
+        Validate rows
+        :param rows: Rows
+        :type rows: list
+        :return: Valid skills, duplicates in chunk and invalid rows count
+        :rtype: tuple
+    """
+
+    skills, names, images, skipped, failed = [], set(), set(), 0, 0
+    for row in rows:
+        if len(row) < 2 or not all(isinstance(value, str) and value.strip() for value in row):
+            failed += 1
+            continue
+        image, name = (value.strip() for value in row)
+        if image in images or name in names:
+            skipped += 1
+            continue
+        images.add(image)
+        names.add(name)
+        skills.append({'image': image, 'name': name})
+    return skills, skipped, failed
+
+
+async def run_import(pk: int, file_name: str) -> None:
+    """
+        Run skill import job
+        :param pk: Skill import ID
+        :type pk: int
+        :param file_name: Uploaded file name
+        :type file_name: str
+        :return: None
+    """
+
+    loop = asyncio.get_running_loop()
+    chunks = read_chunks(file_name, SKILL_IMPORT_CHUNK_SIZE)
+    async with async_session() as db:
+        try:
+            # Parsing is blocking, each chunk is read in the default executor
+            while chunk := await loop.run_in_executor(None, next, chunks, None):
+                skills, skipped, failed = validate_rows(chunk)
+                created = await skill_crud.create_many(db, skills) if skills else 0
+                if created:
+                    skill_catalogue.invalidate()
+                await skill_import_crud.progress(
+                    db, pk,
+                    processed=len(chunk), created=created, skipped=skipped + len(skills) - created, failed=failed,
+                )
+            await skill_import_crud.update(
+                db, {'id': pk}, status='completed', finished_at=datetime.datetime.utcnow(),
+            )
+        except Exception as _ex:
+            print(_ex)
+            await db.rollback()
+            await skill_import_crud.update(
+                db, {'id': pk}, status='failed', detail=str(_ex), finished_at=datetime.datetime.utcnow(),
+            )
+        finally:
+            chunks.close()
+            remove_file(file_name)
@@ -1,9 +1,9 @@
-from fastapi import APIRouter, UploadFile, File, Depends, status
+from fastapi import APIRouter, UploadFile, File, Depends, status, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas import Message
 from app.skills import views
-from app.skills.schemas import GetSkill, UpdateSkill, CreateSkill
+from app.skills.schemas import GetSkill, UpdateSkill, CreateSkill, GetSkillImport
 from app.views import is_superuser
 from db import get_db
 
@@ -14,14 +14,32 @@ skills_router = APIRouter()
     '/excel',
     name='Import from excel',
     description='Import from excel',
-    response_description='Skills',
-    status_code=status.HTTP_201_CREATED,
-    response_model=list[GetSkill],
+    response_description='Skill import',
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=GetSkillImport,
+    dependencies=[Depends(is_superuser)],
+    tags=['skills'],
+)
+async def import_from_excel(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db)
+):
+    return await views.import_from_excel(db, file, background_tasks)
+
+
+@skills_router.get(
+    '/imports/{pk}',
+    name='Get skill import',
+    description='Get skill import progress',
+    response_description='Skill import',
+    status_code=status.HTTP_200_OK,
+    response_model=GetSkillImport,
     dependencies=[Depends(is_superuser)],
     tags=['skills'],
 )
-async def import_from_excel(file: UploadFile = File(...), db: AsyncSession = Depends(get_db)):
-    return await views.import_from_excel(db, file)
+async def get_skill_import(pk: int, db: AsyncSession = Depends(get_db)):
+    return await views.get_skill_import(db, pk)
 
 
 @skills_router.get(
@@ -1,3 +1,6 @@
+import datetime
+import typing
+
 from pydantic import BaseModel
 
 
@@ -17,3 +20,17 @@ class GetSkill(CreateSkill):
     """ Get skill """
 
     id: int
+
+
+class GetSkillImport(BaseModel):
+    """ Get skill import """
+
+    id: int
+    status: str
+    processed: int
+    created: int
+    skipped: int
+    failed: int
+    detail: typing.Optional[str] = None
+    created_at: datetime.datetime
+    finished_at: typing.Optional[datetime.datetime] = None
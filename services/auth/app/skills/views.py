@@ -1,31 +1,67 @@
-import io
+import os
+import tempfile
 import typing
 
-from fastapi import UploadFile, HTTPException, status
-from pandas import DataFrame, read_excel
+from fastapi import UploadFile, HTTPException, status, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud import skill_crud
+from app.crud import skill_crud, skill_import_crud
+from app.service import write_file, remove_file
+from app.skills.catalogue import skill_catalogue
+from app.skills.imports import run_import
 from app.skills.schemas import UpdateSkill, CreateSkill
 
 
-async def import_from_excel(db: AsyncSession, file: UploadFile) -> list[dict[str, typing.Union[int, str]]]:
+async def import_from_excel(
+        db: AsyncSession, file: UploadFile, background_tasks: BackgroundTasks,
+) -> dict[str, typing.Any]:
     """
-        Import from excel skills
+        Import from excel skills (in background)
         :param db: DB
         :type db: AsyncSession
         :param file: Excel file
         :type file: UploadFile
-        :return: New instances
-        :rtype: list
+        :param background_tasks: Background tasks
+        :type background_tasks: BackgroundTasks
+        :return: Skill import
+        :rtype: dict
         :raise HTTPException 400: File not format xls
+        :raise HTTPException 413: File is too large
     """
 
     if file.content_type != 'application/vnd.ms-excel':
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='File only format xls (excel)')
 
-    data: DataFrame = read_excel(io.BytesIO(await file.read()))
-    return await skill_crud.create_from_file(db, data.values)
+    descriptor, file_name = tempfile.mkstemp(suffix='.xls')
+    os.close(descriptor)
+    try:
+        await write_file(file_name, file)
+        skill_import = await skill_import_crud.create(db)
+    except Exception:
+        remove_file(file_name)
+        raise
+
+    background_tasks.add_task(run_import, skill_import.id, file_name)
+    return skill_import.__dict__
+
+
+async def get_skill_import(db: AsyncSession, pk: int) -> dict[str, typing.Any]:
+    """
+        Get skill import
+        :param db: DB
+        :type db: AsyncSession
+        :param pk: Skill import ID
+        :type pk: int
+        :return: Skill import
+        :rtype: dict
+        :raise HTTPException 400: Skill import not found
+    """
+
+    if not await skill_import_crud.exist(db, id=pk):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Skill import not found')
+
+    skill_import = await skill_import_crud.get(db, id=pk)
+    return skill_import.__dict__
 
 
 async def get_all_skills(db: AsyncSession):
@@ -35,7 +71,7 @@ async def get_all_skills(db: AsyncSession):
         :type db: AsyncSession
         :return: Skills
     """
-    return (skill.__dict__ for skill in await skill_crud.all(db, limit=1000))
+    return list((await skill_catalogue.all(db)).values())
 
 
 async def get_skill(db: AsyncSession, pk: int) -> dict[str, typing.Union[int, str]]:
@@ -50,11 +86,10 @@ async def get_skill(db: AsyncSession, pk: int) -> dict[str, typing.Union[int, st
         :raise HTTPException 400: Skill not found
     """
 
-    if not await skill_crud.exist(db, id=pk):
+    skill = await skill_catalogue.get(db, pk)
+    if skill is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Skill not found')
-
-    skill = await skill_crud.get(db, id=pk)
-    return skill.__dict__
+    return skill
 
 
 async def update_skill(db: AsyncSession, schema: UpdateSkill, pk: int) -> dict[str, typing.Union[int, str]]:
@@ -87,6 +122,7 @@ async def update_skill(db: AsyncSession, schema: UpdateSkill, pk: int) -> dict[s
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Skill image exist')
 
     skill = await skill_crud.update(db, {'id': pk}, **schema.dict())
+    skill_catalogue.invalidate()
     return skill.__dict__
 
 
@@ -109,6 +145,7 @@ async def create_skill(db: AsyncSession, schema: CreateSkill) -> dict[str, typin
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Skill image exist')
 
     skill = await skill_crud.create(db, **schema.dict())
+    skill_catalogue.invalidate()
     return skill.__dict__
 
 
@@ -127,4 +164,5 @@ async def remove_skill(db: AsyncSession, pk: int) -> dict[str, str]:
     if not await skill_crud.exist(db, id=pk):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Skill not found')
     await skill_crud.remove(db, id=pk)
+    skill_catalogue.invalidate()
     return {'msg': 'Skill has been deleted'}
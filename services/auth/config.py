@@ -26,6 +26,35 @@ DATABASE_URL = f'postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT
 
 MEDIA_ROOT = 'media/'
 
+# Uploads
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 64 * 1024))
+MAX_FILE_SIZE = int(os.environ.get('MAX_FILE_SIZE', 5 * 1024 * 1024))
+MAX_UPLOAD_SIZE = int(os.environ.get('MAX_UPLOAD_SIZE', 10 * 1024 * 1024))
+
+# Skill import
+SKILL_IMPORT_CHUNK_SIZE = int(os.environ.get('SKILL_IMPORT_CHUNK_SIZE', 500))
+
+# Storage (local or s3)
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local')
+S3_ENDPOINT = os.environ.get('S3_ENDPOINT', 'http://minio:9000')
+S3_PUBLIC_ENDPOINT = os.environ.get('S3_PUBLIC_ENDPOINT', S3_ENDPOINT)
+S3_BUCKET = os.environ.get('S3_BUCKET', 'auth')
+S3_ACCESS_KEY = os.environ.get('S3_ACCESS_KEY', 'S3_ACCESS_KEY')
+S3_SECRET_KEY = os.environ.get('S3_SECRET_KEY', 'S3_SECRET_KEY')
+S3_REGION = os.environ.get('S3_REGION', 'us-east-1')
+S3_PRESIGN_EXPIRES = int(os.environ.get('S3_PRESIGN_EXPIRES', 60 * 60))
+S3_PART_SIZE = int(os.environ.get('S3_PART_SIZE', 8 * 1024 * 1024))
+
+# Avatars
+AVATAR_SIZES = (64, 128, 256)
+AVATAR_MAX_SIZE = 512
+AVATAR_WORKERS = int(os.environ.get('AVATAR_WORKERS', 2))
+AVATAR_PLACEHOLDER = 'https://via.placeholder.com/{size}x{size}'
+
+# Media
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 60 * 60 * 24 * 30))
+MEDIA_ACCEL_REDIRECT = os.environ.get('MEDIA_ACCEL_REDIRECT', '')
+
 if int(TEST):
     DATABASE_URL = f'postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}_test'
     MEDIA_ROOT = 'media/tests/'
@@ -44,6 +73,18 @@ SERVER_USER_PASSWORD = os.environ.get('SERVER_PASSWORD', 'SERVER_PASSWORD')
 
 SECRET_QIWI_KEY = os.environ.get('SECRET_QIWI_KEY', 'SECRET_QIWI_KEY')
 PUBLIC_QIWI_KEY = os.environ.get('PUBLIC_QIWI_KEY', 'PUBLIC_QIWI_KEY')
+QIWI_API_URL = os.environ.get('QIWI_API_URL', 'https://api.qiwi.com/partner/bill/v1/bills/')
+QIWI_PAY_URL = os.environ.get('QIWI_PAY_URL', 'https://oplata.qiwi.com/create')
+
+# Payment reconciler
+PAYMENT_RECONCILE_INTERVAL = int(os.environ.get('PAYMENT_RECONCILE_INTERVAL', 30))
+PAYMENT_RECONCILE_BATCH = int(os.environ.get('PAYMENT_RECONCILE_BATCH', 50))
+PAYMENT_RECONCILE_CONCURRENCY = int(os.environ.get('PAYMENT_RECONCILE_CONCURRENCY', 5))
+PAYMENT_BACKOFF_BASE = int(os.environ.get('PAYMENT_BACKOFF_BASE', 30))
+PAYMENT_BACKOFF_MAX = int(os.environ.get('PAYMENT_BACKOFF_MAX', 60 * 60))
+PAYMENT_TTL = int(os.environ.get('PAYMENT_TTL', 60 * 60 * 24 * 3))
+# Unpaid bills still checked with provider, a replaced bill (user requested a new one) can be paid too
+PAYMENT_OUTSTANDING = ('WAITING', 'REPLACED')
 
 social_auth = OAuth()
 redirect_url = f'{SERVER_AUTH_BACKEND}{API}/github/bind'
@@ -1,15 +1,22 @@
+import asyncio
 import os
 
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, status, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
 from starlette.middleware.sessions import SessionMiddleware
 
 from app.admin.routers import admin_router
 from app.auth.routers import auth_router
+from app.crud import skill_import_crud
+from app.leaderboard import leaderboard
+from app.avatars import shutdown_pool, backfill_thumbnails
+from app.payments.reconciler import reconciler
 from app.payments.routers import payments_router
 from app.routers import permission_router
+from app.skills.catalogue import skill_catalogue
 from app.skills.routers import skills_router
+from app.storage import storage
 from config import (
     PROJECT_NAME,
     API,
@@ -20,6 +27,8 @@ from config import (
     SECRET_KEY,
     CLIENT_NAME,
     VERSION,
+    MAX_UPLOAD_SIZE,
+    TEST,
 )
 from createsuperuser import createsuperuser
 from db import async_session, engine, Base
@@ -42,6 +51,18 @@ app.add_middleware(
 )
 
 
+@app.middleware('http')
+async def upload_size_limit(request: Request, call_next):
+    """ Reject too large bodies before they are parsed """
+
+    content_length = request.headers.get('content-length', '')
+    if content_length.isdigit() and int(content_length) > MAX_UPLOAD_SIZE:
+        return JSONResponse(
+            {'detail': 'Upload is too large'}, status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
+    return await call_next(request)
+
+
 @app.on_event('startup')
 async def startup():
     async with engine.begin() as connection:
@@ -50,6 +71,20 @@ async def startup():
         os.makedirs(MEDIA_ROOT)
     async with async_session() as session:
         await createsuperuser(session, ADMIN_USERNAME, ADMIN_PASSWORD, ADMIN_EMAIL)
+        await backfill_thumbnails(session)
+        await skill_catalogue.load(session)
+        await skill_import_crud.interrupt(session)
+        await leaderboard.load(session)
+
+    if not int(TEST):
+        app.state.payment_reconciler = asyncio.create_task(reconciler.run())
+
+
+@app.on_event('shutdown')
+async def shutdown():
+    if getattr(app.state, 'payment_reconciler', None) is not None:
+        app.state.payment_reconciler.cancel()
+    shutdown_pool()
 
 
 @app.get(
@@ -61,21 +96,21 @@ async def startup():
     response_class=FileResponse,
     tags=['media'],
 )
-async def media(directory: str, file_name: str) -> FileResponse:
+async def media(request: Request, directory: str, file_name: str) -> Response:
     """
         Media
+        :param request: Request
+        :type request: Request
         :param directory: Directory user
         :type directory: str
         :param file_name: File name
         :type file_name: str
         :return: File
-        :rtype: FileResponse
+        :rtype: Response
         :raise HTTPException 404: File not found
     """
 
-    if not os.path.exists(f'{MEDIA_ROOT}{directory}/{file_name}'):
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='File not found')
-    return FileResponse(f'{MEDIA_ROOT}{directory}/{file_name}', status_code=status.HTTP_200_OK)
+    return await storage.response(request, directory, file_name)
 
 
 app.include_router(admin_router, prefix=f'/{API}/admin')
@@ -1,11 +1,15 @@
 import asyncio
+import io
 import os
 import shutil
 
+from PIL import Image
 from fastapi.testclient import TestClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from config import API, MEDIA_ROOT
+from app.leaderboard import leaderboard
+from app.skills.catalogue import skill_catalogue
+from config import API, MEDIA_ROOT, AVATAR_SIZES, AVATAR_PLACEHOLDER
 from db import engine, Base
 from main import app
 
@@ -19,6 +23,14 @@ async def drop_all():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
 
+placeholder_avatars = {str(size): AVATAR_PLACEHOLDER.format(size=size) for size in AVATAR_SIZES}
+
+
+def png(width: int = 600, height: int = 400) -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (255, 0, 0)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
 
 def async_loop(function):
     loop = asyncio.get_event_loop()
@@ -41,6 +53,8 @@ class BaseTest:
             'freelancer': False,
         }
         self.url = f'/{API}'
+        skill_catalogue.invalidate()
+        leaderboard.invalidate()
         async_loop(create_all())
         os.makedirs(MEDIA_ROOT)
 
@@ -1,10 +1,8 @@
 from unittest import TestCase, mock
 
-from fastapi import UploadFile
-
-from app.crud import user_crud, verification_crud, github_crud
+from app.crud import user_crud, verification_crud, github_crud, level_change_crud
 from config import SERVER_AUTH_BACKEND
-from tests import BaseTest, async_loop
+from tests import BaseTest, async_loop, png
 
 
 class AdminTestCase(BaseTest, TestCase):
@@ -146,9 +144,8 @@ class AdminTestCase(BaseTest, TestCase):
             }
         )
 
-        file = UploadFile('image.png', content_type='image/png')
         response = self.client.post(
-            f'{self.url}/avatar', headers=headers, files={'file': ('image.png', async_loop(file.read()), 'image/png')}
+            f'{self.url}/avatar', headers=headers, files={'file': ('image.png', png(), 'image/png')}
         )
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {'msg': 'Avatar has been saved'})
@@ -438,3 +435,39 @@ class AdminTestCase(BaseTest, TestCase):
         response = self.client.put(f'{self.url}/admin/user/level/143?level=500', headers=headers)
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json(), {'detail': 'User not found'})
+
+        # Idempotency key
+        response = self.client.put(f'{self.url}/admin/user/level/2?level=100&reason=job&key=job-1', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['level'], 8.0)
+        response = self.client.put(f'{self.url}/admin/user/level/2?level=100&reason=job&key=job-1', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['level'], 8.0)
+        self.assertEqual(async_loop(user_crud.get(self.session, id=2)).level, 800)
+        self.assertEqual(len(async_loop(level_change_crud.all(self.session))), 2)
+
+        # Batch
+        response = self.client.post(f'{self.url}/admin/user/levels', headers=headers, json=[
+            {'user_id': 2, 'amount': 50, 'reason': 'job', 'key': 'job-2'},
+            {'user_id': 2, 'amount': 50, 'reason': 'job', 'key': 'job-3'},
+            {'user_id': 2, 'amount': 50, 'reason': 'job', 'key': 'job-1'},
+            {'user_id': 2, 'amount': 25},
+            {'user_id': 1, 'amount': 50},
+            {'user_id': 143, 'amount': 50},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{'id': 2, 'level': 9.25}])
+        self.assertEqual(async_loop(user_crud.get(self.session, id=2)).level, 925)
+        self.assertEqual(async_loop(user_crud.get(self.session, id=1)).level, None)
+        self.assertEqual(len(async_loop(level_change_crud.all(self.session))), 5)
+
+        response = self.client.post(
+            f'{self.url}/admin/user/levels', headers=headers, json=[{'user_id': 2, 'amount': 50, 'key': 'job-2'}],
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+        response = self.client.post(
+            f'{self.url}/admin/user/levels', headers=headers, json=[{'user_id': 2, 'amount': 0}],
+        )
+        self.assertEqual(response.status_code, 422)
@@ -3,13 +3,14 @@ import os
 from unittest import TestCase, mock
 
 import jwt
+from PIL import Image
 from fastapi import UploadFile
 from pyotp import TOTP
 
 from app.crud import verification_crud, user_crud, github_crud, user_skill_crud
 from app.tokens import ALGORITHM, create_reset_password_token
-from config import SECRET_KEY, SERVER_AUTH_BACKEND, API
-from tests import BaseTest, async_loop
+from config import SECRET_KEY, SERVER_AUTH_BACKEND, API, AVATAR_SIZES
+from tests import BaseTest, async_loop, placeholder_avatars, png
 
 
 class AuthTestCase(BaseTest, TestCase):
@@ -61,6 +62,7 @@ class AuthTestCase(BaseTest, TestCase):
                         'id': 2,
                         'username': 'test2',
                         'avatar': 'https://via.placeholder.com/400x400',
+                        'avatars': placeholder_avatars,
                         'level': 0.0,
                     }
                 ]
@@ -79,6 +81,7 @@ class AuthTestCase(BaseTest, TestCase):
                         'id': 1,
                         'username': 'test',
                         'avatar': 'https://via.placeholder.com/400x400',
+                        'avatars': placeholder_avatars,
                         'level': 0.0,
                     }
                 ]
@@ -100,6 +103,7 @@ class AuthTestCase(BaseTest, TestCase):
                         'id': 1,
                         'username': 'test',
                         'avatar': 'https://via.placeholder.com/400x400',
+                        'avatars': placeholder_avatars,
                         'level': 100.0,
                     }
                 ]
@@ -118,12 +122,63 @@ class AuthTestCase(BaseTest, TestCase):
                         'id': 2,
                         'username': 'test2',
                         'avatar': 'https://via.placeholder.com/400x400',
+                        'avatars': placeholder_avatars,
                         'level': 10.0,
                     }
                 ]
             }
         )
 
+    def test_freelancers_rank(self):
+        for i in range(1, 5):
+            self.client.post(
+                f'{self.url}/register',
+                json={**self.user_data, 'username': f'test{i}', 'email': f'test{i}@example.com', 'freelancer': True}
+            )
+        self.client.post(
+            f'{self.url}/register',
+            json={**self.user_data, 'username': 'test5', 'email': 'test5@example.com', 'freelancer': False}
+        )
+        async_loop(user_crud.update(self.session, {'id': 1}, level=300))
+        async_loop(user_crud.update(self.session, {'id': 3}, level=500))
+
+        # Order: 3 (500), 1 (300), 4 (0), 2 (0)
+        response = self.client.get(f'{self.url}/freelancers/rank/1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'id': 1, 'rank': 2, 'total': 4})
+
+        response = self.client.get(f'{self.url}/freelancers/rank/2')
+        self.assertEqual(response.json(), {'id': 2, 'rank': 4, 'total': 4})
+
+        response = self.client.get(f'{self.url}/freelancers/rank/5')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'detail': 'Freelancer not found'})
+
+        response = self.client.get(f'{self.url}/freelancers/around/1?window=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(user['rank'], user['id']) for user in response.json()], [(1, 3), (2, 1), (3, 4)])
+        self.assertEqual(response.json()[0]['level'], 5.0)
+
+        response = self.client.get(f'{self.url}/freelancers/around/3?window=2')
+        self.assertEqual([(user['rank'], user['id']) for user in response.json()], [(1, 3), (2, 1), (3, 4)])
+
+        response = self.client.get(f'{self.url}/freelancers/around/5')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'detail': 'Freelancer not found'})
+
+        # Level and freelancer changes are applied to the leaderboard
+        async_loop(user_crud.update(self.session, {'id': 2}, level=1000))
+        async_loop(user_crud.update(self.session, {'id': 3}, freelancer=False))
+
+        response = self.client.get(f'{self.url}/freelancers/rank/2')
+        self.assertEqual(response.json(), {'id': 2, 'rank': 1, 'total': 3})
+
+        response = self.client.get(f'{self.url}/freelancers/rank/3')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(f'{self.url}/freelancers?page=1&page_size=3')
+        self.assertEqual([user['id'] for user in response.json()['results']], [2, 1, 4])
+
     def test_search_freelancers(self):
         self.client.post(f'{self.url}/register', json={**self.user_data, 'freelancer': True})
         self.client.post(
@@ -157,6 +212,7 @@ class AuthTestCase(BaseTest, TestCase):
                         'id': 2,
                         'username': 'test2',
                         'avatar': 'https://via.placeholder.com/400x400',
+                        'avatars': placeholder_avatars,
                         'level': 0.0
                     }
                 ]
@@ -175,6 +231,7 @@ class AuthTestCase(BaseTest, TestCase):
                         'id': 1,
                         'username': 'test',
                         'avatar': 'https://via.placeholder.com/400x400',
+                        'avatars': placeholder_avatars,
                         'level': 0.0
                     }
                 ]
@@ -193,6 +250,7 @@ class AuthTestCase(BaseTest, TestCase):
                         'id': 2,
                         'username': 'test2',
                         'avatar': 'https://via.placeholder.com/400x400',
+                        'avatars': placeholder_avatars,
                         'level': 0.0
                     }
                 ]
@@ -211,6 +269,7 @@ class AuthTestCase(BaseTest, TestCase):
                         'id': 1,
                         'username': 'test',
                         'avatar': 'https://via.placeholder.com/400x400',
+                        'avatars': placeholder_avatars,
                         'level': 0.0
                     }
                 ]
@@ -240,6 +299,7 @@ class AuthTestCase(BaseTest, TestCase):
                         'id': 1,
                         'username': 'test',
                         'avatar': 'https://via.placeholder.com/400x400',
+                        'avatars': placeholder_avatars,
                         'level': 100.0
                     }
                 ]
@@ -258,6 +318,7 @@ class AuthTestCase(BaseTest, TestCase):
                         'id': 2,
                         'username': 'test2',
                         'avatar': 'https://via.placeholder.com/400x400',
+                        'avatars': placeholder_avatars,
                         'level': 10.0
                     }
                 ]
@@ -276,6 +337,7 @@ class AuthTestCase(BaseTest, TestCase):
                         'id': 1,
                         'username': 'test',
                         'avatar': 'https://via.placeholder.com/400x400',
+                        'avatars': placeholder_avatars,
                         'level': 100.0
                     }
                 ]
@@ -294,6 +356,7 @@ class AuthTestCase(BaseTest, TestCase):
                         'id': 2,
                         'username': 'test2',
                         'avatar': 'https://via.placeholder.com/400x400',
+                        'avatars': placeholder_avatars,
                         'level': 10.0
                     }
                 ]
@@ -622,9 +685,8 @@ class AuthTestCase(BaseTest, TestCase):
 
         self.assertEqual(user.avatar, None)
 
-        file = UploadFile('image.png', content_type='image/png')
         response = self.client.post(
-            f'{self.url}/avatar', headers=headers, files={'file': ('image.png', async_loop(file.read()), 'image/png')}
+            f'{self.url}/avatar', headers=headers, files={'file': ('image.png', png(), 'image/png')}
         )
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {'msg': 'Avatar has been saved'})
@@ -633,10 +695,14 @@ class AuthTestCase(BaseTest, TestCase):
         user = async_loop(user_crud.get(self.session, id=1))
         avatar = user.avatar
         self.assertEqual(os.path.exists(avatar), True)
+        for size in AVATAR_SIZES:
+            with Image.open(f'{os.path.splitext(avatar)[0]}_{size}.png') as image:
+                self.assertEqual(image.size, (size, size))
+        with Image.open(avatar) as image:
+            self.assertEqual(image.size, (400, 400))
 
-        file = UploadFile('image.png', content_type='image/png')
         response = self.client.post(
-            f'{self.url}/avatar', headers=headers, files={'file': ('image.png', async_loop(file.read()), 'image/png')}
+            f'{self.url}/avatar', headers=headers, files={'file': ('image.png', png(), 'image/png')}
         )
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {'msg': 'Avatar has been saved'})
@@ -644,6 +710,7 @@ class AuthTestCase(BaseTest, TestCase):
 
         user = async_loop(user_crud.get(self.session, id=1))
         self.assertEqual(os.path.exists(avatar), False)
+        self.assertEqual(os.path.exists(f'{os.path.splitext(avatar)[0]}_64.png'), False)
         self.assertEqual(os.path.exists(user.avatar), True)
 
         self.assertNotEqual(avatar, user.avatar)
@@ -656,12 +723,25 @@ class AuthTestCase(BaseTest, TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json(), {'detail': 'Avatar only in png format'})
 
+        response = self.client.post(
+            f'{self.url}/avatar', headers=headers, files={'file': ('image.png', b'not an image', 'image/png')}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'detail': 'Invalid image'})
+
         async_loop(self.session.commit())
         user = async_loop(user_crud.get(self.session, id=1))
         self.assertEqual(os.path.exists(user.avatar), True)
 
         response = self.client.get(self.url + '/change-data', headers=headers)
         self.assertEqual(response.json()['avatar'], f'{SERVER_AUTH_BACKEND}{user.avatar}')
+        self.assertEqual(
+            response.json()['avatars'],
+            {
+                str(size): f'{SERVER_AUTH_BACKEND}{os.path.splitext(user.avatar)[0]}_{size}.png'
+                for size in AVATAR_SIZES
+            },
+        )
 
         # Media
         avatar = user.avatar.replace('media/tests/', '')
@@ -1181,6 +1261,7 @@ class AuthTestCase(BaseTest, TestCase):
                 'date_joined': response.json()['date_joined'],
                 'last_login': response.json()['last_login'],
                 'avatar': 'https://via.placeholder.com/400x400',
+                'avatars': placeholder_avatars,
                 'freelancer': True,
                 'skills': [],
                 'github': None,
@@ -1203,6 +1284,7 @@ class AuthTestCase(BaseTest, TestCase):
                 'date_joined': response.json()['date_joined'],
                 'last_login': response.json()['last_login'],
                 'avatar': 'https://via.placeholder.com/400x400',
+                'avatars': placeholder_avatars,
                 'freelancer': True,
                 'skills': [
                     {
@@ -1232,6 +1314,7 @@ class AuthTestCase(BaseTest, TestCase):
                 'date_joined': response.json()['date_joined'],
                 'last_login': response.json()['last_login'],
                 'avatar': 'https://via.placeholder.com/400x400',
+                'avatars': placeholder_avatars,
                 'freelancer': True,
                 'skills': [
                     {
@@ -1260,6 +1343,7 @@ class AuthTestCase(BaseTest, TestCase):
                 'date_joined': response.json()['date_joined'],
                 'last_login': response.json()['last_login'],
                 'avatar': 'https://via.placeholder.com/400x400',
+                'avatars': placeholder_avatars,
                 'freelancer': True,
                 'skills': [],
                 'github': 'Counter021',
@@ -1268,9 +1352,8 @@ class AuthTestCase(BaseTest, TestCase):
         )
 
         # Avatar
-        file = UploadFile('image.png', content_type='image/png')
         response = self.client.post(
-            f'{self.url}/avatar', headers=headers, files={'file': ('image.png', async_loop(file.read()), 'image/png')}
+            f'{self.url}/avatar', headers=headers, files={'file': ('image.png', png(), 'image/png')}
         )
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {'msg': 'Avatar has been saved'})
@@ -1288,6 +1371,10 @@ class AuthTestCase(BaseTest, TestCase):
                 'date_joined': response.json()['date_joined'],
                 'last_login': response.json()['last_login'],
                 'avatar': f'{SERVER_AUTH_BACKEND}{user.avatar}',
+                'avatars': {
+                    str(size): f'{SERVER_AUTH_BACKEND}{os.path.splitext(user.avatar)[0]}_{size}.png'
+                    for size in AVATAR_SIZES
+                },
                 'freelancer': True,
                 'skills': [],
                 'github': 'Counter021',
@@ -1306,6 +1393,10 @@ class AuthTestCase(BaseTest, TestCase):
                 'date_joined': response.json()['date_joined'],
                 'last_login': response.json()['last_login'],
                 'avatar': f'{SERVER_AUTH_BACKEND}{user.avatar}',
+                'avatars': {
+                    str(size): f'{SERVER_AUTH_BACKEND}{os.path.splitext(user.avatar)[0]}_{size}.png'
+                    for size in AVATAR_SIZES
+                },
                 'freelancer': True,
                 'skills': [],
                 'github': 'Counter021',
@@ -1333,6 +1424,7 @@ class AuthTestCase(BaseTest, TestCase):
                 'date_joined': response.json()['date_joined'],
                 'last_login': response.json()['last_login'],
                 'avatar': 'https://via.placeholder.com/400x400',
+                'avatars': placeholder_avatars,
                 'freelancer': False,
                 'skills': [],
                 'github': None,
@@ -1,13 +1,58 @@
+import datetime
+import uuid
 from unittest import TestCase, mock
+from urllib.parse import urlsplit, parse_qs
+
+from aiohttp import web
 
 from app.crud import verification_crud, user_crud, payment_crud
-from config import SERVER_AUTH_BACKEND
+from app.payments.reconciler import reconciler
+from app.payments.service import signature
+from config import QIWI_PAY_URL, SECRET_QIWI_KEY, PUBLIC_QIWI_KEY
 from tests import BaseTest, async_loop
 
 
+def notification(bill_id: str, value: str, status: str) -> tuple[dict, dict]:
+    bill = {
+        'siteId': 'site', 'billId': bill_id, 'amount': {'value': value, 'currency': 'RUB'}, 'status': {'value': status},
+    }
+    return {'bill': bill, 'version': '1'}, {'X-Api-Signature-SHA256': signature(bill)}
+
+
+class QIWIStandIn:
+    """ Minimal bill status API """
+
+    def __init__(self) -> None:
+        self.bills: dict[str, dict] = {}
+        self.requests = 0
+        self.runner = None
+        self.endpoint = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if request.headers.get('Authorization') != f'Bearer {SECRET_QIWI_KEY}':
+            return web.json_response({'description': 'Unauthorized'}, status=401)
+        bill_id = request.match_info['bill_id']
+        if bill_id not in self.bills:
+            return web.json_response({'description': 'Bill not found'}, status=404)
+        return web.json_response({'billId': bill_id, **self.bills[bill_id]})
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get('/bills/{bill_id}', self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.endpoint = f'http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/bills/'
+
+    async def stop(self) -> None:
+        await self.runner.cleanup()
+
+
 class PaymentsTestCase(BaseTest, TestCase):
 
-    def test_pay(self):
+    def login(self) -> dict[str, str]:
         self.client.post(self.url + '/register', json={**self.user_data, 'freelancer': True})
         verification = async_loop(verification_crud.get(self.session, id=1))
         self.client.get(self.url + f'/verify?link={verification.link}')
@@ -15,68 +60,215 @@ class PaymentsTestCase(BaseTest, TestCase):
         async_loop(self.session.commit())
 
         tokens = self.client.post(f'{self.url}/login', data={'username': 'test', 'password': 'Test1234!'})
-        headers = {'Authorization': f'Bearer {tokens.json()["access_token"]}'}
+        return {'Authorization': f'Bearer {tokens.json()["access_token"]}'}
+
+    def test_pay(self):
+        headers = self.login()
 
         self.assertEqual(len(async_loop(payment_crud.all(self.session))), 0)
 
         # Pay
-        with mock.patch('app.requests.pay_request', return_value=f'{SERVER_AUTH_BACKEND}') as _:
-            response = self.client.get(f'{self.url}/pay?amount=1', headers=headers)
-            self.assertEqual(response.status_code, 201)
-            self.assertEqual(response.json(), {'url': SERVER_AUTH_BACKEND, 'id': 1})
-            self.assertEqual(len(async_loop(payment_crud.all(self.session))), 1)
+        response = self.client.get(f'{self.url}/pay?amount=1', headers=headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['id'], 1)
+        self.assertEqual(len(async_loop(payment_crud.all(self.session))), 1)
 
         self.assertEqual(async_loop(payment_crud.exist(self.session, id=1)), True)
 
-        with mock.patch('app.requests.pay_request', return_value=f'{SERVER_AUTH_BACKEND}') as _:
-            response = self.client.get(f'{self.url}/pay?amount=1', headers=headers)
-            self.assertEqual(response.status_code, 201)
-            self.assertEqual(response.json(), {'url': SERVER_AUTH_BACKEND, 'id': 2})
-            self.assertEqual(len(async_loop(payment_crud.all(self.session))), 1)
+        response = self.client.get(f'{self.url}/pay?amount=1', headers=headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['id'], 2)
+        self.assertEqual(len(async_loop(payment_crud.all(self.session))), 2)
+
+        # Previous bill is replaced, not deleted
+        self.assertEqual(async_loop(payment_crud.get(self.session, id=1)).status, 'REPLACED')
+        self.assertEqual(async_loop(payment_crud.exist(self.session, id=2)), True)
+        replaced_bill_id = async_loop(payment_crud.get(self.session, id=1)).uuid
 
-            self.assertEqual(async_loop(payment_crud.exist(self.session, id=1)), False)
-            self.assertEqual(async_loop(payment_crud.exist(self.session, id=2)), True)
+        bill_id = async_loop(payment_crud.get(self.session, id=2)).uuid
+        url = urlsplit(response.json()['url'])
+        self.assertEqual(f'{url.scheme}://{url.netloc}{url.path}', QIWI_PAY_URL)
+        self.assertEqual(
+            parse_qs(url.query),
+            {
+                'publicKey': [PUBLIC_QIWI_KEY],
+                'billId': [bill_id],
+                'amount': ['1'],
+                'comment': ['Buy level for user test'],
+            },
+        )
+        self.assertEqual(async_loop(payment_crud.get(self.session, id=2)).status, 'WAITING')
 
         # Check
-        with mock.patch('app.requests.check_request', return_value={'status': {'value': 'WAITING'}}) as _:
-            response = self.client.get(f'{self.url}/check?pk=2')
-            self.assertEqual(response.status_code, 400)
-            self.assertEqual(response.json(), {'detail': 'Payment not paid'})
-            self.assertEqual(async_loop(payment_crud.get(self.session, id=2)).is_completed, False)
-            self.assertEqual(async_loop(user_crud.get(self.session, id=1)).level, 0)
-
-        with mock.patch('app.requests.check_request', return_value={'status': {'value': 'PAID'}}) as _:
-            self.assertEqual(async_loop(payment_crud.get(self.session, id=2)).is_completed, False)
-            self.assertEqual(async_loop(user_crud.get(self.session, id=1)).level, 0)
-
-            response = self.client.get(f'{self.url}/check?pk=2')
-            self.assertEqual(response.status_code, 200)
-            self.assertEqual(response.json(), {'msg': 'Level has been up'})
-
-            self.assertEqual(async_loop(user_crud.get(self.session, id=1)).level, 1)
-            self.assertEqual(async_loop(payment_crud.get(self.session, id=2)).is_completed, True)
-
-            response = self.client.get(f'{self.url}/check?pk=2')
-            self.assertEqual(response.status_code, 400)
-            self.assertEqual(response.json(), {'detail': 'The purchase has already been credited'})
-
-            response = self.client.get(f'{self.url}/check?pk=143')
-            self.assertEqual(response.status_code, 400)
-            self.assertEqual(response.json(), {'detail': 'Payment not found'})
-
-        with mock.patch('app.requests.pay_request', return_value=f'{SERVER_AUTH_BACKEND}') as _:
-            response = self.client.get(f'{self.url}/pay?amount=500', headers=headers)
-            self.assertEqual(response.status_code, 201)
-            self.assertEqual(response.json(), {'url': SERVER_AUTH_BACKEND, 'id': 3})
-            self.assertEqual(len(async_loop(payment_crud.all(self.session))), 2)
-
-        with mock.patch('app.requests.check_request', return_value={'status': {'value': 'PAID'}}) as _:
-            self.assertEqual(async_loop(payment_crud.get(self.session, id=3)).is_completed, False)
-            self.assertEqual(async_loop(user_crud.get(self.session, id=1)).level, 1)
-
-            response = self.client.get(f'{self.url}/check?pk=3')
-            self.assertEqual(response.status_code, 200)
-            self.assertEqual(response.json(), {'msg': 'Level has been up'})
-
-            self.assertEqual(async_loop(user_crud.get(self.session, id=1)).level, 501)
-            self.assertEqual(async_loop(payment_crud.get(self.session, id=3)).is_completed, True)
+        response = self.client.get(f'{self.url}/check?pk=2')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'detail': 'Payment not paid'})
+        self.assertEqual(async_loop(payment_crud.get(self.session, id=2)).is_completed, False)
+        self.assertEqual(async_loop(user_crud.get(self.session, id=1)).level, 0)
+
+        response = self.client.get(f'{self.url}/check?pk=143')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'detail': 'Payment not found'})
+
+        # Notify
+        body, signed = notification(bill_id, '1.00', 'PAID')
+        response = self.client.post(
+            f'{self.url}/payments/notify', json=body, headers={'X-Api-Signature-SHA256': 'bad'},
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json(), {'detail': 'Bad signature'})
+
+        response = self.client.post(f'{self.url}/payments/notify', json=body)
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.post(
+            f'{self.url}/payments/notify', json={**body, 'bill': {**body['bill'], 'billId': 'other'}}, headers=signed,
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(async_loop(user_crud.get(self.session, id=1)).level, 0)
+
+        waiting, waiting_signed = notification(bill_id, '1.00', 'WAITING')
+        response = self.client.post(f'{self.url}/payments/notify', json=waiting, headers=waiting_signed)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'error': '0'})
+        self.assertEqual(async_loop(payment_crud.get(self.session, id=2)).is_completed, False)
+
+        response = self.client.post(f'{self.url}/payments/notify', json=body, headers=signed)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'error': '0'})
+
+        self.assertEqual(async_loop(user_crud.get(self.session, id=1)).level, 1)
+        payment = async_loop(payment_crud.get(self.session, id=2))
+        self.assertEqual((payment.is_completed, payment.status, payment.next_check_at), (True, 'PAID', None))
+        del payment
+
+        # Repeated notification is credited once
+        response = self.client.post(f'{self.url}/payments/notify', json=body, headers=signed)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'error': '0'})
+        self.assertEqual(async_loop(user_crud.get(self.session, id=1)).level, 1)
+
+        response = self.client.get(f'{self.url}/check?pk=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'msg': 'Level has been up'})
+
+        # Unknown bill is acknowledged
+        unknown, unknown_signed = notification('unknown', '1.00', 'PAID')
+        response = self.client.post(f'{self.url}/payments/notify', json=unknown, headers=unknown_signed)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'error': '0'})
+
+        # Another amount
+        response = self.client.get(f'{self.url}/pay?amount=500', headers=headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['id'], 3)
+        self.assertEqual(len(async_loop(payment_crud.all(self.session))), 3)
+        bill_id = async_loop(payment_crud.get(self.session, id=3)).uuid
+
+        body, signed = notification(bill_id, '499.00', 'PAID')
+        response = self.client.post(f'{self.url}/payments/notify', json=body, headers=signed)
+        self.assertEqual(response.status_code, 200)
+        payment = async_loop(payment_crud.get(self.session, id=3))
+        self.assertEqual((payment.is_completed, payment.status), (False, 'AMOUNT_MISMATCH'))
+        del payment
+        self.assertEqual(async_loop(user_crud.get(self.session, id=1)).level, 1)
+
+        response = self.client.get(f'{self.url}/pay?amount=500', headers=headers)
+        bill_id = async_loop(payment_crud.get(self.session, id=response.json()['id'])).uuid
+        body, signed = notification(bill_id, '500.00', 'PAID')
+        response = self.client.post(f'{self.url}/payments/notify', json=body, headers=signed)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(async_loop(user_crud.get(self.session, id=1)).level, 501)
+
+        # Replaced bill paid later is credited
+        body, signed = notification(replaced_bill_id, '1.00', 'PAID')
+        response = self.client.post(f'{self.url}/payments/notify', json=body, headers=signed)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'error': '0'})
+        self.assertEqual(async_loop(user_crud.get(self.session, id=1)).level, 502)
+        payment = async_loop(payment_crud.get(self.session, id=1))
+        self.assertEqual((payment.is_completed, payment.status), (True, 'PAID'))
+        del payment
+
+    def test_reconciler(self):
+        self.login()
+        provider = QIWIStandIn()
+        async_loop(provider.start())
+
+        for amount in (1, 10, 100, 1000):
+            async_loop(payment_crud.create(
+                self.session, uuid=str(uuid.uuid4()), amount=amount, comment='Buy level for user test', user_id=1,
+                next_check_at=datetime.datetime.utcnow() + datetime.timedelta(minutes=1),
+            ))
+        paid, waiting, rejected, unknown = [
+            (payment.id, payment.uuid) for payment in async_loop(payment_crud.all(self.session))[::-1]
+        ]
+
+        provider.bills = {
+            paid[1]: {'amount': {'value': '1.00', 'currency': 'RUB'}, 'status': {'value': 'PAID'}},
+            waiting[1]: {'amount': {'value': '10.00', 'currency': 'RUB'}, 'status': {'value': 'WAITING'}},
+            rejected[1]: {'amount': {'value': '100.00', 'currency': 'RUB'}, 'status': {'value': 'REJECTED'}},
+        }
+
+        try:
+            with mock.patch('app.requests.QIWI_API_URL', provider.endpoint) as _:
+                # Nothing is due right after payment
+                self.assertEqual(async_loop(reconciler.reconcile(self.session)), 0)
+                self.assertEqual(provider.requests, 0)
+
+                # Check nudges outstanding payment
+                for pk, _ in (paid, waiting, rejected, unknown):
+                    response = self.client.get(f'{self.url}/check?pk={pk}')
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.json(), {'detail': 'Payment not paid'})
+
+                self.assertEqual(async_loop(reconciler.reconcile(self.session)), 4)
+                self.assertEqual(provider.requests, 4)
+
+                self.assertEqual(async_loop(user_crud.get(self.session, id=1)).level, 1)
+                payment = async_loop(payment_crud.get(self.session, id=paid[0]))
+                self.assertEqual((payment.is_completed, payment.status), (True, 'PAID'))
+                payment = async_loop(payment_crud.get(self.session, id=rejected[0]))
+                self.assertEqual(
+                    (payment.is_completed, payment.status, payment.next_check_at), (False, 'REJECTED', None),
+                )
+                for pk, _ in (waiting, unknown):
+                    payment = async_loop(payment_crud.get(self.session, id=pk))
+                    self.assertEqual((payment.is_completed, payment.status, payment.attempts), (False, 'WAITING', 1))
+                    self.assertGreater(payment.next_check_at, datetime.datetime.utcnow())
+                del payment
+
+                # Backoff, checked payments aren't polled again and can't be nudged right away
+                response = self.client.get(f'{self.url}/check?pk={waiting[0]}')
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(async_loop(reconciler.reconcile(self.session)), 0)
+                self.assertEqual(provider.requests, 4)
+
+                response = self.client.get(f'{self.url}/check?pk={paid[0]}')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), {'msg': 'Level has been up'})
+
+                # Paid later (after user requested a new bill), credited once even if the notification also arrives
+                provider.bills[waiting[1]]['status']['value'] = 'PAID'
+                async_loop(payment_crud.update(
+                    self.session, {'id': waiting[0]}, status='REPLACED', next_check_at=datetime.datetime.utcnow(),
+                ))
+                self.assertEqual(async_loop(reconciler.reconcile(self.session)), 1)
+                self.assertEqual(async_loop(user_crud.get(self.session, id=1)).level, 11)
+
+                body, signed = notification(waiting[1], '10.00', 'PAID')
+                response = self.client.post(f'{self.url}/payments/notify', json=body, headers=signed)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(async_loop(user_crud.get(self.session, id=1)).level, 11)
+
+                # Stale payment expires
+                async_loop(payment_crud.update(
+                    self.session, {'id': unknown[0]},
+                    created_at=datetime.datetime.utcnow() - datetime.timedelta(days=30),
+                    next_check_at=datetime.datetime.utcnow(),
+                ))
+                self.assertEqual(async_loop(reconciler.reconcile(self.session)), 1)
+                self.assertEqual(async_loop(payment_crud.get(self.session, id=unknown[0])).status, 'EXPIRED')
+                self.assertEqual(async_loop(reconciler.reconcile(self.session)), 0)
+        finally:
+            async_loop(provider.stop())
@@ -77,8 +77,17 @@ class SkillsTestCase(BaseTest, TestCase):
                 headers=headers,
                 files={'file': ('skills.xls', file, 'application/vnd.ms-excel')}
             )
-        self.assertEqual(response.status_code, 201)
-        self.assertEqual(len(response.json()), 46)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['id'], 1)
+        self.assertEqual(response.json()['status'], 'pending')
+
+        response = self.client.get(f'{self.url}/skills/imports/1', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {key: response.json()[key] for key in ('status', 'processed', 'created', 'skipped', 'failed', 'detail')},
+            {'status': 'completed', 'processed': 46, 'created': 46, 'skipped': 0, 'failed': 0, 'detail': None},
+        )
+        self.assertIsNotNone(response.json()['finished_at'])
         self.assertEqual(len(async_loop(skill_crud.all(self.session))), 46)
 
         with open('tests/skills.xls', 'rb') as file:
@@ -87,10 +96,32 @@ class SkillsTestCase(BaseTest, TestCase):
                 headers=headers,
                 files={'file': ('skills.xls', file, 'application/vnd.ms-excel')}
             )
-        self.assertEqual(response.status_code, 201)
-        self.assertEqual(len(response.json()), 0)
+        self.assertEqual(response.status_code, 202)
+
+        response = self.client.get(f'{self.url}/skills/imports/2', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {key: response.json()[key] for key in ('status', 'processed', 'created', 'skipped', 'failed')},
+            {'status': 'completed', 'processed': 46, 'created': 0, 'skipped': 46, 'failed': 0},
+        )
         self.assertEqual(len(async_loop(skill_crud.all(self.session))), 46)
 
+        response = self.client.post(
+            f'{self.url}/skills/excel',
+            headers=headers,
+            files={'file': ('skills.xls', b'not excel', 'application/vnd.ms-excel')}
+        )
+        self.assertEqual(response.status_code, 202)
+
+        response = self.client.get(f'{self.url}/skills/imports/3', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'failed')
+        self.assertEqual(response.json()['processed'], 0)
+
+        response = self.client.get(f'{self.url}/skills/imports/4', headers=headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'detail': 'Skill import not found'})
+
         file = UploadFile('skills.png', content_type='image/png')
         response = self.client.post(
             f'{self.url}/skills/excel',
@@ -170,3 +201,13 @@ class SkillsTestCase(BaseTest, TestCase):
                 'name': 'GitHub1',
             }
         )
+
+        # Catalogue is invalidated by writes
+        response = self.client.get(f'{self.url}/skills/2')
+        self.assertEqual(response.json()['name'], 'GitHub1')
+
+        self.client.delete(f'{self.url}/skills/2', headers=headers)
+        response = self.client.get(f'{self.url}/skills/2')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'detail': 'Skill not found'})
+        self.assertEqual(len(self.client.get(f'{self.url}/skills/').json()), 45)
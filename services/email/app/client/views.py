@@ -5,6 +5,7 @@ from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud import client_crud
+from app.registry import client_registry
 
 
 async def get_all_clients(db: AsyncSession):
@@ -34,6 +35,7 @@ async def create_client(db: AsyncSession, client_name: str) -> dict[str, typing.
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Client exist')
 
     client = await client_crud.create(db, secret=f'{uuid.uuid4()}', client_name=client_name)
+    client_registry.invalidate()
     return client.__dict__
 
 
@@ -48,10 +50,12 @@ async def create_or_get_client(db: AsyncSession, client_name: str) -> dict[str,
         :rtype: dict
     """
 
-    if await client_crud.exist(db, client_name=client_name):
-        client = await client_crud.get(db, client_name=client_name)
-    else:
-        client = await client_crud.create(db, secret=f'{uuid.uuid4()}', client_name=client_name)
+    client = await client_registry.get(db, client_name)
+    if client is not None:
+        return client
+
+    client = await client_crud.create(db, secret=f'{uuid.uuid4()}', client_name=client_name)
+    client_registry.invalidate()
     return client.__dict__
 
 
@@ -86,6 +90,7 @@ async def update_client(db: AsyncSession, pk: int) -> dict[str, typing.Union[str
     if not await client_crud.exist(db, id=pk):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Client not found')
     client = await client_crud.update(db, {'id': pk}, secret=f'{uuid.uuid4()}')
+    client_registry.invalidate()
     return client.__dict__
 
 
@@ -103,4 +108,5 @@ async def delete_client(db: AsyncSession, pk: int) -> dict[str, str]:
     if not await client_crud.exist(db, id=pk):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Client not found')
     await client_crud.remove(db, id=pk)
+    client_registry.invalidate()
     return {'msg': 'Client has been deleted'}
@@ -1,4 +1,10 @@
-from app.models import Client
+import datetime
+
+import sqlalchemy
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Client, DeadLetter, Batch
+from config import EMAIL_BATCH_TTL
 from crud import CRUD
 
 
@@ -7,4 +13,34 @@ class ClientCRUD(CRUD[Client, Client, Client]):
     pass
 
 
+class DeadLetterCRUD(CRUD[DeadLetter, DeadLetter, DeadLetter]):
+    """ Dead letter CRUD """
+    pass
+
+
+class BatchCRUD(CRUD[Batch, Batch, Batch]):
+    """ Batch CRUD """
+
+    async def add(self, db: AsyncSession, client_id: int, tasks: list[str]) -> None:
+        """
+            Add client batch tasks (expired ones are removed)
+            :param db: DB
+            :type db: AsyncSession
+            :param client_id: Client ID
+            :type client_id: int
+            :param tasks: Tasks IDs
+            :type tasks: list
+            :return: None
+        """
+        before = datetime.datetime.utcnow() - datetime.timedelta(seconds=EMAIL_BATCH_TTL)
+        await db.execute(sqlalchemy.delete(Batch).where(Batch.created_at < before))
+        if tasks:
+            await db.execute(
+                sqlalchemy.insert(Batch), [{'task_id': task_id, 'client_id': client_id} for task_id in tasks],
+            )
+        await db.commit()
+
+
 client_crud = ClientCRUD(Client)
+dead_letter_crud = DeadLetterCRUD(DeadLetter)
+batch_crud = BatchCRUD(Batch)
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, status, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dead_letter import views
+from app.dead_letter.schemas import GetDeadLetter
+from app.permission import is_superuser
+from app.schemas import Message
+from db import get_db
+
+dead_letter_router = APIRouter()
+
+
+@dead_letter_router.get(
+    '/',
+    name='Get all dead letters',
+    description='Get all dead letters',
+    response_description='Dead letters',
+    status_code=status.HTTP_200_OK,
+    response_model=list[GetDeadLetter],
+    tags=['dead letters'],
+    dependencies=[Depends(is_superuser)],
+)
+async def get_all_dead_letters(db: AsyncSession = Depends(get_db)):
+    return await views.get_all_dead_letters(db)
+
+
+@dead_letter_router.post(
+    '/{pk}/replay',
+    name='Replay dead letter',
+    description='Replay dead letter',
+    response_description='Message',
+    status_code=status.HTTP_200_OK,
+    response_model=Message,
+    tags=['dead letters'],
+    dependencies=[Depends(is_superuser)],
+)
+async def replay_dead_letter(pk: int, db: AsyncSession = Depends(get_db)):
+    return await views.replay_dead_letter(db, pk)
+
+
+@dead_letter_router.delete(
+    '/{pk}',
+    name='Delete dead letter',
+    description='Delete dead letter',
+    response_description='Message',
+    status_code=status.HTTP_200_OK,
+    response_model=Message,
+    tags=['dead letters'],
+    dependencies=[Depends(is_superuser)],
+)
+async def delete_dead_letter(pk: int, db: AsyncSession = Depends(get_db)):
+    return await views.delete_dead_letter(db, pk)
@@ -0,0 +1,17 @@
+import datetime
+
+from pydantic import BaseModel
+
+
+class GetDeadLetter(BaseModel):
+    """ Get dead letter """
+
+    id: int
+    priority: str
+    recipient: str
+    subject: str
+    template: str
+    data: dict
+    error: str
+    retries: int
+    created_at: datetime.datetime
@@ -0,0 +1,55 @@
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import dead_letter_crud
+from app.service import enqueue_email
+
+
+async def get_all_dead_letters(db: AsyncSession):
+    """
+        Get all dead letters
+        :param db: DB
+        :type db: AsyncSession
+        :return: Dead letters
+    """
+
+    return (dead_letter.__dict__ for dead_letter in await dead_letter_crud.all(db, limit=1000))
+
+
+async def replay_dead_letter(db: AsyncSession, pk: int) -> dict[str, str]:
+    """
+        Replay dead letter (enqueue again and remove)
+        :param db: DB
+        :type db: AsyncSession
+        :param pk: Dead letter ID
+        :type pk: int
+        :return: Message
+        :rtype: dict
+        :raise HTTPException 400: Dead letter not found
+    """
+
+    if not await dead_letter_crud.exist(db, id=pk):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Dead letter not found')
+    dead_letter = await dead_letter_crud.get(db, id=pk)
+
+    enqueue_email(dead_letter.recipient, dead_letter.subject, dead_letter.template, dead_letter.data, dead_letter.priority)
+    await dead_letter_crud.remove(db, id=pk)
+    return {'msg': 'Email has been send'}
+
+
+async def delete_dead_letter(db: AsyncSession, pk: int) -> dict[str, str]:
+    """
+        Delete dead letter
+        :param db: DB
+        :type db: AsyncSession
+        :param pk: Dead letter ID
+        :type pk: int
+        :return: Message
+        :rtype: dict
+        :raise HTTPException 400: Dead letter not found
+    """
+
+    if not await dead_letter_crud.exist(db, id=pk):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Dead letter not found')
+    await dead_letter_crud.remove(db, id=pk)
+    return {'msg': 'Dead letter has been deleted'}
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, Header
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.mail import views
-from app.mail.schemas import SendData
+from app.mail.schemas import SendData, SendBatchData, SendBatchResult, BatchTask, QueueMetrics
+from app.permission import is_superuser
 from app.schemas import Message
 from db import get_db
 
@@ -20,3 +21,48 @@ mail_router = APIRouter()
 )
 async def send(schema: SendData, db: AsyncSession = Depends(get_db)):
     return await views.send(db, schema)
+
+
+@mail_router.post(
+    '/send/batch',
+    name='Send batch emails',
+    description='Send one template to many recipients',
+    response_description='Message and tasks',
+    status_code=status.HTTP_200_OK,
+    response_model=SendBatchResult,
+    tags=['email'],
+)
+async def send_batch(schema: SendBatchData, db: AsyncSession = Depends(get_db)):
+    return await views.send_batch(db, schema)
+
+
+@mail_router.get(
+    '/send/batch/{task_id}',
+    name='Get batch task',
+    description='Get batch task status and results per recipient (client name and secret in X-Client-* headers)',
+    response_description='Batch task',
+    status_code=status.HTTP_200_OK,
+    response_model=BatchTask,
+    tags=['email'],
+)
+async def get_batch_task(
+    task_id: str,
+    client_name: str = Header(..., alias='X-Client-Name'),
+    secret: str = Header(..., alias='X-Client-Secret'),
+    db: AsyncSession = Depends(get_db),
+):
+    return await views.get_batch_task(db, task_id, client_name, secret)
+
+
+@mail_router.get(
+    '/queues',
+    name='Queue metrics',
+    description='Queue latency per priority',
+    response_description='Metrics',
+    status_code=status.HTTP_200_OK,
+    response_model=list[QueueMetrics],
+    tags=['email'],
+    dependencies=[Depends(is_superuser)],
+)
+async def get_queue_metrics():
+    return await views.get_queue_metrics()
@@ -1,4 +1,16 @@
-from pydantic import BaseModel, EmailStr
+import typing
+
+from pydantic import BaseModel, EmailStr, validator
+
+from app.schemas import Message
+from config import PRIORITIES, TRANSACTIONAL, NOTIFICATION
+
+
+def validate_priority(priority: str) -> str:
+    """ Validate priority """
+    if priority not in PRIORITIES:
+        raise ValueError(f'Priority must be one of: {", ".join(PRIORITIES)}')
+    return priority
 
 
 class SendData(BaseModel):
@@ -8,6 +20,54 @@ class SendData(BaseModel):
     subject: str
     template: str
     data: dict
+    priority: str = TRANSACTIONAL
+
+    secret: str
+    client_name: str
+
+    _validate_priority = validator('priority', allow_reuse=True)(validate_priority)
+
+
+class BatchRecipient(BaseModel):
+    """ Batch recipient """
+
+    recipient: EmailStr
+    data: dict
+
+
+class SendBatchData(BaseModel):
+    """ Send batch data """
+
+    recipients: list[BatchRecipient]
+    subject: str
+    template: str
+    priority: str = NOTIFICATION
 
     secret: str
     client_name: str
+
+    _validate_priority = validator('priority', allow_reuse=True)(validate_priority)
+
+
+class SendBatchResult(Message):
+    """ Send batch result """
+
+    tasks: list[str]
+
+
+class BatchTask(BaseModel):
+    """ Batch task """
+
+    id: str
+    status: str
+    results: typing.Optional[list[str]]
+
+
+class QueueMetrics(BaseModel):
+    """ Queue latency metrics """
+
+    priority: str
+    count: int
+    average: float
+    max: float
+    last: float
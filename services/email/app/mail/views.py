@@ -1,12 +1,68 @@
 import os
+import typing
 
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud import client_crud
-from app.mail.schemas import SendData
-from config import TEST
-from tasks import send_email
+from app.crud import batch_crud
+from app.mail.schemas import SendData, SendBatchData
+from app.registry import client_registry
+from app.service import enqueue_email, enqueue_emails, queue_metrics_snapshot
+from async_delivery import delivery
+from config import EMAIL_BATCH_LIMIT, EMAIL_BACKEND, ASYNCIO
+from tasks import send_emails
+
+
+async def authenticate_client(db: AsyncSession, client_name: str, secret: str) -> dict[str, typing.Union[str, int]]:
+    """
+        Authenticate client
+        :param db: DB
+        :type db: AsyncSession
+        :param client_name: Client name
+        :type client_name: str
+        :param secret: Client secret
+        :type secret: str
+        :return: Client
+        :rtype: dict
+        :raise HTTPException 400: Client not found
+        :raise HTTPException 400: Bad client secret
+    """
+
+    client = await client_registry.get(db, client_name)
+
+    if client is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Client not found')
+
+    if client['secret'] != secret:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Bad client secret')
+    return client
+
+
+async def validate_client(
+    db: AsyncSession, client_name: str, secret: str, template: str,
+) -> dict[str, typing.Union[str, int]]:
+    """
+        Validate client and template
+        :param db: DB
+        :type db: AsyncSession
+        :param client_name: Client name
+        :type client_name: str
+        :param secret: Client secret
+        :type secret: str
+        :param template: Template
+        :type template: str
+        :return: Client
+        :rtype: dict
+        :raise HTTPException 400: Client not found
+        :raise HTTPException 400: Bad client secret
+        :raise HTTPException 400: Template not found
+    """
+
+    client = await authenticate_client(db, client_name, secret)
+
+    if not os.path.exists(f'templates/{template}'):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Template not found')
+    return client
 
 
 async def send(db: AsyncSession, schema: SendData) -> dict[str, str]:
@@ -18,22 +74,80 @@ async def send(db: AsyncSession, schema: SendData) -> dict[str, str]:
         :type schema: SendData
         :return: Message
         :rtype: dict
+    """
+
+    await validate_client(db, schema.client_name, schema.secret, schema.template)
+
+    enqueue_email(schema.recipient, schema.subject, f'templates/{schema.template}', schema.data, schema.priority)
+    return {'msg': 'Email has been send'}
+
+
+async def send_batch(db: AsyncSession, schema: SendBatchData) -> dict[str, typing.Union[str, list[str]]]:
+    """
+        Send batch (chunked Celery tasks or asyncio delivery)
+        :param db: DB
+        :type db: AsyncSession
+        :param schema: Send batch data
+        :type schema: SendBatchData
+        :return: Message and tasks IDs
+        :rtype: dict
+        :raise HTTPException 400: Too many recipients
+    """
+
+    client = await validate_client(db, schema.client_name, schema.secret, schema.template)
+
+    if len(schema.recipients) > EMAIL_BATCH_LIMIT:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Too many recipients')
+
+    recipients = [recipient.dict() for recipient in schema.recipients]
+    tasks = enqueue_emails(recipients, schema.subject, f'templates/{schema.template}', schema.priority)
+    await batch_crud.add(db, client['id'], tasks)
+    return {'msg': f'{len(recipients)} emails have been queued', 'tasks': tasks}
+
+
+async def get_batch_task(
+    db: AsyncSession, task_id: str, client_name: str, secret: str,
+) -> dict[str, typing.Union[str, dict, None]]:
+    """
+        Get batch task (results hold recipients, so only client that sent it gets it)
+        :param db: DB
+        :type db: AsyncSession
+        :param task_id: Task ID
+        :type task_id: str
+        :param client_name: Client name
+        :type client_name: str
+        :param secret: Client secret
+        :type secret: str
+        :return: Task status and results per recipient
+        :rtype: dict
         :raise HTTPException 400: Client not found
         :raise HTTPException 400: Bad client secret
-        :raise HTTPException 400: Template not found
+        :raise HTTPException 400: Task not found
     """
 
-    if not await client_crud.exist(db, client_name=schema.client_name):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Client not found')
+    client = await authenticate_client(db, client_name, secret)
 
-    client = await client_crud.get(db, client_name=schema.client_name)
+    if not await batch_crud.exist(db, task_id=task_id, client_id=client['id']):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Task not found')
 
-    if client.secret != schema.secret:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Bad client secret')
+    if EMAIL_BACKEND == ASYNCIO:
+        batch = delivery.get_batch(task_id)
+        if batch is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Task not found')
+        return batch
 
-    if not os.path.exists(f'templates/{schema.template}'):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Template not found')
+    result = send_emails.AsyncResult(task_id)
+    return {
+        'id': task_id,
+        'status': result.status,
+        'results': result.result if result.successful() else None,
+    }
 
-    if not int(TEST):
-        send_email.delay(schema.recipient, schema.subject, f'templates/{schema.template}', **schema.data)
-    return {'msg': 'Email has been send'}
+
+async def get_queue_metrics() -> list[dict[str, typing.Union[str, int, float]]]:
+    """
+        Get queue latency metrics
+        :return: Metrics per priority
+        :rtype: list
+    """
+    return queue_metrics_snapshot()
@@ -1,3 +1,5 @@
+import datetime
+
 import sqlalchemy
 
 from db import Base
@@ -17,3 +19,48 @@ class Client(Base):
 
     def __repr__(self):
         return f'<Client {self.id}>'
+
+
+class DeadLetter(Base):
+    """ Dead letter (email failed after retries) """
+
+    __tablename__ = 'dead_letter'
+
+    id: int = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
+    priority: str = sqlalchemy.Column(sqlalchemy.String, nullable=False)
+    recipient: str = sqlalchemy.Column(sqlalchemy.String, nullable=False)
+    subject: str = sqlalchemy.Column(sqlalchemy.String, nullable=False)
+    template: str = sqlalchemy.Column(sqlalchemy.String, nullable=False)
+    data: dict = sqlalchemy.Column(sqlalchemy.JSON, nullable=False, default=dict)
+    error: str = sqlalchemy.Column(sqlalchemy.String, nullable=False)
+    retries: int = sqlalchemy.Column(sqlalchemy.Integer, nullable=False, default=0)
+    created_at: datetime.datetime = sqlalchemy.Column(
+        sqlalchemy.DateTime, default=datetime.datetime.utcnow, nullable=False,
+    )
+
+    def __str__(self):
+        return f'<DeadLetter {self.id}>'
+
+    def __repr__(self):
+        return f'<DeadLetter {self.id}>'
+
+
+class Batch(Base):
+    """ Batch task of client (its results hold recipients, only the client reads them) """
+
+    __tablename__ = 'batch'
+
+    id: int = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
+    task_id: str = sqlalchemy.Column(sqlalchemy.String, nullable=False, unique=True)
+    client_id: int = sqlalchemy.Column(
+        sqlalchemy.Integer, sqlalchemy.ForeignKey('client.id', ondelete='CASCADE'), nullable=False,
+    )
+    created_at: datetime.datetime = sqlalchemy.Column(
+        sqlalchemy.DateTime, default=datetime.datetime.utcnow, nullable=False, index=True,
+    )
+
+    def __str__(self):
+        return f'<Batch {self.id}>'
+
+    def __repr__(self):
+        return f'<Batch {self.id}>'
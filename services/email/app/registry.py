@@ -0,0 +1,56 @@
+import typing
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import client_crud
+
+
+class ClientRegistry:
+    """ In-process client registry (client name -> client) """
+
+    def __init__(self):
+        self._clients: typing.Optional[dict[str, dict[str, typing.Union[str, int]]]] = None
+        self._version: int = 0
+
+    async def load(self, db: AsyncSession) -> None:
+        """
+            Load clients from DB
+            :param db: DB
+            :type db: AsyncSession
+            :return: None
+        """
+        version = self._version
+        clients = {
+            client.client_name: {'id': client.id, 'secret': client.secret, 'client_name': client.client_name}
+            for client in await client_crud.all(db, limit=1000)
+        }
+        # Don't publish a snapshot that was invalidated while loading
+        if version == self._version:
+            self._clients = clients
+
+    def invalidate(self) -> None:
+        """
+            Invalidate registry, next access reloads clients
+            :return: None
+        """
+        self._version += 1
+        self._clients = None
+
+    async def get(self, db: AsyncSession, client_name: str) -> typing.Optional[dict[str, typing.Union[str, int]]]:
+        """
+            Get client
+            :param db: DB
+            :type db: AsyncSession
+            :param client_name: Client name
+            :type client_name: str
+            :return: Client
+            :rtype: dict
+        """
+        clients = self._clients
+        if clients is None:
+            await self.load(db)
+            clients = self._clients or {}
+        return clients.get(client_name)
+
+
+client_registry = ClientRegistry()
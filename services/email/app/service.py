@@ -0,0 +1,80 @@
+import time
+import typing
+
+from async_delivery import delivery
+from config import TEST, EMAIL_BACKEND, ASYNCIO, EMAIL_BATCH_CHUNK, TRANSACTIONAL, NOTIFICATION
+from metrics import queue_metrics
+from tasks import send_email, send_emails
+
+
+def enqueue_email(recipient: str, subject: str, template: str, data: dict, priority: str = TRANSACTIONAL) -> None:
+    """
+        Enqueue email to delivery backend
+        :param recipient: Recipient
+        :type recipient: str
+        :param subject: Subject
+        :type subject: str
+        :param template: Template path
+        :type template: str
+        :param data: Jinja data
+        :type data: dict
+        :param priority: Priority
+        :type priority: str
+        :return: None
+    """
+    if int(TEST):
+        return
+
+    if EMAIL_BACKEND == ASYNCIO:
+        delivery.submit(recipient, subject, template, priority=priority, **data)
+    else:
+        send_email.apply_async(
+            (recipient, subject, template), {**data, 'priority': priority, 'queued_at': time.time()}, queue=priority,
+        )
+
+
+def enqueue_emails(
+    recipients: list[dict],
+    subject: str,
+    template: str,
+    priority: str = NOTIFICATION,
+) -> list[str]:
+    """
+        Enqueue emails to delivery backend (chunked Celery tasks)
+        :param recipients: Recipients with Jinja data
+        :type recipients: list
+        :param subject: Subject
+        :type subject: str
+        :param template: Template path
+        :type template: str
+        :param priority: Priority
+        :type priority: str
+        :return: Tasks IDs
+        :rtype: list
+    """
+    if int(TEST):
+        return []
+
+    if EMAIL_BACKEND == ASYNCIO:
+        return [delivery.submit_batch(recipients, subject, template, priority=priority)]
+
+    queued_at: float = time.time()
+    return [
+        send_emails.apply_async(
+            (recipients[index:index + EMAIL_BATCH_CHUNK], subject, template),
+            {'priority': priority, 'queued_at': queued_at},
+            queue=priority,
+        ).id
+        for index in range(0, len(recipients), EMAIL_BATCH_CHUNK)
+    ]
+
+
+def queue_metrics_snapshot() -> list[dict[str, typing.Union[str, int, float]]]:
+    """
+        Queue latency metrics for current delivery backend
+        :return: Metrics per priority
+        :rtype: list
+    """
+    if EMAIL_BACKEND == ASYNCIO:
+        return delivery.metrics.snapshot()
+    return queue_metrics.snapshot()
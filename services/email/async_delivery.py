@@ -0,0 +1,323 @@
+import asyncio
+import collections
+import itertools
+import os
+import time
+import typing
+import uuid
+from email.mime.text import MIMEText
+
+import aiosmtplib
+
+from app.crud import dead_letter_crud
+from config import (
+    SMTP_HOST,
+    SMTP_PORT,
+    SMTP_STARTTLS,
+    ASYNC_EMAIL_CONCURRENCY,
+    ASYNC_EMAIL_STOP_TIMEOUT,
+    EMAIL_DOMAIN_RATE,
+    TRANSACTIONAL,
+    NOTIFICATION,
+    PRIORITIES,
+    EMAIL_RETRY_MAX,
+)
+from db import async_session
+from metrics import QueueMetrics
+from smtp_pool import TemplateCache, is_transient, backoff
+
+PENDING = 'PENDING'
+SUCCESS = 'SUCCESS'
+SENT = 'SENT'
+
+
+class DomainRateLimiter:
+    """ Per-domain rate limit (emails per second) """
+
+    def __init__(self, rate: float):
+        self._interval = 1 / rate if rate > 0 else 0
+        self._next: dict[str, float] = {}
+
+    async def acquire(self, recipient: str) -> None:
+        """
+            Wait for recipient domain slot
+            :param recipient: Recipient
+            :type recipient: str
+            :return: None
+        """
+        if not self._interval:
+            return
+
+        domain = recipient.rsplit('@', 1)[-1].lower()
+        now = time.monotonic()
+        slot = max(now, self._next.get(domain, now))
+        self._next[domain] = slot + self._interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class AsyncDelivery:
+    """
+        Asyncio email delivery engine, every worker keeps its own SMTP session.
+        Transactional emails are dequeued before notification emails.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        sender: str,
+        password: typing.Optional[str] = None,
+        starttls: bool = True,
+        concurrency: int = 100,
+        domain_rate: float = 0,
+        results_limit: int = 1000,
+    ):
+        self._host = host
+        self._port = port
+        self._sender = sender
+        self._password = password or None
+        self._starttls = starttls
+        self._concurrency = concurrency
+        self._limiter = DomainRateLimiter(domain_rate)
+        self._templates = TemplateCache()
+        self._queue: typing.Optional[asyncio.PriorityQueue] = None
+        self._counter = itertools.count()
+        self.metrics = QueueMetrics()
+        self._workers: list[asyncio.Task] = []
+        self._results: collections.OrderedDict[str, dict] = collections.OrderedDict()
+        self._results_limit = results_limit
+
+    async def start(self) -> None:
+        """
+            Start workers
+            :return: None
+        """
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self._concurrency)]
+
+    async def stop(self, timeout: typing.Optional[float] = ASYNC_EMAIL_STOP_TIMEOUT) -> None:
+        """
+            Wait for queued emails (up to timeout) and stop workers
+            :param timeout: Timeout in seconds, None - wait for all emails
+            :type timeout: float
+            :return: None
+        """
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f'{self._queue.qsize()} queued emails have been dropped on shutdown')
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def _put(
+        self,
+        priority: str,
+        batch: typing.Optional[tuple[str, int]],
+        recipient: str,
+        subject: str,
+        template: str,
+        data: dict,
+    ) -> None:
+        """
+            Put email to queue (ordered by priority, then FIFO)
+            :param priority: Priority
+            :type priority: str
+            :param batch: Batch ID and recipient position in batch
+            :type batch: tuple
+            :param recipient: Recipient
+            :type recipient: str
+            :param subject: Subject
+            :type subject: str
+            :param template: Template
+            :type template: str
+            :param data: Jinja data
+            :type data: dict
+            :return: None
+        """
+        self._queue.put_nowait(
+            (
+                PRIORITIES.index(priority),
+                next(self._counter),
+                (priority, time.time(), batch, recipient, subject, template, data),
+            )
+        )
+
+    def submit(self, recipient: str, subject: str, template: str, priority: str = TRANSACTIONAL, **data) -> None:
+        """
+            Queue email (same payload as tasks.send_email)
+            :param recipient: Recipient
+            :type recipient: str
+            :param subject: Subject
+            :type subject: str
+            :param template: Template
+            :type template: str
+            :param priority: Priority
+            :type priority: str
+            :param data: Jinja data
+            :return: None
+        """
+        self._put(priority, None, recipient, subject, template, data)
+
+    def submit_batch(self, recipients: list[dict], subject: str, template: str, priority: str = NOTIFICATION) -> str:
+        """
+            Queue emails (same payload as tasks.send_emails)
+            :param recipients: Recipients with Jinja data
+            :type recipients: list
+            :param subject: Subject
+            :type subject: str
+            :param template: Template
+            :type template: str
+            :param priority: Priority
+            :type priority: str
+            :return: Batch ID
+            :rtype: str
+        """
+        batch_id = f'{uuid.uuid4()}'
+        self._results[batch_id] = {'left': len(recipients), 'results': [None] * len(recipients)}
+        while len(self._results) > self._results_limit:
+            self._results.popitem(last=False)
+
+        for position, recipient in enumerate(recipients):
+            self._put(priority, (batch_id, position), recipient['recipient'], subject, template, recipient['data'])
+        return batch_id
+
+    def get_batch(self, batch_id: str) -> typing.Optional[dict]:
+        """
+            Get batch status and results
+            :param batch_id: Batch ID
+            :type batch_id: str
+            :return: Batch status and results per recipient (in recipients order)
+            :rtype: dict
+        """
+        batch = self._results.get(batch_id)
+        if batch is None:
+            return
+        if batch['left']:
+            return {'id': batch_id, 'status': PENDING, 'results': None}
+        return {'id': batch_id, 'status': SUCCESS, 'results': batch['results']}
+
+    def _connection(self):
+        """
+            New SMTP client
+            :return: SMTP client
+        """
+        return aiosmtplib.SMTP(
+            hostname=self._host,
+            port=self._port,
+            username=self._sender if self._password else None,
+            password=self._password,
+            start_tls=self._starttls,
+        )
+
+    async def _worker(self) -> None:
+        """
+            Worker, sends queued emails over one (re)connected SMTP session
+            :return: None
+        """
+        server = self._connection()
+        try:
+            while True:
+                *_, (priority, queued_at, batch, recipient, subject, template, data) = await self._queue.get()
+                self.metrics.observe(priority, queued_at)
+                try:
+                    result = await self._deliver(server, priority, recipient, subject, template, data)
+                finally:
+                    self._queue.task_done()
+
+                if batch is not None and batch[0] in self._results:
+                    batch_id, position = batch
+                    self._results[batch_id]['results'][position] = result
+                    self._results[batch_id]['left'] -= 1
+        finally:
+            if server.is_connected:
+                server.close()
+
+    async def _deliver(self, server, priority: str, recipient: str, subject: str, template: str, data: dict) -> str:
+        """
+            Deliver email, retry transient errors with backoff, save failed email to dead letters
+            :param server: SMTP client
+            :param priority: Priority
+            :type priority: str
+            :param recipient: Recipient
+            :type recipient: str
+            :param subject: Subject
+            :type subject: str
+            :param template: Template
+            :type template: str
+            :param data: Jinja data
+            :type data: dict
+            :return: Result
+            :rtype: str
+        """
+        retries = 0
+        while True:
+            try:
+                await self._limiter.acquire(recipient)
+                await self._send(server, recipient, subject, self._templates.render(template, **data))
+                return SENT
+            except Exception as _ex:
+                print(_ex)
+                if is_transient(_ex) and retries < EMAIL_RETRY_MAX:
+                    await asyncio.sleep(backoff(retries))
+                    retries += 1
+                    continue
+
+                try:
+                    async with async_session() as db:
+                        await dead_letter_crud.create(
+                            db,
+                            priority=priority,
+                            recipient=recipient,
+                            subject=subject,
+                            template=template,
+                            data=data,
+                            error=f'{_ex.__class__.__name__}: {_ex}',
+                            retries=retries,
+                        )
+                except Exception as _db_ex:
+                    print(_db_ex)
+                return f'{_ex}'
+
+    async def _send(self, server, recipient: str, subject: str, html: str) -> None:
+        """
+            Send message, reconnect once if session was dropped
+            :param server: SMTP client
+            :param recipient: Recipient
+            :type recipient: str
+            :param subject: Subject
+            :type subject: str
+            :param html: HTML
+            :type html: str
+            :return: None
+        """
+        msg = MIMEText(html, 'html')
+        msg['From'] = self._sender
+        msg['To'] = recipient
+        msg['Subject'] = subject
+
+        for attempt in range(2):
+            try:
+                if not server.is_connected:
+                    await server.connect()
+                await server.send_message(msg)
+                return
+            except (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError):
+                server.close()
+                if attempt:
+                    raise
+
+
+delivery = AsyncDelivery(
+    SMTP_HOST,
+    SMTP_PORT,
+    os.environ.get('EMAIL'),
+    os.environ.get('PASSWORD_EMAIL'),
+    starttls=bool(SMTP_STARTTLS),
+    concurrency=ASYNC_EMAIL_CONCURRENCY,
+    domain_rate=EMAIL_DOMAIN_RATE,
+)
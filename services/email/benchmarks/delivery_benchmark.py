@@ -0,0 +1,96 @@
+"""
+    Delivery backends benchmark against a local SMTP sink (aiosmtpd)
+
+    Compares the Celery prefork model (N processes, blocking smtplib over pooled connections)
+    with the asyncio engine (one process, aiosmtplib, ASYNC_EMAIL_CONCURRENCY sessions).
+    The sink answers DATA after a delay to emulate a remote SMTP server.
+
+    poetry install (aiosmtpd is a dev dependency)
+    python -m benchmarks.delivery_benchmark [emails] [processes] [concurrency] [delay_ms]
+"""
+import asyncio
+import multiprocessing
+import sys
+import time
+
+from aiosmtpd.controller import Controller
+
+from async_delivery import AsyncDelivery
+from smtp_pool import SMTPPool, TemplateCache
+
+HOST = '127.0.0.1'
+PORT = 8026
+SENDER = 'bench@example.com'
+TEMPLATE = 'templates/notification.html'
+
+
+class Sink:
+    """ Accept and drop messages after delay """
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    async def handle_DATA(self, server, session, envelope) -> str:
+        await asyncio.sleep(self.delay)
+        return '250 OK'
+
+
+def prefork_child(indexes: range) -> None:
+    """ One prefork child, same code path as tasks.send_email """
+    pool = SMTPPool(HOST, PORT, starttls=False, size=1)
+    templates = TemplateCache()
+    for index in indexes:
+        pool.send(
+            SENDER,
+            f'user{index}@example.com',
+            'Benchmark',
+            templates.render(TEMPLATE, username=f'user{index}', link='http://localhost/'),
+        )
+    pool.close()
+
+
+def prefork(emails: int, processes: int) -> None:
+    with multiprocessing.Pool(processes) as pool:
+        pool.map(prefork_child, [range(index, emails, processes) for index in range(processes)])
+
+
+async def asyncio_engine(emails: int, concurrency: int) -> None:
+    delivery = AsyncDelivery(HOST, PORT, SENDER, starttls=False, concurrency=concurrency)
+    await delivery.start()
+    batch_id = delivery.submit_batch(
+        [
+            {'recipient': f'user{index}@example.com', 'data': {'username': f'user{index}', 'link': 'http://localhost/'}}
+            for index in range(emails)
+        ],
+        'Benchmark',
+        TEMPLATE,
+    )
+    await delivery.stop(timeout=None)
+    batch = delivery.get_batch(batch_id)
+    assert len(batch['results']) == emails and set(batch['results']) == {'SENT'}, batch
+
+
+def main(emails: int, processes: int, concurrency: int, delay: float) -> None:
+    controller = Controller(Sink(delay), hostname=HOST, port=PORT)
+    controller.start()
+    try:
+        start = time.perf_counter()
+        prefork(emails, processes)
+        elapsed = time.perf_counter() - start
+        print(f' prefork ({processes} processes): {emails} emails in {elapsed:.2f}s ({emails / elapsed:.0f} emails/s)')
+
+        start = time.perf_counter()
+        asyncio.run(asyncio_engine(emails, concurrency))
+        elapsed = time.perf_counter() - start
+        print(f' asyncio ({concurrency} sessions): {emails} emails in {elapsed:.2f}s ({emails / elapsed:.0f} emails/s)')
+    finally:
+        controller.stop()
+
+
+if __name__ == '__main__':
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 4,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 100,
+        (float(sys.argv[4]) if len(sys.argv) > 4 else 20) / 1000,
+    )
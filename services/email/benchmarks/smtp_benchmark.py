@@ -0,0 +1,82 @@
+"""
+    SMTP throughput benchmark against a local SMTP sink (aiosmtpd)
+
+    Compares a fresh connection + template compile per email (old tasks.send_email)
+    with the pooled connection and the template cache.
+
+    poetry install (aiosmtpd is a dev dependency)
+    python -m benchmarks.smtp_benchmark [emails]
+"""
+import smtplib
+import sys
+import time
+from email.mime.text import MIMEText
+
+from aiosmtpd.controller import Controller
+from jinja2 import Template
+
+from smtp_pool import SMTPPool, TemplateCache
+
+HOST = '127.0.0.1'
+PORT = 8025
+SENDER = 'bench@example.com'
+TEMPLATE = 'templates/notification.html'
+
+
+class Sink:
+    """ Accept and drop messages """
+
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope) -> str:
+        self.received += 1
+        return '250 OK'
+
+
+def naive(emails: int) -> None:
+    """ Connection and template compile per email """
+    for index in range(emails):
+        server = smtplib.SMTP(HOST, PORT)
+        with open(TEMPLATE) as file:
+            html = Template(file.read()).render(username=f'user{index}', link='http://localhost/')
+        msg = MIMEText(html, 'html')
+        msg['From'] = SENDER
+        msg['To'] = f'user{index}@example.com'
+        msg['Subject'] = 'Benchmark'
+        server.sendmail(SENDER, f'user{index}@example.com', msg.as_string())
+        server.quit()
+
+
+def pooled(emails: int) -> None:
+    """ Pooled connection and cached template """
+    pool = SMTPPool(HOST, PORT, starttls=False, size=1)
+    templates = TemplateCache()
+    for index in range(emails):
+        pool.send(
+            SENDER,
+            f'user{index}@example.com',
+            'Benchmark',
+            templates.render(TEMPLATE, username=f'user{index}', link='http://localhost/'),
+        )
+    pool.close()
+
+
+def main(emails: int) -> None:
+    sink = Sink()
+    controller = Controller(sink, hostname=HOST, port=PORT)
+    controller.start()
+    try:
+        for name, function in (('naive', naive), ('pooled', pooled)):
+            received = sink.received
+            start = time.perf_counter()
+            function(emails)
+            elapsed = time.perf_counter() - start
+            assert sink.received - received == emails
+            print(f'{name:>8}: {emails} emails in {elapsed:.2f}s ({emails / elapsed:.0f} emails/s)')
+    finally:
+        controller.stop()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -20,9 +20,46 @@ DB_NAME = os.environ.get('DB_NAME', 'email_db')
 DB_HOST = os.environ.get('DB_HOST', 'localhost')
 DB_PORT = os.environ.get('DB_PORT', '5432')
 DATABASE_URL = f'postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+# Celery worker (dead letters)
+SYNC_DATABASE_URL = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
 
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379')
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379')
 
+# SMTP
+SMTP_HOST = os.environ.get('SMTP_HOST', 'smtp.gmail.com')
+SMTP_PORT = int(os.environ.get('SMTP_PORT', 587))
+SMTP_STARTTLS = int(os.environ.get('SMTP_STARTTLS', 1))
+SMTP_POOL_SIZE = int(os.environ.get('SMTP_POOL_SIZE', 2))
+# Idle seconds after which a pooled connection is checked with NOOP
+SMTP_POOL_IDLE = int(os.environ.get('SMTP_POOL_IDLE', 30))
+
+# Priorities (Celery queues)
+TRANSACTIONAL = 'transactional'
+NOTIFICATION = 'notification'
+PRIORITIES = (TRANSACTIONAL, NOTIFICATION)
+
+# Retries for transient SMTP errors, backoff = min(EMAIL_RETRY_BACKOFF * 2 ** retries, EMAIL_RETRY_BACKOFF_MAX)
+EMAIL_RETRY_MAX = int(os.environ.get('EMAIL_RETRY_MAX', 5))
+EMAIL_RETRY_BACKOFF = int(os.environ.get('EMAIL_RETRY_BACKOFF', 10))
+EMAIL_RETRY_BACKOFF_MAX = int(os.environ.get('EMAIL_RETRY_BACKOFF_MAX', 600))
+
+# Delivery backend: celery (prefork worker, blocking smtplib) or asyncio (in-process, aiosmtplib)
+CELERY = 'celery'
+ASYNCIO = 'asyncio'
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', CELERY)
+ASYNC_EMAIL_CONCURRENCY = int(os.environ.get('ASYNC_EMAIL_CONCURRENCY', 100))
+# Seconds to wait for queued emails on shutdown, workers in retry backoff don't hold it
+ASYNC_EMAIL_STOP_TIMEOUT = float(os.environ.get('ASYNC_EMAIL_STOP_TIMEOUT', 30))
+# Emails per second per recipient domain, 0 - unlimited
+EMAIL_DOMAIN_RATE = float(os.environ.get('EMAIL_DOMAIN_RATE', 0))
+
+# Recipients per Celery task (one SMTP session per task)
+EMAIL_BATCH_CHUNK = int(os.environ.get('EMAIL_BATCH_CHUNK', 50))
+EMAIL_BATCH_LIMIT = int(os.environ.get('EMAIL_BATCH_LIMIT', 10000))
+# Seconds batch task owners are kept (Celery keeps results for a day by default)
+EMAIL_BATCH_TTL = int(os.environ.get('EMAIL_BATCH_TTL', 24 * 60 * 60))
+
 if int(TEST):
     DATABASE_URL = f'postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}_test'
+    SYNC_DATABASE_URL = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}_test'
@@ -1,10 +1,14 @@
+from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-from config import DATABASE_URL
+from config import DATABASE_URL, SYNC_DATABASE_URL
 
 engine = create_async_engine(DATABASE_URL, future=True, echo=True)
 async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+# Celery worker
+sync_engine = create_engine(SYNC_DATABASE_URL, future=True)
+sync_session = sessionmaker(sync_engine, expire_on_commit=False, future=True)
 Base = declarative_base()
 
 
@@ -2,9 +2,12 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.client.routers import client_router
+from app.dead_letter.routers import dead_letter_router
 from app.mail.routers import mail_router
-from config import PROJECT_NAME, API, VERSION, CLIENT_NAME
-from db import engine, Base
+from app.registry import client_registry
+from async_delivery import delivery
+from config import PROJECT_NAME, API, VERSION, CLIENT_NAME, EMAIL_BACKEND, ASYNCIO, TEST
+from db import engine, Base, async_session
 
 app = FastAPI(
     title=PROJECT_NAME,
@@ -27,6 +30,19 @@ async def startup():
     async with engine.begin() as connection:
         await connection.run_sync(Base.metadata.create_all)
 
+    async with async_session() as db:
+        await client_registry.load(db)
+
+    if EMAIL_BACKEND == ASYNCIO and not int(TEST):
+        await delivery.start()
+
+
+@app.on_event('shutdown')
+async def shutdown():
+    if EMAIL_BACKEND == ASYNCIO and not int(TEST):
+        await delivery.stop()
+
 
 app.include_router(mail_router, prefix=f'/{API}')
 app.include_router(client_router, prefix=f'/{API}/clients')
+app.include_router(dead_letter_router, prefix=f'/{API}/dead-letters')
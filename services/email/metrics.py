@@ -0,0 +1,108 @@
+import time
+import typing
+
+import redis
+
+from config import PRIORITIES, CELERY_RESULT_BACKEND
+
+
+class QueueMetrics:
+    """ Queue latency per priority (in-process) """
+
+    def __init__(self):
+        self._metrics: dict[str, dict[str, float]] = {}
+
+    def observe(self, priority: str, queued_at: typing.Optional[float]) -> None:
+        """
+            Observe queue latency
+            :param priority: Priority
+            :type priority: str
+            :param queued_at: Queued at (unix time)
+            :type queued_at: float
+            :return: None
+        """
+        if queued_at is None:
+            return
+        latency = max(time.time() - queued_at, 0)
+        metrics = self._metrics.setdefault(priority, {'count': 0, 'sum': 0, 'max': 0, 'last': 0})
+        metrics['count'] += 1
+        metrics['sum'] += latency
+        metrics['max'] = max(metrics['max'], latency)
+        metrics['last'] = latency
+
+    def _get(self, priority: str) -> dict[str, float]:
+        """
+            Get raw metrics
+            :param priority: Priority
+            :type priority: str
+            :return: Metrics
+            :rtype: dict
+        """
+        return self._metrics.get(priority, {})
+
+    def snapshot(self) -> list[dict[str, typing.Union[str, int, float]]]:
+        """
+            Snapshot
+            :return: Metrics per priority
+            :rtype: list
+        """
+        snapshot = []
+        for priority in PRIORITIES:
+            metrics = self._get(priority)
+            count = int(metrics.get('count', 0))
+            snapshot.append(
+                {
+                    'priority': priority,
+                    'count': count,
+                    'average': float(metrics.get('sum', 0)) / count if count else 0,
+                    'max': float(metrics.get('max', 0)),
+                    'last': float(metrics.get('last', 0)),
+                }
+            )
+        return snapshot
+
+
+class RedisQueueMetrics(QueueMetrics):
+    """ Queue latency per priority shared by all Celery workers (Redis hash per priority) """
+
+    KEY = 'email:queue:latency:'
+
+    # Max is updated atomically
+    OBSERVE = '''
+        redis.call('HINCRBY', KEYS[1], 'count', 1)
+        redis.call('HINCRBYFLOAT', KEYS[1], 'sum', ARGV[1])
+        redis.call('HSET', KEYS[1], 'last', ARGV[1])
+        local max = tonumber(redis.call('HGET', KEYS[1], 'max') or '0')
+        if tonumber(ARGV[1]) > max then
+            redis.call('HSET', KEYS[1], 'max', ARGV[1])
+        end
+    '''
+
+    def __init__(self, url: str):
+        super().__init__()
+        self._url = url
+        self._client = None
+
+    @property
+    def client(self):
+        """
+            Redis client (lazy, one per process)
+            :return: Redis
+        """
+        if self._client is None:
+            self._client = redis.Redis.from_url(self._url)
+        return self._client
+
+    def observe(self, priority: str, queued_at: typing.Optional[float]) -> None:
+        if queued_at is None:
+            return
+        try:
+            self.client.eval(self.OBSERVE, 1, f'{self.KEY}{priority}', max(time.time() - queued_at, 0))
+        except Exception as _ex:
+            print(_ex)
+
+    def _get(self, priority: str) -> dict[str, float]:
+        return {key.decode(): float(value) for key, value in self.client.hgetall(f'{self.KEY}{priority}').items()}
+
+
+queue_metrics = RedisQueueMetrics(CELERY_RESULT_BACKEND)
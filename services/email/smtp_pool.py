@@ -0,0 +1,243 @@
+import contextlib
+import os
+import queue
+import smtplib
+import threading
+import time
+import typing
+from email.mime.text import MIMEText
+
+from jinja2 import Template
+
+from config import EMAIL_RETRY_BACKOFF, EMAIL_RETRY_BACKOFF_MAX
+
+
+def reply_codes(error: Exception) -> list[int]:
+    """
+        SMTP reply codes of error (smtplib and aiosmtplib)
+        :param error: Error
+        :type error: Exception
+        :return: Reply codes (empty if server didn't reply)
+        :rtype: list
+    """
+    recipients = getattr(error, 'recipients', None)
+    if isinstance(recipients, dict):
+        # smtplib: {address: (code, message)}
+        return [code for code, _ in recipients.values()]
+    if isinstance(recipients, list):
+        # aiosmtplib: [SMTPRecipientRefused]
+        return [recipient.code for recipient in recipients]
+    code = getattr(error, 'smtp_code', None) or getattr(error, 'code', None)
+    return [code] if isinstance(code, int) else []
+
+
+def is_transient(error: Exception) -> bool:
+    """
+        Is SMTP error transient? (4xx replies and network errors, smtplib and aiosmtplib)
+        :param error: Error
+        :type error: Exception
+        :return: Transient?
+        :rtype: bool
+    """
+    # SMTP errors are OSError too, so server reply is checked first: 5xx is a permanent failure
+    codes = reply_codes(error)
+    if codes:
+        return all(400 <= code < 500 for code in codes)
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+def backoff(retries: int) -> int:
+    """
+        Exponential backoff
+        :param retries: Retries
+        :type retries: int
+        :return: Seconds
+        :rtype: int
+    """
+    return min(EMAIL_RETRY_BACKOFF * 2 ** retries, EMAIL_RETRY_BACKOFF_MAX)
+
+
+class TemplateCache:
+    """ Compiled Jinja templates cache (path + mtime) """
+
+    def __init__(self):
+        self._templates: dict[str, tuple[int, Template]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Template:
+        """
+            Get compiled template, recompile if file has been changed
+            :param path: Template path
+            :type path: str
+            :return: Template
+            :rtype: Template
+        """
+        mtime = os.stat(path).st_mtime_ns
+        cached = self._templates.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with open(path) as file:
+            template = Template(file.read())
+        with self._lock:
+            self._templates[path] = (mtime, template)
+        return template
+
+    def render(self, path: str, **data) -> str:
+        """
+            Render template
+            :param path: Template path
+            :type path: str
+            :param data: Jinja data
+            :return: HTML
+            :rtype: str
+        """
+        return self.get(path).render(**data)
+
+
+class SMTPPool:
+    """ Pool of authenticated SMTP connections (per worker process) """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: typing.Optional[str] = None,
+        password: typing.Optional[str] = None,
+        starttls: bool = True,
+        size: int = 2,
+        idle: int = 30,
+    ):
+        self._host = host
+        self._port = port
+        self._user = user
+        self._password = password
+        self._starttls = starttls
+        self._idle = idle
+        self._connections: queue.LifoQueue = queue.LifoQueue(maxsize=size)
+
+    def _connect(self) -> smtplib.SMTP:
+        """
+            New connection
+            :return: SMTP server
+            :rtype: smtplib.SMTP
+        """
+        server = smtplib.SMTP(self._host, self._port)
+        if self._starttls:
+            server.starttls()
+        if self._user:
+            server.login(self._user, self._password)
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP) -> None:
+        """
+            Close connection
+            :param server: SMTP server
+            :type server: smtplib.SMTP
+            :return: None
+        """
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def _healthy(self, server: smtplib.SMTP, last_used: float) -> bool:
+        """
+            Is connection alive? (NOOP only for idle connections)
+            :param server: SMTP server
+            :type server: smtplib.SMTP
+            :param last_used: Last used time
+            :type last_used: float
+            :return: Healthy?
+            :rtype: bool
+        """
+        if time.monotonic() - last_used < self._idle:
+            return True
+        try:
+            return server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _acquire(self) -> smtplib.SMTP:
+        """
+            Acquire connection
+            :return: SMTP server
+            :rtype: smtplib.SMTP
+        """
+        while True:
+            try:
+                server, last_used = self._connections.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if self._healthy(server, last_used):
+                return server
+            self._close(server)
+
+    def _release(self, server: smtplib.SMTP) -> None:
+        """
+            Return connection to pool
+            :param server: SMTP server
+            :type server: smtplib.SMTP
+            :return: None
+        """
+        try:
+            self._connections.put_nowait((server, time.monotonic()))
+        except queue.Full:
+            self._close(server)
+
+    @contextlib.contextmanager
+    def connection(self) -> typing.Iterator[smtplib.SMTP]:
+        """
+            Pooled connection, broken connections are not returned to pool
+            :return: SMTP server
+        """
+        server = self._acquire()
+        try:
+            yield server
+        except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError):
+            server.close()
+            raise
+        except Exception:
+            self._release(server)
+            raise
+        self._release(server)
+
+    def send(self, sender: str, recipient: str, subject: str, html: str) -> None:
+        """
+            Send message, reconnect once if pooled connection was dropped
+            :param sender: Sender
+            :type sender: str
+            :param recipient: Recipient
+            :type recipient: str
+            :param subject: Subject
+            :type subject: str
+            :param html: HTML
+            :type html: str
+            :return: None
+        """
+        msg = MIMEText(html, 'html')
+        msg['From'] = sender
+        msg['To'] = recipient
+        msg['Subject'] = subject
+
+        try:
+            with self.connection() as server:
+                server.sendmail(sender, recipient, msg.as_string())
+        except smtplib.SMTPServerDisconnected:
+            with self.connection() as server:
+                server.sendmail(sender, recipient, msg.as_string())
+
+    def close(self) -> None:
+        """
+            Close all pooled connections
+            :return: None
+        """
+        while True:
+            try:
+                server, _ = self._connections.get_nowait()
+            except queue.Empty:
+                return
+            self._close(server)
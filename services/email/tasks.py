@@ -1,24 +1,76 @@
 import os
-import smtplib
-from email.mime.text import MIMEText
+import typing
 
 from celery import Celery
-from jinja2 import Template
+from celery.signals import worker_process_shutdown
+from kombu import Queue
 
-from config import CELERY_BROKER_URL, CELERY_RESULT_BACKEND
+from app.models import DeadLetter
+from config import (
+    CELERY_BROKER_URL,
+    CELERY_RESULT_BACKEND,
+    SMTP_HOST,
+    SMTP_PORT,
+    SMTP_STARTTLS,
+    SMTP_POOL_SIZE,
+    SMTP_POOL_IDLE,
+    TRANSACTIONAL,
+    NOTIFICATION,
+    EMAIL_RETRY_MAX,
+)
+from db import sync_session
+from metrics import queue_metrics
+from smtp_pool import SMTPPool, TemplateCache, is_transient, backoff
 
 celery = Celery(__name__)
 celery.conf.broker_url = CELERY_BROKER_URL
 celery.conf.result_backend = CELERY_RESULT_BACKEND
+# One queue per priority, run dedicated workers with -Q transactional / -Q notification
+celery.conf.task_queues = (Queue(TRANSACTIONAL), Queue(NOTIFICATION))
+celery.conf.task_default_queue = TRANSACTIONAL
+celery.conf.task_acks_late = True
+celery.conf.worker_prefetch_multiplier = 1
 
 sender = os.environ.get('EMAIL')
 sender_password = os.environ.get('PASSWORD_EMAIL')
 
+SENT = 'SENT'
 
-@celery.task(name='send_email')
-def send_email(recipient: str, subject: str, template: str, **data) -> None:
+# Connections are opened lazily, so every prefork child gets its own
+smtp_pool = SMTPPool(
+    SMTP_HOST,
+    SMTP_PORT,
+    sender,
+    sender_password,
+    starttls=bool(SMTP_STARTTLS),
+    size=SMTP_POOL_SIZE,
+    idle=SMTP_POOL_IDLE,
+)
+templates = TemplateCache()
+
+
+@worker_process_shutdown.connect
+def close_smtp_pool(**_) -> None:
     """
-        Send email
+        Close SMTP pool on worker shutdown
+        :return: None
+    """
+    smtp_pool.close()
+
+
+def dead_letter(
+    priority: str,
+    recipient: str,
+    subject: str,
+    template: str,
+    data: dict,
+    error: Exception,
+    retries: int,
+) -> None:
+    """
+        Save email to dead letters
+        :param priority: Priority
+        :type priority: str
         :param recipient: Recipient
         :type recipient: str
         :param subject: Subject
@@ -26,24 +78,137 @@ def send_email(recipient: str, subject: str, template: str, **data) -> None:
         :param template: Template
         :type template: str
         :param data: Jinja data
+        :type data: dict
+        :param error: Error
+        :type error: Exception
+        :param retries: Retries
+        :type retries: int
         :return: None
     """
+    try:
+        with sync_session() as db:
+            db.add(
+                DeadLetter(
+                    priority=priority,
+                    recipient=recipient,
+                    subject=subject,
+                    template=template,
+                    data=data,
+                    error=f'{error.__class__.__name__}: {error}',
+                    retries=retries,
+                )
+            )
+            db.commit()
+    except Exception as _ex:
+        print(_ex)
 
-    server = smtplib.SMTP('smtp.gmail.com', 587)
-    server.starttls()
 
-    with open(template) as file:
-        html = file.read()
+@celery.task(name='send_email', bind=True, max_retries=EMAIL_RETRY_MAX)
+def send_email(
+    self,
+    recipient: str,
+    subject: str,
+    template: str,
+    priority: str = TRANSACTIONAL,
+    queued_at: typing.Optional[float] = None,
+    **data,
+) -> None:
+    """
+        Send email
+        :param recipient: Recipient
+        :type recipient: str
+        :param subject: Subject
+        :type subject: str
+        :param template: Template
+        :type template: str
+        :param priority: Priority (queue)
+        :type priority: str
+        :param queued_at: Queued at (unix time)
+        :type queued_at: float
+        :param data: Jinja data
+        :return: None
+    """
 
-    t = Template(html)
-    message = t.render(**data)
+    if not self.request.retries:
+        queue_metrics.observe(priority, queued_at)
 
     try:
-        server.login(sender, sender_password)
-        msg = MIMEText(message, 'html')
-        msg['From'] = sender
-        msg['To'] = recipient
-        msg['Subject'] = subject
-        server.sendmail(sender, recipient, msg.as_string())
+        smtp_pool.send(sender, recipient, subject, templates.render(template, **data))
     except Exception as _ex:
         print(_ex)
+        if is_transient(_ex) and self.request.retries < EMAIL_RETRY_MAX:
+            raise self.retry(exc=_ex, countdown=backoff(self.request.retries), queue=priority)
+        dead_letter(priority, recipient, subject, template, data, _ex, self.request.retries)
+
+
+@celery.task(name='send_emails', bind=True, max_retries=EMAIL_RETRY_MAX)
+def send_emails(
+    self,
+    recipients: list[dict],
+    subject: str,
+    template: str,
+    priority: str = NOTIFICATION,
+    queued_at: typing.Optional[float] = None,
+    results: typing.Optional[list[typing.Optional[str]]] = None,
+    positions: typing.Optional[list[int]] = None,
+) -> list[str]:
+    """
+        Send emails (chunk) over one pooled SMTP session, retry only transient failures
+        :param recipients: Recipients with Jinja data
+        :type recipients: list
+        :param subject: Subject
+        :type subject: str
+        :param template: Template
+        :type template: str
+        :param priority: Priority (queue)
+        :type priority: str
+        :param queued_at: Queued at (unix time)
+        :type queued_at: float
+        :param results: Results of previous attempts
+        :type results: list
+        :param positions: Positions of recipients to send (retry), all by default
+        :type positions: list
+        :return: Result per recipient (in recipients order)
+        :rtype: list
+    """
+
+    if not self.request.retries:
+        queue_metrics.observe(priority, queued_at)
+
+    results: list[typing.Optional[str]] = results or [None] * len(recipients)
+    retry: list[int] = []
+    error: typing.Optional[Exception] = None
+
+    for position in range(len(recipients)) if positions is None else positions:
+        recipient = recipients[position]
+        try:
+            smtp_pool.send(sender, recipient['recipient'], subject, templates.render(template, **recipient['data']))
+            results[position] = SENT
+        except Exception as _ex:
+            print(_ex)
+            results[position] = f'{_ex}'
+            if is_transient(_ex) and self.request.retries < EMAIL_RETRY_MAX:
+                retry.append(position)
+                error = _ex
+            else:
+                dead_letter(
+                    priority, recipient['recipient'], subject, template, recipient['data'], _ex, self.request.retries,
+                )
+
+    if retry:
+        raise self.retry(
+            exc=error,
+            countdown=backoff(self.request.retries),
+            queue=priority,
+            args=(),
+            kwargs={
+                'recipients': recipients,
+                'subject': subject,
+                'template': template,
+                'priority': priority,
+                'queued_at': queued_at,
+                'results': results,
+                'positions': retry,
+            },
+        )
+    return results
@@ -3,6 +3,7 @@ import asyncio
 from fastapi.testclient import TestClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.registry import client_registry
 from config import API
 from db import Base, engine
 from main import app
@@ -32,6 +33,7 @@ class BaseTest:
         self.session = AsyncSession(engine)
         self.client = TestClient(app)
         self.url = f'/{API}'
+        client_registry.invalidate()
         async_loop(create_all())
 
     def tearDown(self) -> None:
@@ -0,0 +1,74 @@
+import asyncio
+import time
+from unittest import TestCase, mock
+
+from async_delivery import AsyncDelivery, DomainRateLimiter, PENDING, SUCCESS, SENT
+from tests import async_loop
+
+
+class AsyncDeliveryTestCase(TestCase):
+
+    def test_batch(self):
+        delivery = AsyncDelivery('localhost', 25, 'from@example.com', concurrency=3)
+
+        async def run():
+            await delivery.start()
+            batch_id = delivery.submit_batch(
+                [
+                    {'recipient': 'test@example.com', 'data': {'username': 'test'}},
+                    {'recipient': 'bad@example.com', 'data': {'username': 'bad'}},
+                    {'recipient': 'test@example.com', 'data': {'username': 'test'}},
+                ],
+                'Subject',
+                'templates/register.html',
+            )
+            self.assertEqual(delivery.get_batch(batch_id), {'id': batch_id, 'status': PENDING, 'results': None})
+            await delivery.stop()
+            return batch_id
+
+        async def send(server, recipient, subject, html):
+            if recipient == 'bad@example.com':
+                raise ValueError('Bad recipient')
+
+        with mock.patch('async_delivery.aiosmtplib') as _:
+            with mock.patch.object(delivery, '_send', side_effect=send) as _send:
+                batch_id = async_loop(run())
+                self.assertEqual(_send.call_count, 3)
+
+        self.assertEqual(
+            delivery.get_batch(batch_id),
+            {'id': batch_id, 'status': SUCCESS, 'results': [SENT, 'Bad recipient', SENT]},
+        )
+        self.assertIsNone(delivery.get_batch('test'))
+
+    def test_stop_timeout(self):
+        delivery = AsyncDelivery('localhost', 25, 'from@example.com', concurrency=1)
+
+        async def run():
+            await delivery.start()
+            delivery.submit('test@example.com', 'Subject', 'templates/register.html', username='test')
+            await asyncio.sleep(0)
+            await delivery.stop(timeout=0.1)
+
+        async def send(server, recipient, subject, html):
+            # Worker waits in retry backoff
+            await asyncio.sleep(600)
+
+        with mock.patch('async_delivery.aiosmtplib') as _:
+            with mock.patch.object(delivery, '_send', side_effect=send) as _:
+                start = time.monotonic()
+                async_loop(run())
+                self.assertLess(time.monotonic() - start, 1)
+
+    def test_domain_rate_limit(self):
+        limiter = DomainRateLimiter(20)
+
+        async def run():
+            for _ in range(5):
+                await limiter.acquire('test@example.com')
+            await limiter.acquire('test@example.org')
+
+        start = time.monotonic()
+        async_loop(run())
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+        self.assertLess(time.monotonic() - start, 0.5)
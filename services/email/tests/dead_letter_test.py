@@ -0,0 +1,117 @@
+import smtplib
+from unittest import TestCase, mock
+
+from fastapi import HTTPException, status
+
+from app.crud import dead_letter_crud
+from config import NOTIFICATION, TRANSACTIONAL, EMAIL_RETRY_MAX
+from tasks import send_email, send_emails, SENT
+from tests import BaseTest, async_loop
+
+
+class DeadLetterTestCase(BaseTest, TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.metrics = mock.patch('tasks.queue_metrics').start()
+
+    def tearDown(self) -> None:
+        mock.patch.stopall()
+        super().tearDown()
+
+    def test_retry_transient_error(self):
+        with mock.patch('tasks.smtp_pool.send', side_effect=smtplib.SMTPServerDisconnected('Disconnected')) as send:
+            send_email.apply(('test@example.com', 'Subject', 'templates/register.html'), {'username': 'test'})
+            self.assertEqual(send.call_count, EMAIL_RETRY_MAX + 1)
+
+        dead_letters = async_loop(dead_letter_crud.all(self.session))
+        self.assertEqual(len(dead_letters), 1)
+        self.assertEqual(dead_letters[0].recipient, 'test@example.com')
+        self.assertEqual(dead_letters[0].priority, TRANSACTIONAL)
+        self.assertEqual(dead_letters[0].data, {'username': 'test'})
+        self.assertEqual(dead_letters[0].retries, EMAIL_RETRY_MAX)
+        self.assertEqual(dead_letters[0].error, 'SMTPServerDisconnected: Disconnected')
+
+    def test_permanent_error(self):
+        error = smtplib.SMTPRecipientsRefused({'test@example.com': (550, b'No such user')})
+        with mock.patch('tasks.smtp_pool.send', side_effect=error) as send:
+            send_email.apply(('test@example.com', 'Subject', 'templates/register.html'), {'username': 'test'})
+            self.assertEqual(send.call_count, 1)
+
+        dead_letters = async_loop(dead_letter_crud.all(self.session))
+        self.assertEqual(len(dead_letters), 1)
+        self.assertEqual(dead_letters[0].retries, 0)
+
+    def test_batch_retry_only_failed(self):
+        def send(sender, recipient, subject, html):
+            if recipient == 'bad@example.com' and send.calls < 2:
+                send.calls += 1
+                raise smtplib.SMTPResponseException(421, b'Try again later')
+
+        send.calls = 0
+        with mock.patch('tasks.smtp_pool.send', side_effect=send) as _send:
+            result = send_emails.apply(
+                (
+                    [
+                        {'recipient': 'test@example.com', 'data': {'username': 'test'}},
+                        {'recipient': 'bad@example.com', 'data': {'username': 'bad'}},
+                    ],
+                    'Subject',
+                    'templates/register.html',
+                ),
+                {'priority': NOTIFICATION},
+            )
+            self.assertEqual(_send.call_count, 4)
+        self.assertEqual(result.get(), [SENT, SENT])
+        self.assertEqual(len(async_loop(dead_letter_crud.all(self.session))), 0)
+
+    def test_dead_letters(self):
+        async_loop(
+            dead_letter_crud.create(
+                self.session,
+                priority=NOTIFICATION,
+                recipient='test@example.com',
+                subject='Subject',
+                template='templates/register.html',
+                data={'username': 'test'},
+                error='SMTPServerDisconnected: Disconnected',
+                retries=5,
+            )
+        )
+        headers = {'Authorization': 'Bearer Token'}
+
+        with mock.patch('app.permission.permission', return_value=1) as _:
+            response = self.client.get(f'{self.url}/dead-letters/', headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()), 1)
+            self.assertEqual(response.json()[0]['recipient'], 'test@example.com')
+            self.assertEqual(response.json()[0]['data'], {'username': 'test'})
+
+            with mock.patch('app.dead_letter.views.enqueue_email') as enqueue:
+                response = self.client.post(f'{self.url}/dead-letters/1/replay', headers=headers)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), {'msg': 'Email has been send'})
+                enqueue.assert_called_once_with(
+                    'test@example.com', 'Subject', 'templates/register.html', {'username': 'test'}, NOTIFICATION
+                )
+            self.assertEqual(len(async_loop(dead_letter_crud.all(self.session))), 0)
+
+            response = self.client.post(f'{self.url}/dead-letters/1/replay', headers=headers)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'detail': 'Dead letter not found'})
+
+            response = self.client.delete(f'{self.url}/dead-letters/1', headers=headers)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'detail': 'Dead letter not found'})
+
+        with mock.patch('app.permission.permission', return_value=1) as user:
+            user.side_effect = HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='User not superuser')
+            response = self.client.get(f'{self.url}/dead-letters/', headers=headers)
+            self.assertEqual(response.status_code, 403)
+
+    def test_queue_metrics(self):
+        with mock.patch('app.permission.permission', return_value=1) as _:
+            with mock.patch('app.service.queue_metrics.snapshot', return_value=[]) as _:
+                response = self.client.get(f'{self.url}/queues', headers={'Authorization': 'Bearer Token'})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), [])
@@ -1,6 +1,6 @@
 from unittest import TestCase, mock
 
-from app.crud import client_crud
+from app.crud import client_crud, batch_crud
 from tests import BaseTest, async_loop
 
 
@@ -48,8 +48,113 @@ class EmailTestCase(BaseTest, TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json(), {'detail': 'Bad client secret'})
 
+    def test_bad_priority(self):
+        self.data['priority'] = 'test'
+        response = self.client.post(f'{self.url}/send', json=self.data)
+        self.assertEqual(response.status_code, 422)
+
     def test_bad_email(self):
         self.data['recipient'] = 'test'
         response = self.client.post(f'{self.url}/send', json=self.data)
         self.assertEqual(response.status_code, 422)
         self.assertEqual(response.json()['detail'][0]['msg'], 'value is not a valid email address')
+
+    def test_client_registry(self):
+        response = self.client.post(f'{self.url}/send', json=self.data)
+        self.assertEqual(response.status_code, 200)
+
+        with mock.patch('app.permission.permission', return_value=1) as _:
+            response = self.client.put(f'{self.url}/clients/1', headers={'Authorization': 'Bearer Token'})
+        old_secret, self.data['secret'] = self.data['secret'], response.json()['secret']
+        self.assertNotEqual(old_secret, self.data['secret'])
+
+        response = self.client.post(f'{self.url}/send', json={**self.data, 'secret': old_secret})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'detail': 'Bad client secret'})
+
+        response = self.client.post(f'{self.url}/send', json=self.data)
+        self.assertEqual(response.status_code, 200)
+
+        with mock.patch('app.permission.permission', return_value=1) as _:
+            self.client.delete(f'{self.url}/clients/1', headers={'Authorization': 'Bearer Token'})
+
+        response = self.client.post(f'{self.url}/send', json=self.data)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'detail': 'Client not found'})
+
+    def test_email_send_batch(self):
+        data = {
+            'recipients': [
+                {'recipient': 'test@example.com', 'data': {'username': 'test'}},
+                {'recipient': 'test2@example.com', 'data': {'username': 'test2'}},
+            ],
+            'subject': self.data['subject'],
+            'template': self.data['template'],
+            'client_name': self.data['client_name'],
+            'secret': self.data['secret'],
+        }
+        response = self.client.post(f'{self.url}/send/batch', json=data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'msg': '2 emails have been queued', 'tasks': []})
+
+        response = self.client.post(f'{self.url}/send/batch', json={**data, 'secret': 'test'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'detail': 'Bad client secret'})
+
+        response = self.client.post(f'{self.url}/send/batch', json={**data, 'template': 'test.html'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'detail': 'Template not found'})
+
+        response = self.client.post(
+            f'{self.url}/send/batch', json={**data, 'recipients': [{'recipient': 'test', 'data': {}}]}
+        )
+        self.assertEqual(response.status_code, 422)
+
+        with mock.patch('app.mail.views.EMAIL_BATCH_LIMIT', 1) as _:
+            response = self.client.post(f'{self.url}/send/batch', json=data)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'detail': 'Too many recipients'})
+
+        with mock.patch('app.mail.views.enqueue_emails', return_value=['task']) as _:
+            response = self.client.post(f'{self.url}/send/batch', json=data)
+            self.assertEqual(response.json(), {'msg': '2 emails have been queued', 'tasks': ['task']})
+        self.assertEqual(async_loop(batch_crud.exist(self.session, task_id='task', client_id=1)), True)
+
+    def test_get_batch_task(self):
+        headers = {'X-Client-Name': self.data['client_name'], 'X-Client-Secret': self.data['secret']}
+
+        response = self.client.get(f'{self.url}/send/batch/test')
+        self.assertEqual(response.status_code, 422)
+
+        response = self.client.get(f'{self.url}/send/batch/test', headers={**headers, 'X-Client-Secret': 'test'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'detail': 'Bad client secret'})
+
+        response = self.client.get(f'{self.url}/send/batch/test', headers={**headers, 'X-Client-Name': 'test'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'detail': 'Client not found'})
+
+        response = self.client.get(f'{self.url}/send/batch/test', headers=headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'detail': 'Task not found'})
+
+        async_loop(batch_crud.add(self.session, 1, ['test']))
+
+        # Other client doesn't get results
+        with mock.patch('app.permission.permission', return_value=1) as _:
+            response = self.client.post(
+                f'{self.url}/clients/?client_name=main', headers={'Authorization': 'Bearer Token'},
+            )
+        other = {'X-Client-Name': 'main', 'X-Client-Secret': response.json()['secret']}
+        response = self.client.get(f'{self.url}/send/batch/test', headers=other)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'detail': 'Task not found'})
+
+        with mock.patch('app.mail.views.send_emails') as send_emails:
+            send_emails.AsyncResult.return_value.status = 'SUCCESS'
+            send_emails.AsyncResult.return_value.result = ['SENT']
+            response = self.client.get(f'{self.url}/send/batch/test', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(), {'id': 'test', 'status': 'SUCCESS', 'results': ['SENT']},
+        )
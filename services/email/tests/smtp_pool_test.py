@@ -0,0 +1,90 @@
+import os
+import smtplib
+import tempfile
+from unittest import TestCase, mock
+
+from config import EMAIL_RETRY_BACKOFF, EMAIL_RETRY_BACKOFF_MAX
+from smtp_pool import SMTPPool, TemplateCache, is_transient, backoff
+
+
+class SMTPPoolTestCase(TestCase):
+
+    def test_reuse_connection(self):
+        with mock.patch('smtp_pool.smtplib.SMTP') as smtp:
+            pool = SMTPPool('localhost', 25, 'user', 'password', size=1)
+            pool.send('from@example.com', 'test@example.com', 'Subject', '<p>1</p>')
+            pool.send('from@example.com', 'test@example.com', 'Subject', '<p>2</p>')
+
+            self.assertEqual(smtp.call_count, 1)
+            smtp.return_value.starttls.assert_called_once()
+            smtp.return_value.login.assert_called_once_with('user', 'password')
+            self.assertEqual(smtp.return_value.sendmail.call_count, 2)
+
+            pool.close()
+            smtp.return_value.quit.assert_called_once()
+
+    def test_reconnect(self):
+        with mock.patch('smtp_pool.smtplib.SMTP') as smtp:
+            pool = SMTPPool('localhost', 25, starttls=False, size=1)
+            pool.send('from@example.com', 'test@example.com', 'Subject', '<p>1</p>')
+
+            smtp.return_value.sendmail.side_effect = [smtplib.SMTPServerDisconnected(), {}]
+            pool.send('from@example.com', 'test@example.com', 'Subject', '<p>2</p>')
+            self.assertEqual(smtp.call_count, 2)
+            smtp.return_value.login.assert_not_called()
+
+    def test_health_check(self):
+        with mock.patch('smtp_pool.smtplib.SMTP') as smtp:
+            pool = SMTPPool('localhost', 25, starttls=False, size=1, idle=0)
+            pool.send('from@example.com', 'test@example.com', 'Subject', '<p>1</p>')
+
+            smtp.return_value.noop.return_value = (421, b'Timeout')
+            pool.send('from@example.com', 'test@example.com', 'Subject', '<p>2</p>')
+            self.assertEqual(smtp.call_count, 2)
+
+            smtp.return_value.noop.return_value = (250, b'OK')
+            pool.send('from@example.com', 'test@example.com', 'Subject', '<p>3</p>')
+            self.assertEqual(smtp.call_count, 2)
+
+
+class RetryTestCase(TestCase):
+
+    def test_is_transient(self):
+        self.assertTrue(is_transient(smtplib.SMTPServerDisconnected()))
+        self.assertTrue(is_transient(ConnectionRefusedError()))
+        self.assertTrue(is_transient(smtplib.SMTPResponseException(451, b'Try again later')))
+        self.assertFalse(is_transient(smtplib.SMTPResponseException(550, b'No such user')))
+        self.assertFalse(is_transient(ValueError()))
+        self.assertFalse(is_transient(smtplib.SMTPAuthenticationError(535, b'Authentication failed')))
+        self.assertFalse(is_transient(smtplib.SMTPSenderRefused(553, b'Bad sender', 'test@example.com')))
+        self.assertFalse(is_transient(smtplib.SMTPNotSupportedError()))
+        self.assertTrue(is_transient(smtplib.SMTPConnectError(421, b'Too many connections')))
+        self.assertTrue(is_transient(smtplib.SMTPRecipientsRefused({'test@example.com': (452, b'Mailbox full')})))
+        self.assertFalse(
+            is_transient(smtplib.SMTPRecipientsRefused({
+                'test@example.com': (452, b'Mailbox full'), 'test2@example.com': (550, b'No such user'),
+            }))
+        )
+
+    def test_backoff(self):
+        self.assertEqual(backoff(0), EMAIL_RETRY_BACKOFF)
+        self.assertEqual(backoff(2), EMAIL_RETRY_BACKOFF * 4)
+        self.assertEqual(backoff(100), EMAIL_RETRY_BACKOFF_MAX)
+
+
+class TemplateCacheTestCase(TestCase):
+
+    def test_template_cache(self):
+        cache = TemplateCache()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'test.html')
+            with open(path, 'w') as file:
+                file.write('<p>Hi {{ username }}!</p>')
+
+            self.assertEqual(cache.render(path, username='test'), '<p>Hi test!</p>')
+            self.assertIs(cache.get(path), cache.get(path))
+
+            with open(path, 'w') as file:
+                file.write('<p>Hello {{ username }}!</p>')
+            os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+            self.assertEqual(cache.render(path, username='test'), '<p>Hello test!</p>')
@@ -0,0 +1,101 @@
+import asyncio
+import datetime
+import hashlib
+import os
+from uuid import uuid4
+
+from fastapi import UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import blob_crud
+from app.service import write_file, remove_files
+from app.storage import storage
+from config import BLOBS_ROOT, BLOB_GC_INTERVAL, BLOB_GC_GRACE, BLOB_GC_BATCH
+from db import async_session
+
+
+async def store_blobs(db: AsyncSession, files: list[UploadFile]) -> list[tuple[str, str]]:
+    """
+        Store files by content hash, without commit
+        :param db: DB
+        :type db: AsyncSession
+        :param files: Files
+        :type files: list
+        :return: Hash and path for every file
+        :rtype: list
+    """
+
+    if not os.path.exists(BLOBS_ROOT):
+        os.makedirs(BLOBS_ROOT, exist_ok=True)
+
+    uploads = {f'{BLOBS_ROOT}.{uuid4().hex}.upload': (file, hashlib.sha256()) for file in files}
+    results = await asyncio.gather(
+        *(write_file(upload, file, hasher=hasher) for upload, (file, hasher) in uploads.items()),
+        return_exceptions=True,
+    )
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        remove_files(*uploads)
+        raise errors[0]
+
+    blobs = []
+    created = []
+    try:
+        for (upload, (file, hasher)), size in zip(uploads.items(), results):
+            digest = hasher.hexdigest()
+            path = await blob_crud.acquire(
+                db, digest, f'{BLOBS_ROOT}{digest}{os.path.splitext(file.filename)[1]}', size,
+            )
+            if not await storage.exists(path):
+                await storage.put_file(path, upload)
+                created.append(path)
+            blobs.append((digest, path))
+    except Exception:
+        await db.rollback()
+        for path in created:
+            await storage.delete(path)
+        raise
+    finally:
+        remove_files(*uploads)
+    return blobs
+
+
+async def collect_blobs(db: AsyncSession, grace: int = BLOB_GC_GRACE, batch: int = BLOB_GC_BATCH) -> int:
+    """
+        Remove blobs that no attachment references, in batches
+        :param db: DB
+        :type db: AsyncSession
+        :param grace: Seconds a blob stays after its last use
+        :type grace: int
+        :param batch: Batch size
+        :type batch: int
+        :return: Removed blobs count
+        :rtype: int
+    """
+
+    before = datetime.datetime.utcnow() - datetime.timedelta(seconds=grace)
+    removed = 0
+    while True:
+        paths = await blob_crud.collect(db, before, batch)
+        # Files go before the commit, so a concurrent upload of the same content waits for it
+        for path in paths:
+            await storage.delete(path)
+        await db.commit()
+        removed += len(paths)
+        if len(paths) < batch:
+            return removed
+
+
+async def run_blob_gc() -> None:
+    """
+        Blob garbage collector loop
+        :return: None
+    """
+
+    while True:
+        await asyncio.sleep(BLOB_GC_INTERVAL)
+        try:
+            async with async_session() as db:
+                await collect_blobs(db)
+        except Exception as _ex:
+            print(_ex)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.categories import views
@@ -33,8 +33,8 @@ async def create_category(schema: CreateCategory, db: AsyncSession = Depends(get
     response_model=list[GetSuperCategory],
     tags=['categories'],
 )
-async def get_categories(db: AsyncSession = Depends(get_db)):
-    return await views.get_categories(db)
+async def get_categories(request: Request, db: AsyncSession = Depends(get_db)):
+    return await views.get_categories(db, request)
 
 
 @categories_router.get(
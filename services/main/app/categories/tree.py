@@ -0,0 +1,95 @@
+import hashlib
+import json
+import typing
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.categories.schemas import GetSuperCategory
+from app.crud import super_category_crud
+from app.models import SuperCategory
+
+
+class Snapshot(typing.NamedTuple):
+    """ Category tree snapshot """
+
+    body: bytes
+    etag: str
+    sub_category_ids: frozenset[int]
+
+
+class CategoryTree:
+    """ In-process category tree (serialized response, ETag and sub category IDs) """
+
+    def __init__(self):
+        self._snapshot: typing.Optional[Snapshot] = None
+        self._version: int = 0
+
+    async def load(self, db: AsyncSession) -> Snapshot:
+        """
+            Load category tree from DB
+            :param db: DB
+            :type db: AsyncSession
+            :return: Snapshot
+            :rtype: Snapshot
+        """
+        version = self._version
+        categories = [
+            GetSuperCategory(**{
+                **category.__dict__,
+                'sub_categories': [sub_category.__dict__ for sub_category in category.sub_categories],
+            }) for category in await super_category_crud.all(
+                db, limit=1000, options=(selectinload(SuperCategory.sub_categories),),
+            )
+        ]
+        body = json.dumps(
+            jsonable_encoder(categories), ensure_ascii=False, allow_nan=False, indent=None, separators=(',', ':'),
+        ).encode('utf-8')
+        snapshot = Snapshot(
+            body=body,
+            etag=f'"{hashlib.sha1(body).hexdigest()}"',
+            sub_category_ids=frozenset(
+                sub_category.id for category in categories for sub_category in category.sub_categories
+            ),
+        )
+        # Don't publish a snapshot that was invalidated while loading
+        if version == self._version:
+            self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self) -> None:
+        """
+            Invalidate tree, next access reloads categories
+            :return: None
+        """
+        self._version += 1
+        self._snapshot = None
+
+    async def get(self, db: AsyncSession) -> Snapshot:
+        """
+            Get snapshot
+            :param db: DB
+            :type db: AsyncSession
+            :return: Snapshot
+            :rtype: Snapshot
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = await self.load(db)
+        return snapshot
+
+    async def sub_category_exist(self, db: AsyncSession, pk: int) -> bool:
+        """
+            Sub category exist?
+            :param db: DB
+            :type db: AsyncSession
+            :param pk: Sub category ID
+            :type pk: int
+            :return: Sub category exist?
+            :rtype: bool
+        """
+        return pk in (await self.get(db)).sub_category_ids
+
+
+category_tree = CategoryTree()
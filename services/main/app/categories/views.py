@@ -1,10 +1,14 @@
 import typing
 
-from fastapi import HTTPException, status
+from fastapi import HTTPException, status, Request
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.categories.schemas import CreateCategory, UpdateCategory
+from app.categories.tree import category_tree
 from app.crud import super_category_crud, sub_category_crud
+from app.models import SuperCategory
 
 
 async def create_category(db: AsyncSession, schema: CreateCategory) -> dict[str, typing.Union[str, int]]:
@@ -26,25 +30,27 @@ async def create_category(db: AsyncSession, schema: CreateCategory) -> dict[str,
     else:
         del schema.super_category_id
         category = await super_category_crud.create(db, **schema.dict())
+    category_tree.invalidate()
     return category.__dict__
 
 
-async def get_categories(db: AsyncSession):
+async def get_categories(db: AsyncSession, request: Request) -> Response:
     """
-        Get all categories
+        Get all categories (from category tree snapshot)
         :param db: DB
         :type db: AsyncSession
-        :return: Categories
+        :param request: Request
+        :type request: Request
+        :return: Categories or not modified
+        :rtype: Response
     """
 
-    return (
-        {
-            **category.__dict__,
-            'sub_categories': (
-                sub_category.__dict__ for sub_category in category.sub_categories
-            ),
-        } for category in await super_category_crud.all(db, limit=1000)
-    )
+    snapshot = await category_tree.get(db)
+    headers = {'etag': snapshot.etag, 'cache-control': 'no-cache'}
+    tags = {tag.strip().removeprefix('W/') for tag in request.headers.get('if-none-match', '').split(',')}
+    if snapshot.etag in tags or '*' in tags:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(snapshot.body, media_type='application/json', headers=headers)
 
 
 async def get_super_category(db: AsyncSession, pk: int) -> dict[str, typing.Any]:
@@ -62,7 +68,7 @@ async def get_super_category(db: AsyncSession, pk: int) -> dict[str, typing.Any]
     if not await super_category_crud.exist(db, id=pk):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Super category not found')
 
-    category = await super_category_crud.get(db, id=pk)
+    category = await super_category_crud.get(db, id=pk, options=(selectinload(SuperCategory.sub_categories),))
     return {
         **category.__dict__,
         'sub_categories': (
@@ -88,7 +94,10 @@ async def update_super_category(db: AsyncSession, schema: UpdateCategory, pk: in
     if not await super_category_crud.exist(db, id=pk):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Super category not found')
 
-    category = await super_category_crud.update(db, {'id': pk}, **schema.dict())
+    category = await super_category_crud.update(
+        db, {'id': pk}, options=(selectinload(SuperCategory.sub_categories),), **schema.dict(),
+    )
+    category_tree.invalidate()
     return {
         **category.__dict__,
         'sub_categories': (
@@ -113,6 +122,7 @@ async def delete_super_category(db: AsyncSession, pk: int) -> dict[str, str]:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Super category not found')
 
     await super_category_crud.remove(db, id=pk)
+    category_tree.invalidate()
     return {'msg': 'Super category has been deleted'}
 
 
@@ -153,6 +163,7 @@ async def update_sub_category(db: AsyncSession, schema: UpdateCategory, pk: int)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Sub category not found')
 
     category = await sub_category_crud.update(db, {'id': pk}, **schema.dict())
+    category_tree.invalidate()
     return category.__dict__
 
 
@@ -172,4 +183,5 @@ async def delete_sub_category(db: AsyncSession, pk: int) -> dict[str, str]:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Sub category not found')
 
     await sub_category_crud.remove(db, id=pk)
+    category_tree.invalidate()
     return {'msg': 'Sub category has been deleted'}
@@ -1,9 +1,12 @@
+import datetime
+
 import sqlalchemy
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.categories.schemas import CreateCategory, UpdateCategory
-from app.jobs.schemas import CreateJob, UpdateJob
-from app.models import SuperCategory, SubCategory, Job, Attachment
+from app.jobs.schemas import CreateJob, UpdateJob, GetJob
+from app.models import SuperCategory, SubCategory, Job, Attachment, Blob
 from crud import CRUD
 
 
@@ -20,10 +23,28 @@ class SubCategoryCRUD(CRUD[SubCategory, CreateCategory, UpdateCategory]):
 class JobCRUD(CRUD[Job, CreateJob, UpdateJob]):
     """ Job CRUD """
 
-    @staticmethod
-    async def all_for_category(db: AsyncSession, category_id: int, skip: int = 0, limit: int = 100) -> list[Job]:
+    # Job lists render only these columns
+    columns = tuple(getattr(Job, field) for field in GetJob.__fields__)
+
+    async def all_rows(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> list[sqlalchemy.engine.Row]:
+        """
+            All jobs (read-only rows)
+            :param db: DB
+            :type db: AsyncSession
+            :param skip: Skip
+            :type skip: int
+            :param limit: Limit
+            :type limit: int
+            :return: Jobs
+            :rtype: list
         """
-            All for category
+        return await self.rows(db, self.columns, skip=skip, limit=limit)
+
+    async def all_for_category(
+            self, db: AsyncSession, category_id: int, skip: int = 0, limit: int = 100,
+    ) -> list[sqlalchemy.engine.Row]:
+        """
+            All for category (read-only rows)
             :param db: DB
             :type db: AsyncSession
             :param category_id: ID category
@@ -35,17 +56,13 @@ class JobCRUD(CRUD[Job, CreateJob, UpdateJob]):
             :return: Jobs
             :rtype: list
         """
-        query = await db.execute(
-            sqlalchemy.select(Job).filter_by(category_id=category_id).order_by(Job.id.desc()).offset(skip).limit(limit)
-        )
-        return query.scalars().all()
+        return await self.rows(db, self.columns, skip=skip, limit=limit, category_id=category_id)
 
-    @staticmethod
     async def all_for_category_without_completed(
-            db: AsyncSession, category_id: int, skip: int = 0, limit: int = 100
-    ) -> list[Job]:
+            self, db: AsyncSession, category_id: int, skip: int = 0, limit: int = 100
+    ) -> list[sqlalchemy.engine.Row]:
         """
-            All for category without completed
+            All for category without completed (read-only rows)
             :param db: DB
             :type db: AsyncSession
             :param category_id: ID category
@@ -57,17 +74,15 @@ class JobCRUD(CRUD[Job, CreateJob, UpdateJob]):
             :return: Jobs
             :rtype: list
         """
-        query = await db.execute(
-            sqlalchemy.select(Job).filter_by(
-                category_id=category_id, completed=False, executor_id=None
-            ).order_by(Job.id.desc()).offset(skip).limit(limit)
+        return await self.rows(
+            db, self.columns, skip=skip, limit=limit, category_id=category_id, completed=False, executor_id=None,
         )
-        return query.scalars().all()
 
-    @staticmethod
-    async def search(db: AsyncSession, search: str, skip: int = 0, limit: int = 100) -> list[Job]:
+    async def search(
+            self, db: AsyncSession, search: str, skip: int = 0, limit: int = 100,
+    ) -> list[sqlalchemy.engine.Row]:
         """
-            Search
+            Search (read-only rows)
             :param db: DB
             :type db: AsyncSession
             :param search: Search
@@ -79,19 +94,18 @@ class JobCRUD(CRUD[Job, CreateJob, UpdateJob]):
             :return: Jobs
             :rtype: list
         """
-        query = await db.execute(
-            sqlalchemy.select(Job).filter(
-                sqlalchemy.and_(
-                    sqlalchemy.or_(
-                        Job.title.ilike(f'%{search}%'),
-                        Job.description.ilike(f'%{search}%'),
-                    ),
-                    Job.completed == False,
-                    Job.executor_id == None
-                )
-            ).order_by(Job.id.desc()).offset(skip).limit(limit)
+        return await self.rows(
+            db,
+            self.columns,
+            sqlalchemy.or_(
+                Job.title.ilike(f'%{search}%'),
+                Job.description.ilike(f'%{search}%'),
+            ),
+            Job.completed == False,
+            Job.executor_id == None,
+            skip=skip,
+            limit=limit,
         )
-        return query.scalars().all()
 
     @staticmethod
     async def search_exist(db: AsyncSession, search: str, skip: int = 0, limit: int = 100) -> bool:
@@ -124,9 +138,11 @@ class JobCRUD(CRUD[Job, CreateJob, UpdateJob]):
         )
         return query.scalar()
 
-    async def get_all_active_jobs(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> list[Job]:
+    async def get_all_active_jobs(
+            self, db: AsyncSession, skip: int = 0, limit: int = 100,
+    ) -> list[sqlalchemy.engine.Row]:
         """
-            Get all active jobs
+            Get all active jobs (read-only rows)
             :param db: DB
             :type db: AsyncSession
             :param skip: Skip
@@ -136,7 +152,7 @@ class JobCRUD(CRUD[Job, CreateJob, UpdateJob]):
             :return: Jobs
             :rtype: list
         """
-        return await super().filter(db, skip, limit, completed=False, executor_id=None)
+        return await self.rows(db, self.columns, skip=skip, limit=limit, completed=False, executor_id=None)
 
     async def exist_page_active_jobs(self, db: AsyncSession, skip: int = 0, limit: int = 100, **kwargs) -> bool:
         """
@@ -152,9 +168,11 @@ class JobCRUD(CRUD[Job, CreateJob, UpdateJob]):
         """
         return await super().exist_page(db, skip, limit, completed=False, executor_id=None, **kwargs)
 
-    async def filter_jobs_for_freelancer(self, db: AsyncSession, pk: int, skip: int = 0, limit: int = 100) -> list[Job]:
+    async def filter_jobs_for_freelancer(
+            self, db: AsyncSession, pk: int, skip: int = 0, limit: int = 100,
+    ) -> list[sqlalchemy.engine.Row]:
         """
-            Filter jobs for freelancer
+            Filter jobs for freelancer (read-only rows)
             :param db: DB
             :type db: AsyncSession
             :param pk: Freelancer ID
@@ -166,7 +184,7 @@ class JobCRUD(CRUD[Job, CreateJob, UpdateJob]):
             :return: Jobs
             :rtype: list
         """
-        return await super().filter(db, skip, limit, executor_id=pk)
+        return await self.rows(db, self.columns, skip=skip, limit=limit, executor_id=pk)
 
     async def exist_page_for_freelancer_jobs(self, db: AsyncSession, pk: int, skip: int = 0, limit: int = 100) -> bool:
         """
@@ -184,9 +202,11 @@ class JobCRUD(CRUD[Job, CreateJob, UpdateJob]):
         """
         return await super().exist_page(db, skip, limit, executor_id=pk)
 
-    async def filter_jobs_for_customer(self, db: AsyncSession, pk: int, skip: int = 0, limit: int = 100) -> list[Job]:
+    async def filter_jobs_for_customer(
+            self, db: AsyncSession, pk: int, skip: int = 0, limit: int = 100,
+    ) -> list[sqlalchemy.engine.Row]:
         """
-            Filter jobs for customer
+            Filter jobs for customer (read-only rows)
             :param db: DB
             :type db: AsyncSession
             :param pk: Customer ID
@@ -198,7 +218,7 @@ class JobCRUD(CRUD[Job, CreateJob, UpdateJob]):
             :return: Jobs
             :rtype: list
         """
-        return await super().filter(db, skip, limit, customer_id=pk)
+        return await self.rows(db, self.columns, skip=skip, limit=limit, customer_id=pk)
 
     async def exist_page_for_customer_jobs(self, db: AsyncSession, pk: int, skip: int = 0, limit: int = 100) -> bool:
         """
@@ -240,7 +260,59 @@ class AttachmentCRUD(CRUD[Attachment, Attachment, Attachment]):
     pass
 
 
+class BlobCRUD(CRUD[Blob, Blob, Blob]):
+    """ Blob CRUD """
+
+    @staticmethod
+    async def acquire(db: AsyncSession, hash: str, path: str, size: int) -> str:
+        """
+            Acquire blob (create it or mark it as used), without commit
+            :param db: DB
+            :type db: AsyncSession
+            :param hash: Content hash
+            :type hash: str
+            :param path: Path for a new blob
+            :type path: str
+            :param size: Size
+            :type size: int
+            :return: Blob path
+            :rtype: str
+        """
+        now = datetime.datetime.utcnow()
+        query = await db.execute(
+            insert(Blob).values(hash=hash, path=path, size=size, used_at=now).on_conflict_do_update(
+                index_elements=[Blob.hash], set_={'used_at': now},
+            ).returning(Blob.path)
+        )
+        return query.scalar()
+
+    @staticmethod
+    async def collect(db: AsyncSession, before: datetime.datetime, limit: int = 500) -> list[str]:
+        """
+            Delete unreferenced blobs unused since before, without commit
+            :param db: DB
+            :type db: AsyncSession
+            :param before: Unused since
+            :type before: datetime.datetime
+            :param limit: Limit
+            :type limit: int
+            :return: Paths of deleted blobs
+            :rtype: list
+        """
+        unreferenced = sqlalchemy.select(Blob.hash).filter(
+            Blob.used_at < before,
+            ~sqlalchemy.exists().where(Attachment.hash == Blob.hash),
+        ).limit(limit).with_for_update(skip_locked=True)
+        query = await db.execute(
+            sqlalchemy.delete(Blob).filter(
+                Blob.hash.in_(unreferenced), Blob.used_at < before,
+            ).returning(Blob.path).execution_options(synchronize_session=False)
+        )
+        return query.scalars().all()
+
+
 super_category_crud = SuperCategoryCRUD(SuperCategory)
 sub_category_crud = SubCategoryCRUD(SubCategory)
 job_crud = JobCRUD(Job)
 attachment_crud = AttachmentCRUD(Attachment)
+blob_crud = BlobCRUD(Blob)
@@ -1,6 +1,6 @@
 import typing
 
-from fastapi import APIRouter, status, Depends, Query, UploadFile, File
+from fastapi import APIRouter, status, Depends, Query, UploadFile, File, Request
 from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -294,8 +294,8 @@ async def add_attachments(
     response_class=FileResponse,
     tags=['attachments'],
 )
-async def get_attachments(directory: str, file_name: str):
-    return await views.get_attachments(directory, file_name)
+async def get_attachments(request: Request, directory: str, file_name: str):
+    return await views.get_attachments(request, directory, file_name)
 
 
 @jobs_router.delete(
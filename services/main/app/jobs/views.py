@@ -1,20 +1,25 @@
 import datetime
-import os
 import random
 import typing
 
-from fastapi import HTTPException, status, UploadFile
-from fastapi.responses import FileResponse
+from fastapi import HTTPException, status, UploadFile, Request
+from fastapi.responses import Response
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app import requests
-from app.crud import sub_category_crud, job_crud, attachment_crud
+from app.blobs import store_blobs
+from app.categories.tree import category_tree
+from app.crud import job_crud, attachment_crud
 from app.jobs.schemas import CreateJob, UpdateJob, UpdateJobAdmin
 from app.models import Job
 from app.requests import update_level
 from app.send_email import send_select_email
-from app.service import paginate, user_exist, write_file, remove_file
-from config import SERVER_MAIN_BACKEND, API, MEDIA_ROOT
+from app.serializers import json_response, job_serializer, attachment_serializer
+from app.service import paginate, user_exist, validate_upload_size
+from app.storage import storage
+from config import SERVER_MAIN_BACKEND, API
 
 
 async def create_job(db: AsyncSession, schema: CreateJob, customer_id: int) -> dict[str, typing.Any]:
@@ -31,7 +36,7 @@ async def create_job(db: AsyncSession, schema: CreateJob, customer_id: int) -> d
         :raise HTTPException 400: Category not found
     """
 
-    if not await sub_category_crud.exist(db, id=schema.category_id):
+    if not await category_tree.sub_category_exist(db, schema.category_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Category not found')
 
     job = await job_crud.create(
@@ -42,6 +47,7 @@ async def create_job(db: AsyncSession, schema: CreateJob, customer_id: int) -> d
     return job.__dict__
 
 
+@json_response
 @user_exist('pk', freelancer=True)
 @paginate(
     job_crud.filter_jobs_for_freelancer,
@@ -49,7 +55,7 @@ async def create_job(db: AsyncSession, schema: CreateJob, customer_id: int) -> d
     f'{SERVER_MAIN_BACKEND}{API}/jobs/freelancer',
     'pk'
 )
-async def get_jobs_for_freelancer(*, db: AsyncSession, page: int, page_size: int, pk: int, queryset: list[Job]):
+async def get_jobs_for_freelancer(*, db: AsyncSession, page: int, page_size: int, pk: int, queryset: list[Row]):
     """
         Get jobs for freelancer
         :param db: DB
@@ -64,9 +70,10 @@ async def get_jobs_for_freelancer(*, db: AsyncSession, page: int, page_size: int
         :type queryset: list
         :return: Jobs
     """
-    return (job.__dict__ for job in queryset)
+    return job_serializer.rows(queryset)
 
 
+@json_response
 @user_exist('pk', customer=True)
 @paginate(
     job_crud.filter_jobs_for_customer,
@@ -74,7 +81,7 @@ async def get_jobs_for_freelancer(*, db: AsyncSession, page: int, page_size: int
     f'{SERVER_MAIN_BACKEND}{API}/jobs/customer',
     'pk',
 )
-async def get_jobs_for_customer(*, db: AsyncSession, page: int, page_size: int, pk: int, queryset: list[Job]):
+async def get_jobs_for_customer(*, db: AsyncSession, page: int, page_size: int, pk: int, queryset: list[Row]):
     """
         Get jobs for customer
         :param db: DB
@@ -89,11 +96,12 @@ async def get_jobs_for_customer(*, db: AsyncSession, page: int, page_size: int,
         :type queryset: list
         :return: Jobs
     """
-    return (job.__dict__ for job in queryset)
+    return job_serializer.rows(queryset)
 
 
-@paginate(job_crud.all, job_crud.exist_page, f'{SERVER_MAIN_BACKEND}{API}/jobs/all')
-async def get_all_jobs(*, db: AsyncSession, page: int, page_size: int, queryset: list[Job]):
+@json_response
+@paginate(job_crud.all_rows, job_crud.exist_page, f'{SERVER_MAIN_BACKEND}{API}/jobs/all')
+async def get_all_jobs(*, db: AsyncSession, page: int, page_size: int, queryset: list[Row]):
     """
         Get all jobs
         :param db: DB
@@ -106,9 +114,10 @@ async def get_all_jobs(*, db: AsyncSession, page: int, page_size: int, queryset:
         :type queryset: list
         :return: Jobs
     """
-    return (job.__dict__ for job in queryset)
+    return job_serializer.rows(queryset)
 
 
+@json_response
 @paginate(
     job_crud.all_for_category,
     job_crud.exist_page,
@@ -116,7 +125,7 @@ async def get_all_jobs(*, db: AsyncSession, page: int, page_size: int, queryset:
     'category_id',
 )
 async def get_all_jobs_for_category(
-    *, db: AsyncSession, queryset: list[Job], page: int, page_size: int, category_id: int,
+    *, db: AsyncSession, queryset: list[Row], page: int, page_size: int, category_id: int,
 ):
     """
         Get all for category
@@ -132,11 +141,12 @@ async def get_all_jobs_for_category(
         :type category_id: int
         :return: Jobs
     """
-    return (job.__dict__ for job in queryset)
+    return job_serializer.rows(queryset)
 
 
+@json_response
 @paginate(job_crud.get_all_active_jobs, job_crud.exist_page_active_jobs, f'{SERVER_MAIN_BACKEND}{API}/jobs/')
-async def get_all_jobs_without_completed(*, db: AsyncSession, page: int, page_size: int, queryset: list[Job]):
+async def get_all_jobs_without_completed(*, db: AsyncSession, page: int, page_size: int, queryset: list[Row]):
     """
         Get all jobs without completed
         :param db: DB
@@ -149,16 +159,17 @@ async def get_all_jobs_without_completed(*, db: AsyncSession, page: int, page_si
         :type queryset: list
         :return: Jobs
     """
-    return (job.__dict__ for job in queryset)
+    return job_serializer.rows(queryset)
 
 
+@json_response
 @paginate(
     job_crud.all_for_category_without_completed,
     job_crud.exist_page_active_jobs,
     f'{SERVER_MAIN_BACKEND}{API}/jobs/category', 'category_id'
 )
 async def get_all_jobs_without_completed_for_category(
-    *, db: AsyncSession, queryset: list[Job], page: int, page_size: int, category_id: int,
+    *, db: AsyncSession, queryset: list[Row], page: int, page_size: int, category_id: int,
 ):
     """
         Get all for category without completed
@@ -174,11 +185,12 @@ async def get_all_jobs_without_completed_for_category(
         :type category_id: int
         :return: Jobs
     """
-    return (job.__dict__ for job in queryset)
+    return job_serializer.rows(queryset)
 
 
+@json_response
 @paginate(job_crud.search, job_crud.search_exist, f'{SERVER_MAIN_BACKEND}{API}/jobs/search', 'search')
-async def search_jobs(*, db: AsyncSession, page: int, page_size: int, search: str, queryset: list[Job]):
+async def search_jobs(*, db: AsyncSession, page: int, page_size: int, search: str, queryset: list[Row]):
     """
         Search jobs
         :param db: DB
@@ -193,9 +205,10 @@ async def search_jobs(*, db: AsyncSession, page: int, page_size: int, search: st
         :type queryset: list
         :return: Jobs
     """
-    return (job.__dict__ for job in queryset)
+    return job_serializer.rows(queryset)
 
 
+@json_response
 async def get_job(db: AsyncSession, pk: int) -> dict[str, typing.Any]:
     """
         Get job
@@ -211,11 +224,8 @@ async def get_job(db: AsyncSession, pk: int) -> dict[str, typing.Any]:
     if not await job_crud.exist(db, id=pk):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Job not found')
 
-    job = await job_crud.get(db, id=pk)
-    return {
-        **job.__dict__,
-        'attachments': (attachment.__dict__ for attachment in job.attachments),
-    }
+    job = await job_crud.get(db, id=pk, options=(selectinload(Job.attachments),))
+    return {**job_serializer.row(job), 'attachments': attachment_serializer.rows(job.attachments)}
 
 
 async def select_executor(db: AsyncSession, pk: int, user_id: int, owner_id: int) -> dict:
@@ -295,8 +305,9 @@ async def complete_job(db: AsyncSession, pk: int, user_id: int) -> dict[str, str
     if not job.executor_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Job has not executor')
 
+    # Level change is idempotent per job, so a failed completion can be retried
+    await update_level(job.executor_id, random.randint(30, 51), f'job-{job.id}')
     await job_crud.update(db, {'id': pk}, completed=True)
-    await update_level(job.executor_id, random.randint(30, 51))
     return {'msg': 'Job has been completed'}
 
 
@@ -323,7 +334,7 @@ async def update_job_admin(
     if not await job_crud.exist(db, id=pk):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Job not found')
 
-    if not await sub_category_crud.exist(db, id=schema.category_id):
+    if not await category_tree.sub_category_exist(db, schema.category_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Category not found')
 
     job = await job_crud.update(
@@ -364,7 +375,7 @@ async def update_job(db: AsyncSession, pk: int, schema: UpdateJob, user_id: int)
     if job.completed:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Job is completed')
 
-    if not await sub_category_crud.exist(db, id=schema.category_id):
+    if not await category_tree.sub_category_exist(db, schema.category_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Category not found')
 
     job = await job_crud.update(
@@ -453,6 +464,8 @@ async def add_attachments(db: AsyncSession, user_id: int, job_id: int, files: li
         :rtype: dict
         :raise HTTPException 400: Job not found
         :raise HTTPException 400: User not owner this job
+        :raise HTTPException 413: File is too large
+        :raise HTTPException 413: Upload is too large
     """
 
     if not await job_crud.exist(db, id=job_id):
@@ -462,33 +475,28 @@ async def add_attachments(db: AsyncSession, user_id: int, job_id: int, files: li
     if job.customer_id != user_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='You not owner this job')
 
-    if not os.path.exists(f'{MEDIA_ROOT}{job.id}'):
-        os.mkdir(f'{MEDIA_ROOT}{job.id}')
-
-    for file in files:
-        file_name = f'{MEDIA_ROOT}{job.id}/{datetime.datetime.utcnow().timestamp()}{os.path.splitext(file.filename)[1]}'
-
-        await write_file(file_name, file)
+    validate_upload_size(files)
 
-        await attachment_crud.create(db, path=file_name, job_id=job_id)
+    blobs = await store_blobs(db, files)
+    await attachment_crud.create_all(db, *({'path': path, 'hash': digest, 'job_id': job_id} for digest, path in blobs))
     return {'msg': 'Attachments has been added'}
 
 
-async def get_attachments(directory: str, file_name: str) -> FileResponse:
+async def get_attachments(request: Request, directory: str, file_name: str) -> Response:
     """
         Get attachments
+        :param request: Request
+        :type request: Request
         :param directory: Directory name
         :type directory: str
         :param file_name: File name
         :type file_name: str
         :return: File
-        :rtype: FileResponse
+        :rtype: Response
         :raise HTTPException 404: File not found
     """
 
-    if not os.path.exists(f'{MEDIA_ROOT}{directory}/{file_name}'):
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='File not found')
-    return FileResponse(f'{MEDIA_ROOT}{directory}/{file_name}', status_code=status.HTTP_200_OK)
+    return await storage.response(request, directory, file_name)
 
 
 async def remove_attachment(db, user_id, pk) -> dict[str, str]:
@@ -518,6 +526,7 @@ async def remove_attachment(db, user_id, pk) -> dict[str, str]:
 
     await attachment_crud.remove(db, id=pk)
 
-    remove_file(attachment.path)
+    if attachment.hash is None:
+        await storage.delete(attachment.path)
 
     return {'msg': 'Attachment has been deleted'}
@@ -35,7 +35,7 @@ class SuperCategory(Base):
     name: str = sqlalchemy.Column(sqlalchemy.String, nullable=False)
 
     sub_categories: typing.Union[relationship, list[SubCategory]] = relationship(
-        SubCategory, backref='super_category', order_by='SubCategory.name', lazy='selectin', cascade='all, delete',
+        SubCategory, backref='super_category', order_by='SubCategory.name', lazy='raise', cascade='all, delete',
     )
 
     def __str__(self):
@@ -45,6 +45,25 @@ class SuperCategory(Base):
         return f'<SuperCategory {self.name}>'
 
 
+class Blob(Base):
+    """ Content addressed file, referenced by attachments """
+
+    __tablename__ = 'blob'
+
+    hash: str = sqlalchemy.Column(sqlalchemy.String(64), primary_key=True)
+    path: str = sqlalchemy.Column(sqlalchemy.String, nullable=False)
+    size: int = sqlalchemy.Column(sqlalchemy.BigInteger, nullable=False)
+    used_at: datetime.datetime = sqlalchemy.Column(
+        sqlalchemy.DateTime, default=datetime.datetime.utcnow, nullable=False, index=True,
+    )
+
+    def __str__(self):
+        return f'<Blob {self.hash}>'
+
+    def __repr__(self):
+        return f'<Blob {self.hash}>'
+
+
 class Attachment(Base):
     """ Attachment """
 
@@ -52,6 +71,9 @@ class Attachment(Base):
 
     id: int = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
     path: str = sqlalchemy.Column(sqlalchemy.String, nullable=False)
+    hash: typing.Optional[str] = sqlalchemy.Column(
+        sqlalchemy.String(64), sqlalchemy.ForeignKey('blob.hash'), nullable=True, index=True,
+    )
 
     job_id: int = sqlalchemy.Column(
         sqlalchemy.Integer, sqlalchemy.ForeignKey('job.id', ondelete='CASCADE'), nullable=False,
@@ -85,7 +107,7 @@ class Job(Base):
     )
 
     attachments: typing.Union[relationship, list[Attachment]] = relationship(
-        Attachment, backref='jobs', lazy='selectin', cascade='all, delete',
+        Attachment, backref='jobs', lazy='raise', cascade='all, delete',
     )
 
     def __str__(self):
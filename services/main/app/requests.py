@@ -66,13 +66,15 @@ async def get_user_data_and_server_token(user_id: int) -> typing.Optional[tuple[
     return access_token, json
 
 
-async def update_level(user_id: int, level: int) -> None:
+async def update_level(user_id: int, level: int, key: typing.Optional[str] = None) -> None:
     """
         Update level
         :param user_id: User ID
         :type user_id: int
         :param level: Level
         :type level: int
+        :param key: Idempotency key, auth skips level changes with used key
+        :type key: str
         :return: None
     """
 
@@ -84,7 +86,8 @@ async def update_level(user_id: int, level: int) -> None:
         headers = {'Authorization': f'Bearer {access_token}'}
 
         response = await session.put(
-            url=f'{SERVER_AUTH_BACKEND}{API}/admin/user/level/{user_id}?level={level}',
+            url=f'{SERVER_AUTH_BACKEND}{API}/admin/user/level/{user_id}',
+            params={'level': level, 'reason': 'job', **({'key': key} if key else {})},
             headers=headers
         )
         response.raise_for_status()
@@ -0,0 +1,79 @@
+import datetime
+import operator
+import typing
+from functools import wraps
+
+from fastapi.responses import ORJSONResponse
+
+from config import SERVER_MAIN_BACKEND, API
+
+
+def utc(value: datetime.datetime) -> str:
+    """
+        UTC datetime in response format (same as schema validators)
+        :param value: Datetime
+        :type value: datetime
+        :return: ISO datetime
+        :rtype: str
+    """
+    return f'{value}Z'.replace(' ', 'T')
+
+
+class Serializer:
+    """ Response rows straight from ORM instance columns or Core rows (no __dict__ copies, no validation) """
+
+    def __init__(self, *fields: str, **formatters: typing.Callable[[typing.Any], typing.Any]):
+        self.fields = fields
+        self.formatters = tuple(formatters.items())
+        self._values = operator.attrgetter(*fields)
+
+    def row(self, instance: typing.Any) -> dict[str, typing.Any]:
+        """
+            Serialize row
+            :param instance: ORM instance or Core row
+            :return: Row
+            :rtype: dict
+        """
+        values = self._values(instance)
+        row = dict(zip(self.fields, values if len(self.fields) > 1 else (values,)))
+        for name, formatter in self.formatters:
+            if row[name] is not None:
+                row[name] = formatter(row[name])
+        return row
+
+    def rows(self, instances: typing.Iterable[typing.Any]) -> list[dict[str, typing.Any]]:
+        """
+            Serialize rows
+            :param instances: ORM instances or Core rows
+            :return: Rows
+            :rtype: list
+        """
+        return [self.row(instance) for instance in instances]
+
+
+def json_response(function):
+    """
+        Return view result as orjson response, response model validation is skipped for it
+        :param function: View
+        :return: Wrapper
+    """
+
+    @wraps(function)
+    async def wrapper(*args, **kwargs) -> ORJSONResponse:
+        """
+            Wrapper
+            :param args: args
+            :param kwargs: kwargs
+            :return: Response
+            :rtype: ORJSONResponse
+        """
+        return ORJSONResponse(await function(*args, **kwargs))
+
+    return wrapper
+
+
+job_serializer = Serializer(
+    'id', 'title', 'description', 'price', 'order_date', 'category_id', 'customer_id', 'executor_id', 'completed',
+    order_date=utc,
+)
+attachment_serializer = Serializer('id', 'path', path=lambda path: f'{SERVER_MAIN_BACKEND}{API}/jobs/{path}')
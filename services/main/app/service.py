@@ -7,21 +7,91 @@ from fastapi import HTTPException, status, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import requests
+from config import UPLOAD_CHUNK_SIZE, MAX_FILE_SIZE, MAX_UPLOAD_SIZE
 
 
-async def write_file(file_name: str, file: UploadFile) -> None:
+def file_size(file: UploadFile) -> int:
     """
-        Write file
+        File size without reading it into memory
+        :param file: File
+        :type file: UploadFile
+        :return: Size in bytes
+        :rtype: int
+    """
+
+    position = file.file.tell()
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(position)
+    return size
+
+
+def validate_upload_size(
+        files: list[UploadFile],
+        max_file_size: typing.Optional[int] = None,
+        max_upload_size: typing.Optional[int] = None,
+) -> None:
+    """
+        Validate upload size before anything is written
+        :param files: Files
+        :type files: list
+        :param max_file_size: Max file size
+        :type max_file_size: int
+        :param max_upload_size: Max upload size
+        :type max_upload_size: int
+        :return: None
+        :raise HTTPException 413: File is too large
+        :raise HTTPException 413: Upload is too large
+    """
+
+    max_file_size = max_file_size or MAX_FILE_SIZE
+    max_upload_size = max_upload_size or MAX_UPLOAD_SIZE
+
+    total = 0
+    for file in files:
+        size = file_size(file)
+        if size > max_file_size:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail='File is too large')
+        total += size
+
+    if total > max_upload_size:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail='Upload is too large')
+
+
+async def write_file(
+        file_name: str, file: UploadFile, max_size: typing.Optional[int] = None, hasher: typing.Any = None,
+) -> int:
+    """
+        Write file in chunks
         :param file_name: File name
         :type file_name: str
         :param file: File
         :type file: UploadFile
-        :return: None
+        :param max_size: Max file size
+        :type max_size: int
+        :param hasher: Hash object updated with every chunk
+        :return: Written bytes
+        :rtype: int
+        :raise HTTPException 413: File is too large
     """
 
+    max_size = max_size or MAX_FILE_SIZE
+    written = 0
+
+    await file.seek(0)
     async with aiofiles.open(file_name, 'wb') as buffer:
-        data = await file.read()
-        await buffer.write(data)
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            written += len(chunk)
+            if written > max_size:
+                break
+            if hasher is not None:
+                hasher.update(chunk)
+            await buffer.write(chunk)
+
+    if written > max_size:
+        remove_file(file_name)
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail='File is too large')
+    return written
 
 
 def remove_file(file_name: str) -> None:
@@ -36,6 +106,18 @@ def remove_file(file_name: str) -> None:
         os.remove(file_name)
 
 
+def remove_files(*file_names: str) -> None:
+    """
+        Remove files
+        :param file_names: File names
+        :type file_names: str
+        :return: None
+    """
+
+    for file_name in file_names:
+        remove_file(file_name)
+
+
 def paginate(get_function, exist_function, url: str, *filter_params):
     """
         Paginate
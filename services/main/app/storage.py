@@ -0,0 +1,624 @@
+import datetime
+import hashlib
+import hmac
+import mimetypes
+import os
+import re
+import typing
+import xml.etree.ElementTree as ElementTree
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import quote, unquote, urlsplit
+
+import aiofiles
+import aiohttp
+from fastapi import HTTPException, status, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse, RedirectResponse
+
+from config import (
+    UPLOAD_CHUNK_SIZE,
+    MEDIA_ROOT,
+    MEDIA_CACHE_MAX_AGE,
+    MEDIA_ACCEL_REDIRECT,
+    STORAGE_BACKEND,
+    S3_ENDPOINT,
+    S3_PUBLIC_ENDPOINT,
+    S3_BUCKET,
+    S3_ACCESS_KEY,
+    S3_SECRET_KEY,
+    S3_REGION,
+    S3_PRESIGN_EXPIRES,
+    S3_PART_SIZE,
+)
+
+LOCAL = 'local'
+S3 = 's3'
+
+UNSIGNED_PAYLOAD = 'UNSIGNED-PAYLOAD'
+
+
+def _encode(value: str) -> str:
+    """
+        URI encode (SigV4 rules)
+        :param value: Value
+        :type value: str
+        :return: Encoded value
+        :rtype: str
+    """
+    return quote(value, safe='-_.~')
+
+
+def canonical_query(query: str) -> str:
+    """
+        Canonical query string
+        :param query: Query string
+        :type query: str
+        :return: Sorted and encoded query
+        :rtype: str
+    """
+
+    params = []
+    for param in filter(None, query.split('&')):
+        key, _, value = param.partition('=')
+        params.append((_encode(unquote(key)), _encode(unquote(value))))
+    return '&'.join(f'{key}={value}' for key, value in sorted(params))
+
+
+def signature(
+        method: str,
+        url: str,
+        headers: dict[str, str],
+        secret_key: str,
+        region: str,
+        amz_date: str,
+        payload_hash: str = UNSIGNED_PAYLOAD,
+) -> str:
+    """
+        AWS Signature Version 4
+        :param method: HTTP method
+        :type method: str
+        :param url: URL with query
+        :type url: str
+        :param headers: Signed headers (lower case)
+        :type headers: dict
+        :param secret_key: Secret key
+        :type secret_key: str
+        :param region: Region
+        :type region: str
+        :param amz_date: Date (YYYYMMDDTHHMMSSZ)
+        :type amz_date: str
+        :param payload_hash: Payload SHA256
+        :type payload_hash: str
+        :return: Signature
+        :rtype: str
+    """
+
+    parts = urlsplit(url)
+    canonical_request = '\n'.join([
+        method,
+        quote(parts.path or '/', safe='/-_.~'),
+        canonical_query(parts.query),
+        ''.join(f'{name}:{headers[name].strip()}\n' for name in sorted(headers)),
+        ';'.join(sorted(headers)),
+        payload_hash,
+    ])
+    scope = f'{amz_date[:8]}/{region}/s3/aws4_request'
+    string_to_sign = '\n'.join([
+        'AWS4-HMAC-SHA256', amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest(),
+    ])
+
+    key = f'AWS4{secret_key}'.encode()
+    for part in (amz_date[:8], region, 's3', 'aws4_request'):
+        key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+    return hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+
+def presign(
+        url: str,
+        access_key: str,
+        secret_key: str,
+        region: str,
+        expires: int,
+        now: typing.Optional[datetime.datetime] = None,
+        method: str = 'GET',
+) -> str:
+    """
+        Presigned URL
+        :param url: URL
+        :type url: str
+        :param access_key: Access key
+        :type access_key: str
+        :param secret_key: Secret key
+        :type secret_key: str
+        :param region: Region
+        :type region: str
+        :param expires: Expires in seconds
+        :type expires: int
+        :param now: Signing time
+        :type now: datetime.datetime
+        :param method: HTTP method
+        :type method: str
+        :return: Presigned URL
+        :rtype: str
+    """
+
+    amz_date = (now or datetime.datetime.utcnow()).strftime('%Y%m%dT%H%M%SZ')
+    query = '&'.join(f'{key}={_encode(value)}' for key, value in (
+        ('X-Amz-Algorithm', 'AWS4-HMAC-SHA256'),
+        ('X-Amz-Credential', f'{access_key}/{amz_date[:8]}/{region}/s3/aws4_request'),
+        ('X-Amz-Date', amz_date),
+        ('X-Amz-Expires', str(expires)),
+        ('X-Amz-SignedHeaders', 'host'),
+    ))
+    url = f'{url}?{query}'
+    signed = signature(method, url, {'host': urlsplit(url).netloc}, secret_key, region, amz_date)
+    return f'{url}&X-Amz-Signature={signed}'
+
+
+def content_hash(file_name: str) -> typing.Optional[str]:
+    """
+        Content hash of content-addressed file (blob)
+        :param file_name: File name
+        :type file_name: str
+        :return: SHA-256 or None for other files
+        :rtype: str
+    """
+
+    root = os.path.splitext(file_name)[0]
+    return root if re.fullmatch('[0-9a-f]{64}', root) else None
+
+
+def media_headers(stat: os.stat_result, digest: typing.Optional[str] = None) -> dict[str, str]:
+    """
+        Media headers
+        :param stat: File stat
+        :type stat: os.stat_result
+        :param digest: Content hash, same content gets same ETag
+        :type digest: str
+        :return: Headers
+        :rtype: dict
+    """
+
+    return {
+        'etag': f'"{digest}"' if digest else f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+        'last-modified': formatdate(stat.st_mtime, usegmt=True),
+        'cache-control': f'public, max-age={MEDIA_CACHE_MAX_AGE}',
+        'accept-ranges': 'bytes',
+    }
+
+
+def not_modified(request: Request, headers: dict[str, str], stat: os.stat_result) -> bool:
+    """
+        Conditional request is not modified?
+        :param request: Request
+        :type request: Request
+        :param headers: Media headers
+        :type headers: dict
+        :param stat: File stat
+        :type stat: os.stat_result
+        :return: Not modified?
+        :rtype: bool
+    """
+
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        tags = {tag.strip() for tag in if_none_match.split(',')}
+        return '*' in tags or headers['etag'] in tags
+
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(stat.st_mtime) <= since
+    return False
+
+
+def byte_range(request: Request, headers: dict[str, str], size: int) -> typing.Optional[tuple[int, int]]:
+    """
+        Requested byte range
+        :param request: Request
+        :type request: Request
+        :param headers: Media headers
+        :type headers: dict
+        :param size: File size
+        :type size: int
+        :return: First and last byte or None for the whole file
+        :rtype: tuple
+        :raise HTTPException 416: Range not satisfiable
+    """
+
+    range_header = request.headers.get('range', '')
+    if not range_header.startswith('bytes=') or ',' in range_header:
+        return None
+
+    if_range = request.headers.get('if-range')
+    if if_range and if_range not in (headers['etag'], headers['last-modified']):
+        return None
+
+    start, _, end = range_header[len('bytes='):].strip().partition('-')
+    try:
+        if start:
+            first, last = int(start), int(end) if end else size - 1
+        else:
+            first, last = size - int(end), size - 1
+    except ValueError:
+        return None
+
+    first, last = max(first, 0), min(last, size - 1)
+    if first > last or first >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail='Range not satisfiable',
+            headers={'content-range': f'bytes */{size}'},
+        )
+    return first, last
+
+
+async def read_range(path: str, first: int, last: int) -> typing.AsyncIterator[bytes]:
+    """
+        Read byte range in chunks
+        :param path: Path
+        :type path: str
+        :param first: First byte
+        :type first: int
+        :param last: Last byte
+        :type last: int
+        :return: Chunks
+    """
+
+    remaining = last - first + 1
+    async with aiofiles.open(path, 'rb') as file:
+        await file.seek(first)
+        while remaining > 0:
+            chunk = await file.read(min(UPLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def media_response(request: Request, directory: str, file_name: str) -> Response:
+    """
+        Media response with caching headers, conditional requests and byte ranges
+        :param request: Request
+        :type request: Request
+        :param directory: Directory name
+        :type directory: str
+        :param file_name: File name
+        :type file_name: str
+        :return: File
+        :rtype: Response
+        :raise HTTPException 404: File not found
+    """
+
+    if directory.startswith('.') or file_name.startswith('.'):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='File not found')
+
+    media_type = mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+
+    if MEDIA_ACCEL_REDIRECT:
+        return Response(
+            headers={'x-accel-redirect': f'{MEDIA_ACCEL_REDIRECT}{directory}/{file_name}'}, media_type=media_type,
+        )
+
+    path = f'{MEDIA_ROOT}{directory}/{file_name}'
+    try:
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='File not found')
+
+    headers = media_headers(stat, content_hash(file_name))
+
+    if not_modified(request, headers, stat):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    requested = byte_range(request, headers, stat.st_size)
+    if requested is None:
+        return FileResponse(
+            path, status_code=status.HTTP_200_OK, headers=headers, media_type=media_type, stat_result=stat,
+        )
+
+    first, last = requested
+    return StreamingResponse(
+        read_range(path, first, last),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        headers={
+            **headers,
+            'content-range': f'bytes {first}-{last}/{stat.st_size}',
+            'content-length': str(last - first + 1),
+        },
+        media_type=media_type,
+    )
+
+
+class LocalStorage:
+    """ Files on the local disk under MEDIA_ROOT """
+
+    @staticmethod
+    async def put_file(name: str, path: str) -> None:
+        """
+            Put local file
+            :param name: Storage name
+            :type name: str
+            :param path: Local file, moved into storage
+            :type path: str
+            :return: None
+        """
+
+        if path != name:
+            os.makedirs(os.path.dirname(name), exist_ok=True)
+            os.replace(path, name)
+
+    @staticmethod
+    async def delete(name: str) -> None:
+        """
+            Delete
+            :param name: Storage name
+            :type name: str
+            :return: None
+        """
+
+        if os.path.exists(name):
+            os.remove(name)
+
+    @staticmethod
+    async def exists(name: str) -> bool:
+        """
+            Exists?
+            :param name: Storage name
+            :type name: str
+            :return: Exists?
+            :rtype: bool
+        """
+
+        return os.path.exists(name)
+
+    @staticmethod
+    async def response(request: Request, directory: str, file_name: str) -> Response:
+        """
+            Download response
+            :param request: Request
+            :type request: Request
+            :param directory: Directory name
+            :type directory: str
+            :param file_name: File name
+            :type file_name: str
+            :return: File
+            :rtype: Response
+        """
+
+        return media_response(request, directory, file_name)
+
+
+class S3Storage:
+    """ S3 compatible object storage (AWS, MinIO) """
+
+    def __init__(
+            self,
+            endpoint: str,
+            bucket: str,
+            access_key: str,
+            secret_key: str,
+            region: str = 'us-east-1',
+            public_endpoint: typing.Optional[str] = None,
+            expires: int = 60 * 60,
+            part_size: int = 8 * 1024 * 1024,
+    ) -> None:
+        self.endpoint = endpoint.rstrip('/')
+        self.public_endpoint = (public_endpoint or endpoint).rstrip('/')
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.expires = expires
+        self.part_size = part_size
+
+    def _url(self, name: str, endpoint: typing.Optional[str] = None) -> str:
+        """
+            Object URL
+            :param name: Object name
+            :type name: str
+            :param endpoint: Endpoint (app endpoint by default)
+            :type endpoint: str
+            :return: URL
+            :rtype: str
+        """
+        return f'{endpoint or self.endpoint}/{self.bucket}/{quote(name, safe="/-_.~")}'
+
+    def _headers(self, method: str, url: str) -> dict[str, str]:
+        """
+            Signed request headers (SigV4, unsigned payload)
+            :param method: HTTP method
+            :type method: str
+            :param url: URL
+            :type url: str
+            :return: Headers
+            :rtype: dict
+        """
+        amz_date = datetime.datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+        headers = {
+            'host': urlsplit(url).netloc,
+            'x-amz-content-sha256': UNSIGNED_PAYLOAD,
+            'x-amz-date': amz_date,
+        }
+        signed = signature(method, url, headers, self.secret_key, self.region, amz_date)
+        headers['authorization'] = (
+            f'AWS4-HMAC-SHA256 Credential={self.access_key}/{amz_date[:8]}/{self.region}/s3/aws4_request, '
+            f'SignedHeaders={";".join(sorted(headers))}, Signature={signed}'
+        )
+        return headers
+
+    async def _request(
+            self,
+            session: aiohttp.ClientSession,
+            method: str,
+            name: str,
+            query: str = '',
+            data: typing.Optional[bytes] = None,
+    ) -> tuple[int, typing.Mapping[str, str], bytes]:
+        """
+            Signed request
+            :param session: Session
+            :type session: aiohttp.ClientSession
+            :param method: HTTP method
+            :type method: str
+            :param name: Object name
+            :type name: str
+            :param query: Query string
+            :type query: str
+            :param data: Body
+            :type data: bytes
+            :return: Status, headers and body
+            :rtype: tuple
+            :raise ValueError: Bad response
+        """
+
+        url = self._url(name) + (f'?{query}' if query else '')
+        headers = self._headers(method, url)
+        headers.pop('host')
+        async with session.request(method, url, data=data, headers=headers) as response:
+            body = await response.read()
+            if response.status >= 400 and not (method == 'HEAD' and response.status == 404):
+                raise ValueError(f'S3 {method} {name}: {response.status} {body[:200]!r}')
+            return response.status, response.headers, body
+
+    async def put_file(self, name: str, path: str) -> None:
+        """
+            Upload local file, in parts when it is larger than part size
+            :param name: Object name
+            :type name: str
+            :param path: Local file, removed after upload
+            :type path: str
+            :return: None
+        """
+
+        try:
+            async with aiohttp.ClientSession() as session:
+                if os.path.getsize(path) <= self.part_size:
+                    async with aiofiles.open(path, 'rb') as file:
+                        await self._request(session, 'PUT', name, data=await file.read())
+                else:
+                    await self._multipart(session, name, path)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def _multipart(self, session: aiohttp.ClientSession, name: str, path: str) -> None:
+        """
+            Multipart upload, aborted on error
+            :param session: Session
+            :type session: aiohttp.ClientSession
+            :param name: Object name
+            :type name: str
+            :param path: Local file
+            :type path: str
+            :return: None
+            :raise ValueError: Bad response
+        """
+
+        _, _, body = await self._request(session, 'POST', name, 'uploads=')
+        upload_id = ElementTree.fromstring(body).find('{*}UploadId').text
+        upload = f'uploadId={_encode(upload_id)}'
+
+        parts = []
+        try:
+            async with aiofiles.open(path, 'rb') as file:
+                while chunk := await file.read(self.part_size):
+                    number = len(parts) + 1
+                    _, headers, _ = await self._request(session, 'PUT', name, f'partNumber={number}&{upload}', chunk)
+                    parts.append((number, headers['ETag']))
+
+            complete = ''.join(
+                f'<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>' for number, etag in parts
+            )
+            await self._request(
+                session, 'POST', name, upload,
+                f'<CompleteMultipartUpload>{complete}</CompleteMultipartUpload>'.encode(),
+            )
+        except Exception:
+            await self._request(session, 'DELETE', name, upload)
+            raise
+
+    async def delete(self, name: str) -> None:
+        """
+            Delete
+            :param name: Object name
+            :type name: str
+            :return: None
+        """
+
+        async with aiohttp.ClientSession() as session:
+            await self._request(session, 'DELETE', name)
+
+    async def exists(self, name: str) -> bool:
+        """
+            Exists?
+            :param name: Object name
+            :type name: str
+            :return: Exists?
+            :rtype: bool
+        """
+
+        async with aiohttp.ClientSession() as session:
+            code, _, _ = await self._request(session, 'HEAD', name)
+        return code == 200
+
+    def url(self, name: str) -> str:
+        """
+            Presigned download URL
+            :param name: Object name
+            :type name: str
+            :return: URL
+            :rtype: str
+        """
+
+        return presign(
+            self._url(name, self.public_endpoint), self.access_key, self.secret_key, self.region, self.expires,
+        )
+
+    async def response(self, request: Request, directory: str, file_name: str) -> Response:
+        """
+            Redirect to a presigned URL, so file bytes skip the app
+            :param request: Request
+            :type request: Request
+            :param directory: Directory name
+            :type directory: str
+            :param file_name: File name
+            :type file_name: str
+            :return: Redirect
+            :rtype: Response
+            :raise HTTPException 404: File not found
+        """
+
+        if directory.startswith('.') or file_name.startswith('.'):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='File not found')
+        return RedirectResponse(
+            self.url(f'{MEDIA_ROOT}{directory}/{file_name}'), status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+        )
+
+
+def get_storage() -> typing.Union[LocalStorage, S3Storage]:
+    """
+        Storage for STORAGE_BACKEND
+        :return: Storage
+        :raise ValueError: Unknown backend
+    """
+
+    if STORAGE_BACKEND == LOCAL:
+        return LocalStorage()
+    if STORAGE_BACKEND == S3:
+        return S3Storage(
+            S3_ENDPOINT,
+            S3_BUCKET,
+            S3_ACCESS_KEY,
+            S3_SECRET_KEY,
+            region=S3_REGION,
+            public_endpoint=S3_PUBLIC_ENDPOINT,
+            expires=S3_PRESIGN_EXPIRES,
+            part_size=S3_PART_SIZE,
+        )
+    raise ValueError(f'Unknown storage backend {STORAGE_BACKEND}')
+
+
+storage = get_storage()
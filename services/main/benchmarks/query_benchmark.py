@@ -0,0 +1,106 @@
+"""
+    Job list query benchmark: ORM entities (with and without selectin attachments) vs read-only column rows
+
+    Loads pages of jobs (with 2 attachments each) from an in-memory SQLite database through the
+    same statements as the CRUD layer: select(Job) into the session, with selectinload(Job.attachments)
+    or without relationship loads, versus select(*job_crud.columns) rows. Reports time and peak memory
+    (tracemalloc) per page.
+    SQLite stands in for Postgres, so only the ORM overhead is compared.
+
+    python -m benchmarks.query_benchmark [page_size] [rounds]
+"""
+import datetime
+import sys
+import time
+import tracemalloc
+
+import sqlalchemy
+from sqlalchemy.orm import Session, selectinload
+
+from app.crud import job_crud
+from app.models import Job, Attachment, SuperCategory, SubCategory
+from db import Base
+
+JOBS = 5000
+
+
+def fill(engine: sqlalchemy.engine.Engine) -> None:
+    Base.metadata.create_all(engine, tables=[
+        SuperCategory.__table__, SubCategory.__table__, Job.__table__, Attachment.__table__,
+    ])
+    with Session(engine) as session:
+        session.execute(sqlalchemy.insert(Job), [
+            {
+                'id': index,
+                'title': f'Job {index}',
+                'description': 'Description ' * 20,
+                'price': index,
+                'order_date': datetime.datetime(2030, 1, 1),
+                'customer_id': index,
+                'completed': False,
+                'category_id': 1,
+            } for index in range(1, JOBS + 1)
+        ])
+        session.execute(sqlalchemy.insert(Attachment), [
+            {'path': f'blobs/{index}-{number}.txt', 'job_id': index}
+            for index in range(1, JOBS + 1) for number in range(2)
+        ])
+        session.commit()
+
+
+def selectin(session: Session, skip: int, limit: int) -> list:
+    return session.execute(
+        sqlalchemy.select(Job).options(
+            selectinload(Job.attachments)
+        ).order_by(Job.id.desc()).offset(skip).limit(limit)
+    ).scalars().all()
+
+
+def entities(session: Session, skip: int, limit: int) -> list:
+    return session.execute(
+        sqlalchemy.select(Job).order_by(Job.id.desc()).offset(skip).limit(limit)
+    ).scalars().all()
+
+
+def rows(session: Session, skip: int, limit: int) -> list:
+    return session.execute(
+        sqlalchemy.select(*job_crud.columns).order_by(Job.id.desc()).offset(skip).limit(limit)
+    ).all()
+
+
+def measure(engine: sqlalchemy.engine.Engine, function, page_size: int, rounds: int) -> tuple[float, int]:
+    elapsed, peak = 0.0, 0
+    for index in range(rounds):
+        # New session per page, as per request
+        with Session(engine) as session:
+            skip = index * page_size % JOBS
+            tracemalloc.start()
+            start = time.perf_counter()
+            result = function(session, skip, page_size)
+            elapsed += time.perf_counter() - start
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            assert len(result) == page_size
+    return elapsed / rounds, peak
+
+
+def main(page_size: int, rounds: int) -> None:
+    engine = sqlalchemy.create_engine('sqlite://', future=True)
+    fill(engine)
+
+    results = {name: measure(engine, function, page_size, rounds) for name, function in (
+        ('selectin', selectin), ('entities', entities), ('rows', rows),
+    )}
+    base_elapsed, base_peak = results['selectin']
+    for name, (elapsed, peak) in results.items():
+        print(
+            f' {name:>8}: {page_size} jobs in {elapsed * 1000:.2f}ms per page, peak {peak / 1024:.0f}KiB '
+            f'(saved {1 - elapsed / base_elapsed:.0%} time, {1 - peak / base_peak:.0%} memory)'
+        )
+
+
+if __name__ == '__main__':
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+    )
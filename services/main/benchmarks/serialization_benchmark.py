@@ -0,0 +1,77 @@
+"""
+    Jobs page serialization benchmark (no DB, transient ORM instances)
+
+    Compares the default path (job.__dict__ copies, JobsPaginate validation, stdlib json)
+    with the fast path (rows built from ORM columns, orjson, no response validation).
+
+    python -m benchmarks.serialization_benchmark [page_size] [rounds]
+"""
+import asyncio
+import datetime
+import json
+import sys
+import time
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.jobs.schemas import JobsPaginate
+from app.models import Job
+from app.serializers import job_serializer
+
+FIELD = create_response_field('Response', JobsPaginate)
+
+
+def jobs(count: int) -> list[Job]:
+    order_date = datetime.datetime(2030, 1, 1, 12, 30, 15, 123456)
+    return [
+        Job(
+            id=index,
+            title=f'Job {index}',
+            description='Description ' * 20,
+            price=index * 10,
+            order_date=order_date,
+            category_id=1,
+            customer_id=index,
+            executor_id=None if index % 2 else index + 1,
+            completed=False,
+        ) for index in range(1, count + 1)
+    ]
+
+
+def page(results) -> dict:
+    return {'next': 'http://localhost/main/api/v1/jobs/?page=2', 'previous': None, 'page': 1, 'results': results}
+
+
+async def default_path(queryset: list[Job]) -> bytes:
+    content = await serialize_response(field=FIELD, response_content=page(job.__dict__ for job in queryset))
+    return JSONResponse(content).body
+
+
+async def fast_path(queryset: list[Job]) -> bytes:
+    return ORJSONResponse(page(job_serializer.rows(queryset))).body
+
+
+async def measure(function, queryset: list[Job], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await function(queryset)
+    return (time.perf_counter() - start) / rounds
+
+
+async def main(page_size: int, rounds: int) -> None:
+    queryset = jobs(page_size)
+    assert json.loads(await default_path(queryset)) == json.loads(await fast_path(queryset))
+
+    default = await measure(default_path, queryset, rounds)
+    fast = await measure(fast_path, queryset, rounds)
+    print(f' default: {page_size} jobs in {default * 1000:.3f}ms per response')
+    print(f'    fast: {page_size} jobs in {fast * 1000:.3f}ms per response ({default / fast:.1f}x)')
+
+
+if __name__ == '__main__':
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+    ))
@@ -30,6 +30,33 @@ DATABASE_URL = f'postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT
 
 MEDIA_ROOT = 'media/'
 
+# Uploads
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 64 * 1024))
+MAX_FILE_SIZE = int(os.environ.get('MAX_FILE_SIZE', 10 * 1024 * 1024))
+MAX_UPLOAD_SIZE = int(os.environ.get('MAX_UPLOAD_SIZE', 50 * 1024 * 1024))
+
+# Media
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 60 * 60 * 24 * 30))
+MEDIA_ACCEL_REDIRECT = os.environ.get('MEDIA_ACCEL_REDIRECT', '')
+
+# Storage (local or s3)
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local')
+S3_ENDPOINT = os.environ.get('S3_ENDPOINT', 'http://minio:9000')
+S3_PUBLIC_ENDPOINT = os.environ.get('S3_PUBLIC_ENDPOINT', S3_ENDPOINT)
+S3_BUCKET = os.environ.get('S3_BUCKET', 'main')
+S3_ACCESS_KEY = os.environ.get('S3_ACCESS_KEY', 'S3_ACCESS_KEY')
+S3_SECRET_KEY = os.environ.get('S3_SECRET_KEY', 'S3_SECRET_KEY')
+S3_REGION = os.environ.get('S3_REGION', 'us-east-1')
+S3_PRESIGN_EXPIRES = int(os.environ.get('S3_PRESIGN_EXPIRES', 60 * 60))
+S3_PART_SIZE = int(os.environ.get('S3_PART_SIZE', 8 * 1024 * 1024))
+
+# Blobs
+BLOB_GC_INTERVAL = int(os.environ.get('BLOB_GC_INTERVAL', 60 * 60))
+BLOB_GC_GRACE = int(os.environ.get('BLOB_GC_GRACE', 60 * 60))
+BLOB_GC_BATCH = int(os.environ.get('BLOB_GC_BATCH', 500))
+
 if int(TEST):
     DATABASE_URL = f'postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}_test'
     MEDIA_ROOT = 'media/tests/'
+
+BLOBS_ROOT = f'{MEDIA_ROOT}blobs/'
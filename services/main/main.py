@@ -1,12 +1,16 @@
+import asyncio
 import os
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
+from app.blobs import run_blob_gc
 from app.categories.routers import categories_router
+from app.categories.tree import category_tree
 from app.jobs.routers import jobs_router
-from config import PROJECT_NAME, API, MEDIA_ROOT, VERSION, CLIENT_NAME
-from db import Base, engine
+from config import PROJECT_NAME, API, MEDIA_ROOT, VERSION, CLIENT_NAME, MAX_UPLOAD_SIZE, TEST
+from db import Base, engine, async_session
 
 app = FastAPI(
     title=PROJECT_NAME,
@@ -24,6 +28,18 @@ app.add_middleware(
 )
 
 
+@app.middleware('http')
+async def upload_size_limit(request: Request, call_next):
+    """ Reject too large bodies before they are parsed """
+
+    content_length = request.headers.get('content-length', '')
+    if content_length.isdigit() and int(content_length) > MAX_UPLOAD_SIZE:
+        return JSONResponse(
+            {'detail': 'Upload is too large'}, status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
+    return await call_next(request)
+
+
 @app.on_event('startup')
 async def startup():
     """ Startup """
@@ -34,5 +50,20 @@ async def startup():
     if not os.path.exists(MEDIA_ROOT):
         os.makedirs(MEDIA_ROOT)
 
+    async with async_session() as db:
+        await category_tree.load(db)
+
+    if not int(TEST):
+        app.state.blob_gc = asyncio.create_task(run_blob_gc())
+
+
+@app.on_event('shutdown')
+async def shutdown():
+    """ Shutdown """
+
+    if getattr(app.state, 'blob_gc', None) is not None:
+        app.state.blob_gc.cancel()
+
+
 app.include_router(categories_router, prefix=f'/{API}/categories')
 app.include_router(jobs_router, prefix=f'/{API}/jobs')
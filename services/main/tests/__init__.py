@@ -5,6 +5,7 @@ import shutil
 from fastapi.testclient import TestClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.categories.tree import category_tree
 from config import API, MEDIA_ROOT
 from db import engine, Base
 from main import app
@@ -34,6 +35,7 @@ class BaseTest:
         self.session = AsyncSession(engine)
         self.client = TestClient(app)
         self.url = f'/{API}'
+        category_tree.invalidate()
         async_loop(create_all())
         os.makedirs(MEDIA_ROOT)
 
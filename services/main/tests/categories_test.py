@@ -66,10 +66,22 @@ class CategoriesTestCase(BaseTest, TestCase):
                 },
             ])
 
+            etag = response.headers['etag']
+            self.assertEqual(response.headers['cache-control'], 'no-cache')
+
+            response = self.client.get(f'{self.url}/categories/', headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.headers['etag'], etag)
+            self.assertEqual(response.content, b'')
+
             self.client.post(
                 f'{self.url}/categories/', json={'name': 'Web', 'super_category_id': 2}, headers=headers
             )
 
+            response = self.client.get(f'{self.url}/categories/', headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response.headers['etag'], etag)
+
             response = self.client.get(f'{self.url}/categories/')
             self.assertEqual(response.status_code, 200)
             self.assertEqual(response.json(), [
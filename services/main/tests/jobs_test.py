@@ -1,11 +1,16 @@
 import datetime
+import hashlib
 import os
 from unittest import TestCase, mock
 
+import sqlalchemy
 from fastapi import UploadFile
+from sqlalchemy.orm import selectinload
 
+from app.blobs import collect_blobs
 from app.crud import job_crud, attachment_crud
-from config import SERVER_MAIN_BACKEND, MEDIA_ROOT, API
+from app.models import Blob, Job
+from config import SERVER_MAIN_BACKEND, MEDIA_ROOT, API, BLOBS_ROOT
 from tests import BaseTest, async_loop
 
 
@@ -1060,7 +1065,7 @@ class JobsTestCase(BaseTest, TestCase):
             doc = UploadFile('doc.doc', content_type='application/msword')
             xls = UploadFile('xls.xls', content_type='application/vnd.ms-excel')
 
-            job = async_loop(job_crud.get(self.session, id=1))
+            job = async_loop(job_crud.get(self.session, id=1, options=(selectinload(Job.attachments),)))
             self.assertEqual(len(job.attachments), 0)
             self.assertEqual(len(async_loop(attachment_crud.all(self.session))), 0)
 
@@ -1077,7 +1082,7 @@ class JobsTestCase(BaseTest, TestCase):
             self.assertEqual(response.status_code, 201)
             self.assertEqual(response.json(), {'msg': 'Attachments has been added'})
             async_loop(self.session.commit())
-            job = async_loop(job_crud.get(self.session, id=1))
+            job = async_loop(job_crud.get(self.session, id=1, options=(selectinload(Job.attachments),)))
             self.assertEqual(len(job.attachments), 3)
             self.assertEqual(len(async_loop(attachment_crud.all(self.session))), 3)
 
@@ -1089,7 +1094,12 @@ class JobsTestCase(BaseTest, TestCase):
             self.assertNotEqual(file_1, file_2)
             self.assertNotEqual(file_1, file_3)
 
-            self.assertEqual(f'{MEDIA_ROOT}{job.id}' in file_2.path, True)
+            self.assertEqual(BLOBS_ROOT in file_2.path, True)
+
+            # Same content is stored once
+            self.assertEqual(file_1.hash, file_2.hash)
+            self.assertEqual(file_1.path, file_3.path)
+            self.assertEqual(len(async_loop(self.session.execute(sqlalchemy.select(Blob))).scalars().all()), 1)
 
             response = self.client.post(
                 f'{self.url}/jobs/attachments/add?job_id=2',
@@ -1103,8 +1113,8 @@ class JobsTestCase(BaseTest, TestCase):
             self.assertEqual(response.status_code, 201)
             self.assertEqual(response.json(), {'msg': 'Attachments has been added'})
             async_loop(self.session.commit())
-            job = async_loop(job_crud.get(self.session, id=1))
-            job_2 = async_loop(job_crud.get(self.session, id=2))
+            job = async_loop(job_crud.get(self.session, id=1, options=(selectinload(Job.attachments),)))
+            job_2 = async_loop(job_crud.get(self.session, id=2, options=(selectinload(Job.attachments),)))
             self.assertEqual(len(job.attachments), 3)
             self.assertEqual(len(job_2.attachments), 3)
             self.assertEqual(len(async_loop(attachment_crud.all(self.session))), 6)
@@ -1178,14 +1188,19 @@ class JobsTestCase(BaseTest, TestCase):
 
             # Remove
             attachment_6 = async_loop(attachment_crud.get(self.session, id=6))
-            self.assertEqual(os.path.exists(attachment_6.path), True)
+            blob_path = attachment_6.path
+            self.assertEqual(os.path.exists(blob_path), True)
 
             response = self.client.delete(f'{self.url}/jobs/attachments/remove?pk=6', headers=headers)
             self.assertEqual(response.status_code, 200)
             self.assertEqual(response.json(), {'msg': 'Attachment has been deleted'})
 
             self.assertEqual(len(async_loop(attachment_crud.all(self.session))), 5)
-            self.assertEqual(os.path.exists(attachment_6.path), False)
+            self.assertEqual(os.path.exists(blob_path), True)
+
+            # Garbage collector keeps referenced blobs
+            self.assertEqual(async_loop(collect_blobs(self.session, grace=0)), 0)
+            self.assertEqual(os.path.exists(blob_path), True)
 
             response = self.client.delete(f'{self.url}/jobs/attachments/remove?pk=143', headers=headers)
             self.assertEqual(response.status_code, 400)
@@ -1225,3 +1240,141 @@ class JobsTestCase(BaseTest, TestCase):
             self.assertEqual(response.json(), {'msg': 'Attachment has been deleted'})
 
             self.assertEqual(len(async_loop(attachment_crud.all(self.session))), 0)
+
+            # Unreferenced blobs are collected after the grace period
+            self.assertEqual(async_loop(collect_blobs(self.session)), 0)
+            self.assertEqual(async_loop(collect_blobs(self.session, grace=0)), 1)
+            self.assertEqual(os.path.exists(blob_path), False)
+
+            # Cascade delete leaves the blob unreferenced
+            response = self.client.post(
+                f'{self.url}/jobs/attachments/add?job_id=1',
+                headers=headers,
+                files=[('files', ('image.png', b'image', 'image/png'))],
+            )
+            self.assertEqual(response.status_code, 201)
+            async_loop(self.session.commit())
+            blob_path = async_loop(attachment_crud.all(self.session))[0].path
+
+            response = self.client.delete(f'{self.url}/jobs/1', headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(async_loop(attachment_crud.all(self.session))), 0)
+
+            self.assertEqual(async_loop(collect_blobs(self.session, grace=0)), 1)
+            self.assertEqual(os.path.exists(blob_path), False)
+            self.assertEqual(len(async_loop(self.session.execute(sqlalchemy.select(Blob))).scalars().all()), 0)
+
+    def test_attachments_size_limit(self):
+        with mock.patch('app.permission.permission', return_value=1) as _:
+            headers = {'Authorization': 'Bearer Token'}
+
+            self.client.post(f'{self.url}/categories/', json={'name': 'Programming'}, headers=headers)
+            self.client.post(
+                f'{self.url}/categories/', json={'name': 'Python', 'super_category_id': 1}, headers=headers,
+            )
+
+            now = datetime.datetime.utcnow() + datetime.timedelta(minutes=10)
+            self.client.post(
+                f'{self.url}/jobs/', headers=headers, json={
+                    'title': 'Web site',
+                    'description': 'Web site',
+                    'price': 5000,
+                    'order_date': f'{now}Z',
+                    'category_id': 1,
+                }
+            )
+
+            files = [
+                ('files', ('image.png', b'0' * 20, 'image/png')),
+                ('files', ('doc.doc', b'0' * 20, 'application/msword')),
+            ]
+
+            with mock.patch('app.service.MAX_FILE_SIZE', 10) as _:
+                response = self.client.post(f'{self.url}/jobs/attachments/add?job_id=1', headers=headers, files=files)
+                self.assertEqual(response.status_code, 413)
+                self.assertEqual(response.json(), {'detail': 'File is too large'})
+
+            with mock.patch('app.service.MAX_UPLOAD_SIZE', 30) as _:
+                response = self.client.post(f'{self.url}/jobs/attachments/add?job_id=1', headers=headers, files=files)
+                self.assertEqual(response.status_code, 413)
+                self.assertEqual(response.json(), {'detail': 'Upload is too large'})
+
+            with mock.patch('main.MAX_UPLOAD_SIZE', 30) as _:
+                response = self.client.post(f'{self.url}/jobs/attachments/add?job_id=1', headers=headers, files=files)
+                self.assertEqual(response.status_code, 413)
+                self.assertEqual(response.json(), {'detail': 'Upload is too large'})
+
+            self.assertEqual(len(async_loop(attachment_crud.all(self.session))), 0)
+            self.assertEqual(os.path.exists(f'{MEDIA_ROOT}1'), False)
+
+            # Streamed in chunks
+            with mock.patch('app.service.UPLOAD_CHUNK_SIZE', 3) as _:
+                response = self.client.post(f'{self.url}/jobs/attachments/add?job_id=1', headers=headers, files=files)
+                self.assertEqual(response.status_code, 201)
+
+            async_loop(self.session.commit())
+            attachments = async_loop(attachment_crud.all(self.session))
+            self.assertEqual(len(attachments), 2)
+            for attachment in attachments:
+                with open(attachment.path, 'rb') as file:
+                    self.assertEqual(file.read(), b'0' * 20)
+
+    def test_attachments_media(self):
+        os.makedirs(f'{MEDIA_ROOT}1')
+        with open(f'{MEDIA_ROOT}1/file.txt', 'wb') as file:
+            file.write(b'0123456789')
+
+        response = self.client.get(f'{self.url}/jobs/media/1/file.txt')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'0123456789')
+        self.assertEqual(response.headers['accept-ranges'], 'bytes')
+        self.assertEqual('max-age=' in response.headers['cache-control'], True)
+        etag = response.headers['etag']
+        last_modified = response.headers['last-modified']
+
+        # Conditional
+        response = self.client.get(f'{self.url}/jobs/media/1/file.txt', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        response = self.client.get(f'{self.url}/jobs/media/1/file.txt', headers={'If-Modified-Since': last_modified})
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(f'{self.url}/jobs/media/1/file.txt', headers={'If-None-Match': '"other"'})
+        self.assertEqual(response.status_code, 200)
+
+        # Range
+        response = self.client.get(f'{self.url}/jobs/media/1/file.txt', headers={'Range': 'bytes=2-4'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, b'234')
+        self.assertEqual(response.headers['content-range'], 'bytes 2-4/10')
+
+        response = self.client.get(f'{self.url}/jobs/media/1/file.txt', headers={'Range': 'bytes=-3'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, b'789')
+
+        response = self.client.get(
+            f'{self.url}/jobs/media/1/file.txt', headers={'Range': 'bytes=2-4', 'If-Range': '"other"'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'0123456789')
+
+        response = self.client.get(f'{self.url}/jobs/media/1/file.txt', headers={'Range': 'bytes=20-'})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response.headers['content-range'], 'bytes */10')
+
+        # Content-addressed blob is tagged with its hash
+        digest = hashlib.sha256(b'0123456789').hexdigest()
+        os.makedirs(BLOBS_ROOT, exist_ok=True)
+        with open(f'{BLOBS_ROOT}{digest}.txt', 'wb') as file:
+            file.write(b'0123456789')
+        response = self.client.get(f'{self.url}/jobs/media/blobs/{digest}.txt')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['etag'], f'"{digest}"')
+
+        # Offload to nginx
+        with mock.patch('app.storage.MEDIA_ACCEL_REDIRECT', '/protected/main/') as _:
+            response = self.client.get(f'{self.url}/jobs/media/1/file.txt')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers['x-accel-redirect'], '/protected/main/1/file.txt')
+            self.assertEqual(response.content, b'')
@@ -0,0 +1,50 @@
+import datetime
+import json
+from unittest import TestCase
+
+from app.jobs.schemas import GetJob, AttachmentsJob
+from app.models import Job, Attachment
+from app.serializers import job_serializer, attachment_serializer, json_response
+from tests import async_loop
+
+
+class SerializersTestCase(TestCase):
+
+    def setUp(self) -> None:
+        self.job = Job(
+            id=1,
+            title='Job',
+            description='Description',
+            price=100,
+            order_date=datetime.datetime(2030, 1, 1, 12, 30, 15, 123456),
+            category_id=2,
+            customer_id=3,
+            executor_id=None,
+            completed=False,
+        )
+        self.job.attachments = [Attachment(id=4, path='media/blobs/file.txt', job_id=1)]
+
+    def test_job_serializer(self):
+        self.assertEqual(job_serializer.row(self.job), GetJob(**self.job.__dict__).dict())
+        self.assertEqual(job_serializer.row(self.job)['order_date'], '2030-01-01T12:30:15.123456Z')
+
+        self.job.order_date = datetime.datetime(2030, 1, 1)
+        self.job.executor_id = 5
+        self.assertEqual(job_serializer.rows([self.job]), [GetJob(**self.job.__dict__).dict()])
+
+        self.assertEqual(
+            {**job_serializer.row(self.job), 'attachments': attachment_serializer.rows(self.job.attachments)},
+            AttachmentsJob(**{
+                **self.job.__dict__, 'attachments': [attachment.__dict__ for attachment in self.job.attachments],
+            }).dict(),
+        )
+
+    def test_json_response(self):
+
+        @json_response
+        async def view():
+            return {'results': job_serializer.rows([self.job])}
+
+        response = async_loop(view())
+        self.assertEqual(response.media_type, 'application/json')
+        self.assertEqual(json.loads(response.body), {'results': [GetJob(**self.job.__dict__).dict()]})
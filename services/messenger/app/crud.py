@@ -1,9 +1,10 @@
+import typing
+
 import sqlalchemy
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.message.schemas import CreateMessage, UpdateMessage
-from app.models import Dialogue, Message, Notification
-from app.send_email import send_notification_email
+from app.models import Dialogue, Message, Notification, Event
 from crud import CRUD
 
 
@@ -31,54 +32,135 @@ class DialogueCRUD(CRUD[Dialogue, Dialogue, Dialogue]):
         )
         return query.scalars().all()
 
+    @staticmethod
+    async def inbox(
+            db: AsyncSession, user_id: int, cursor: typing.Optional[int] = None, limit: int = 20,
+    ) -> list[sqlalchemy.engine.Row]:
+        """
+            Dialogues for user with last message and unread count, newest activity first (one query)
+            :param db: DB
+            :type db: AsyncSession
+            :param user_id: User ID
+            :type user_id: int
+            :param cursor: Last message ID of previous page
+            :type cursor: int
+            :param limit: Limit
+            :type limit: int
+            :return: Dialogues
+            :rtype: list
+        """
+        last_message = sqlalchemy.select(
+            Message.id, Message.msg, Message.sender_id, Message.created_at,
+        ).filter(
+            Message.dialogue_id == Dialogue.id
+        ).order_by(Message.id.desc()).limit(1).lateral('last_message')
+        # Range count above the user's read watermark
+        unread = sqlalchemy.select(sqlalchemy.func.count(Message.id)).filter(
+            Message.dialogue_id == Dialogue.id,
+            Message.id > Dialogue.read_id_of(user_id),
+            Message.sender_id != user_id,
+        ).scalar_subquery()
 
-class MessageCRUD(CRUD[Message, CreateMessage, UpdateMessage]):
-    """ Message CRUD """
+        query = sqlalchemy.select(
+            Dialogue.id,
+            Dialogue.users_ids,
+            last_message.c.id.label('last_message_id'),
+            last_message.c.msg,
+            last_message.c.sender_id,
+            last_message.c.created_at,
+            (last_message.c.id <= Dialogue.recipient_read_id_of(last_message.c.sender_id)).label('viewed'),
+            unread.label('unread'),
+        ).join(
+            last_message, sqlalchemy.true()
+        ).filter(
+            sqlalchemy.or_(
+                sqlalchemy.func.split_part(Dialogue.users_ids, '_', 1) == f'{user_id}',
+                sqlalchemy.func.split_part(Dialogue.users_ids, '_', 2) == f'{user_id}',
+            )
+        )
+        # Message IDs grow with time, so last message ID orders by activity and is a stable cursor
+        if cursor is not None:
+            query = query.filter(last_message.c.id < cursor)
+
+        query = await db.execute(query.order_by(last_message.c.id.desc()).limit(limit))
+        return query.all()
 
     @staticmethod
-    async def view(db: AsyncSession, ids: list[int], dialogue_id: int, user_id: int):
+    async def read(
+            db: AsyncSession, dialogue: Dialogue, user_id: int, up_to: typing.Optional[int] = None,
+    ) -> typing.Optional[int]:
         """
-            View
+            Move user read watermark up to last message from other user (one UPDATE ... RETURNING)
             :param db: DB
             :type db: AsyncSession
-            :param ids: IDs
-            :type ids: list
-            :param dialogue_id: Dialogue ID
-            :type dialogue_id: int
+            :param dialogue: Dialogue
+            :type dialogue: Dialogue
             :param user_id: User ID
             :type user_id: int
-            :return: None
+            :param up_to: Read up to message ID (all messages by default)
+            :type up_to: int
+            :return: New watermark (None if it hasn't moved)
+            :rtype: int
         """
-        query = sqlalchemy.update(Message).filter(
-            sqlalchemy.and_(
-                Message.id.in_(ids),
-                Message.sender_id != user_id
-            )
-        ).filter_by(dialogue_id=dialogue_id).values(viewed=True)
-        query.execution_options(synchronize_session="fetch")
-        await db.execute(query)
+        column: str = dialogue.read_column(user_id)
+        last_id = sqlalchemy.select(sqlalchemy.func.max(Message.id)).filter(
+            Message.dialogue_id == dialogue.id, Message.sender_id != user_id,
+        )
+        if up_to is not None:
+            last_id = last_id.filter(Message.id <= up_to)
+        read_id = sqlalchemy.func.coalesce(last_id.scalar_subquery(), 0)
+
+        query = await db.execute(
+            sqlalchemy.update(Dialogue).filter(
+                Dialogue.id == dialogue.id, getattr(Dialogue, column) < read_id,
+            ).values(
+                **{column: read_id}
+            ).returning(getattr(Dialogue, column)).execution_options(synchronize_session=False)
+        )
+        read_id = query.scalar()
         await db.commit()
+        return read_id
 
 
-class NotificationCRUD(CRUD[Notification, Notification, Notification]):
-    """ Notification CRUD """
+class MessageCRUD(CRUD[Message, CreateMessage, UpdateMessage]):
+    """ Message CRUD """
+
+    # Message lists render only these columns
+    columns = (Message.id, Message.msg, Message.dialogue_id, Message.created_at, Message.sender_id)
 
-    async def create(self, db: AsyncSession, **kwargs) -> Notification:
+    async def for_dialogue(
+            self, db: AsyncSession, dialogue_id: int, skip: int = 0, limit: int = 100,
+    ) -> list[sqlalchemy.engine.Row]:
         """
-            Create notification
+            Messages for dialogue with read receipts (read-only rows)
             :param db: DB
             :type db: AsyncSession
-            :param kwargs: kwargs
-            :return: New notification
+            :param dialogue_id: Dialogue ID
+            :type dialogue_id: int
+            :param skip: Skip
+            :type skip: int
+            :param limit: Limit
+            :type limit: int
+            :return: Messages
+            :rtype: list
         """
-        notification = await super().create(db, **kwargs)
-        await send_notification_email(notification)
-        return notification
+        return await self.rows(
+            db,
+            (*self.columns, (Message.id <= Dialogue.recipient_read_id_of(Message.sender_id)).label('viewed')),
+            Message.dialogue_id == dialogue_id,
+            Dialogue.id == Message.dialogue_id,
+            skip=skip,
+            limit=limit,
+        )
+
+
+class NotificationCRUD(CRUD[Notification, Notification, Notification]):
+    """ Notification CRUD """
 
     @staticmethod
-    async def view(db: AsyncSession, skip: int = 0, limit: int = 100, **kwargs) -> None:
+    async def view(db: AsyncSession, skip: int = 0, limit: int = 100, **kwargs) -> list[int]:
         """
-            View notifications
+            View notifications (one DELETE ... RETURNING)
             :param db: DB
             :type db: AsyncSession
             :param skip: Skip
@@ -86,26 +168,137 @@ class NotificationCRUD(CRUD[Notification, Notification, Notification]):
             :param limit: Limit
             :type limit: int
             :param kwargs: Filter params
-            :return: None
+            :return: Viewed notifications IDs
+            :rtype: list
         """
 
         query = await db.execute(
-            sqlalchemy.select(Notification.id).filter_by(
-                **kwargs
-            ).order_by(Notification.id.desc()).offset(skip).limit(limit)
+            sqlalchemy.delete(Notification).filter(
+                Notification.id.in_(
+                    sqlalchemy.select(Notification.id).filter_by(
+                        **kwargs
+                    ).order_by(Notification.id.desc()).offset(skip).limit(limit)
+                )
+            ).returning(Notification.id).execution_options(synchronize_session=False)
         )
-        query = query.scalars().all()
+        ids = query.scalars().all()
+        await db.commit()
+        return ids
 
-        await db.execute(
+    @staticmethod
+    async def view_one(db: AsyncSession, pk: int, recipient_id: int) -> bool:
+        """
+            View recipient notification
+            :param db: DB
+            :type db: AsyncSession
+            :param pk: Notification ID
+            :type pk: int
+            :param recipient_id: Recipient ID
+            :type recipient_id: int
+            :return: Viewed?
+            :rtype: bool
+        """
+
+        query = await db.execute(
             sqlalchemy.delete(Notification).filter_by(
-                **kwargs
+                id=pk, recipient_id=recipient_id,
+            ).returning(Notification.id).execution_options(synchronize_session=False)
+        )
+        viewed = query.scalar() is not None
+        await db.commit()
+        return viewed
+
+    @staticmethod
+    async def count(db: AsyncSession, recipient_id: int) -> int:
+        """
+            Unviewed notifications count
+            :param db: DB
+            :type db: AsyncSession
+            :param recipient_id: Recipient ID
+            :type recipient_id: int
+            :return: Count
+            :rtype: int
+        """
+
+        query = await db.execute(
+            sqlalchemy.select(sqlalchemy.func.count(Notification.id)).filter_by(recipient_id=recipient_id)
+        )
+        return query.scalar()
+
+
+class EventCRUD(CRUD[Event, Event, Event]):
+    """ Event CRUD """
+
+    @staticmethod
+    async def since(
+        db: AsyncSession,
+        user_id: int,
+        since_id: typing.Optional[int] = None,
+        dialogues: typing.Optional[dict[int, int]] = None,
+        limit: int = 100,
+    ) -> list[tuple[Event, typing.Optional[Message], typing.Optional[bool]]]:
+        """
+            Events since watermark (one range query)
+            :param db: DB
+            :type db: AsyncSession
+            :param user_id: User ID
+            :type user_id: int
+            :param since_id: Global watermark (last seen event ID)
+            :type since_id: int
+            :param dialogues: Last seen event ID per dialogue
+            :type dialogues: dict
+            :param limit: Limit
+            :type limit: int
+            :return: Events with current messages and their read receipts (None if message was deleted)
+            :rtype: list
+        """
+        dialogues = dialogues or {}
+
+        conditions = [
+            sqlalchemy.and_(Event.dialogue_id == dialogue_id, Event.id > last_id)
+            for dialogue_id, last_id in dialogues.items()
+        ]
+        if since_id is not None:
+            conditions.append(sqlalchemy.and_(Event.dialogue_id.notin_(list(dialogues.keys())), Event.id > since_id))
+
+        if not conditions:
+            return []
+
+        query = await db.execute(
+            sqlalchemy.select(
+                Event, Message, (Message.id <= Dialogue.recipient_read_id_of(Message.sender_id)).label('viewed'),
+            ).join(
+                Dialogue, Dialogue.id == Event.dialogue_id
+            ).outerjoin(
+                Message, Message.id == Event.message_id
+            ).filter(
+                sqlalchemy.or_(Event.sender_id == user_id, Event.recipient_id == user_id)
             ).filter(
-                Notification.id.in_(query)
+                sqlalchemy.or_(*conditions)
+            ).order_by(Event.id.asc()).limit(limit)
+        )
+        return query.all()
+
+    @staticmethod
+    async def watermark(db: AsyncSession, user_id: int) -> int:
+        """
+            Current watermark (last event ID) for user
+            :param db: DB
+            :type db: AsyncSession
+            :param user_id: User ID
+            :type user_id: int
+            :return: Last event ID
+            :rtype: int
+        """
+        query = await db.execute(
+            sqlalchemy.select(sqlalchemy.func.max(Event.id)).filter(
+                sqlalchemy.or_(Event.sender_id == user_id, Event.recipient_id == user_id)
             )
         )
-        await db.commit()
+        return query.scalar() or 0
 
 
 dialogue_crud = DialogueCRUD(Dialogue)
 message_crud = MessageCRUD(Message)
 notification_crud = NotificationCRUD(Notification)
+event_crud = EventCRUD(Event)
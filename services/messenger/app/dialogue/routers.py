@@ -1,8 +1,10 @@
-from fastapi import APIRouter, status, Depends
+import typing
+
+from fastapi import APIRouter, status, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.dialogue import views
-from app.dialogue.schemas import GetDialogue
+from app.dialogue.schemas import GetDialogue, Inbox
 from app.permission import is_active
 from db import get_db
 
@@ -22,6 +24,24 @@ async def get_all_dialogues_for_user(user_id: int = Depends(is_active), db: Asyn
     return await views.get_all_dialogues_for_user(db, user_id)
 
 
+@dialogues_router.get(
+    '/inbox',
+    name='Inbox',
+    description='Dialogues with last message, unread count and other participant, newest activity first',
+    response_description='Inbox',
+    status_code=status.HTTP_200_OK,
+    response_model=Inbox,
+    tags=['dialogues'],
+)
+async def get_inbox(
+    cursor: typing.Optional[int] = Query(default=None, gt=0),
+    page_size: int = Query(default=20, gt=0, le=100),
+    user_id: int = Depends(is_active),
+    db: AsyncSession = Depends(get_db),
+):
+    return await views.get_inbox(db, user_id, cursor, page_size)
+
+
 @dialogues_router.get(
     '/{pk}',
     name='Get dialogue',
@@ -1,4 +1,9 @@
-from pydantic import BaseModel
+import datetime
+import typing
+
+from pydantic import BaseModel, validator
+
+from app.schemas import UserData
 
 
 class GetDialogue(BaseModel):
@@ -6,3 +11,34 @@ class GetDialogue(BaseModel):
 
     id: int
     users_ids: str
+
+
+class LastMessage(BaseModel):
+    """ Last message """
+
+    id: int
+    msg: str
+    sender_id: int
+    created_at: datetime.datetime
+    viewed: bool
+
+    @validator('created_at')
+    def validate_created_at(cls, created_at: datetime.datetime):
+        """ Validate created at """
+        return f'{created_at}Z'.replace(' ', 'T')
+
+
+class InboxDialogue(GetDialogue):
+    """ Inbox dialogue """
+
+    last_message: LastMessage
+    unread: int
+    user: typing.Optional[UserData]
+
+
+class Inbox(BaseModel):
+    """ Inbox (cursor pagination) """
+
+    next: typing.Optional[str]
+    cursor: typing.Optional[int]
+    results: list[InboxDialogue]
@@ -1,7 +1,11 @@
+import typing
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud import dialogue_crud
+from app.requests import get_users
 from app.service import dialogue_exist
+from config import SERVER_MESSENGER_BACKEND, API
 
 
 async def get_all_dialogues_for_user(db: AsyncSession, user_id: int):
@@ -19,6 +23,56 @@ async def get_all_dialogues_for_user(db: AsyncSession, user_id: int):
     return (dialogue.__dict__ for dialogue in dialogues)
 
 
+async def get_inbox(
+        db: AsyncSession, user_id: int, cursor: typing.Optional[int], page_size: int,
+) -> dict[str, typing.Any]:
+    """
+        Inbox (dialogues with last message, unread count and other participant)
+        :param db: DB
+        :type db: AsyncSession
+        :param user_id: User ID
+        :type user_id: int
+        :param cursor: Last message ID of previous page
+        :type cursor: int
+        :param page_size: Page size
+        :type page_size: int
+        :return: Inbox
+        :rtype: dict
+    """
+
+    dialogues = await dialogue_crud.inbox(db, user_id, cursor, page_size)
+
+    recipients = {
+        dialogue.id: next(int(pk) for pk in dialogue.users_ids.split('_') if pk != f'{user_id}')
+        for dialogue in dialogues
+    }
+    users = await get_users(list(set(recipients.values())))
+
+    next_cursor = dialogues[-1].last_message_id if len(dialogues) == page_size else None
+    return {
+        'next': (
+            f'{SERVER_MESSENGER_BACKEND}{API}/dialogues/inbox?cursor={next_cursor}&page_size={page_size}'
+            if next_cursor is not None else None
+        ),
+        'cursor': next_cursor,
+        'results': [
+            {
+                'id': dialogue.id,
+                'users_ids': dialogue.users_ids,
+                'last_message': {
+                    'id': dialogue.last_message_id,
+                    'msg': dialogue.msg,
+                    'sender_id': dialogue.sender_id,
+                    'created_at': dialogue.created_at,
+                    'viewed': dialogue.viewed,
+                },
+                'unread': dialogue.unread,
+                'user': users.get(f'{recipients[dialogue.id]}'),
+            } for dialogue in dialogues
+        ],
+    }
+
+
 @dialogue_exist('pk', 'user_id')
 async def get_dialogue(*, db: AsyncSession, user_id: int, pk: int) -> dict:
     """
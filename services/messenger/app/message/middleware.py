@@ -1,6 +1,7 @@
-from starlette.types import ASGIApp, Scope, Receive, Send
+from starlette.types import ASGIApp, Message, Scope, Receive, Send
 
 from app.message.state import WebSocketState
+from app.notification.digest import NotificationDigest
 
 
 class WebSocketStateMiddleware:
@@ -9,8 +10,34 @@ class WebSocketStateMiddleware:
     def __init__(self, app: ASGIApp):
         self._app = app
         self._state = WebSocketState()
+        self._digest = NotificationDigest(self._state)
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send):
         if scope['type'] in ('lifespan', 'http', 'websocket'):
             scope['websockets'] = self._state
+            scope['digest'] = self._digest
+        if scope['type'] == 'lifespan':
+            receive = self._lifespan_receive(receive)
         await self._app(scope, receive, send)
+
+    def _lifespan_receive(self, receive: Receive) -> Receive:
+        """
+            Send pending notification digests on shutdown
+            :param receive: Receive
+            :type receive: Receive
+            :return: Receive
+            :rtype: Receive
+        """
+
+        async def wrapper() -> Message:
+            """
+                Wrapper
+                :return: Message
+                :rtype: Message
+            """
+            message = await receive()
+            if message['type'] == 'lifespan.shutdown':
+                await self._digest.close()
+            return message
+
+        return wrapper
@@ -1,12 +1,13 @@
 import typing
 
-from fastapi import APIRouter, WebSocket, status, Depends, Query
+from fastapi import APIRouter, WebSocket, Request, status, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.endpoints import WebSocketEndpoint
 
 from app.message import views
 from app.message.schemas import MessagesPaginate
 from app.message.state import WebSocketState
+from app.notification.digest import NotificationDigest
 from app.permission import is_active
 from app.schemas import Message
 from db import get_db
@@ -42,19 +43,22 @@ async def get_messages_for_dialogue(
 @message_router.put(
     '/view',
     name='View messages',
-    description='View messages',
+    description='View messages up to message ID (all by default), other user gets read receipt',
     response_description='Message',
     response_model=Message,
     status_code=status.HTTP_200_OK,
     tags=['messages'],
 )
 async def view_messages(
-    ids: list[int],
+    request: Request,
     dialogue_id: int,
+    up_to: typing.Optional[int] = Query(default=None, gt=0),
     db: AsyncSession = Depends(get_db),
     user_id: int = Depends(is_active)
 ):
-    return await views.view_messages(db=db, user_id=user_id, ids=ids, dialogue_id=dialogue_id)
+    return await views.view_messages(
+        db=db, user_id=user_id, dialogue_id=dialogue_id, up_to=up_to, state=request.scope.get('websockets'),
+    )
 
 
 @message_router.websocket_route('/ws/{token}')
@@ -62,7 +66,8 @@ class MessengerRouter(WebSocketEndpoint, views.MessengerView):
 
     async def on_connect(self, websocket: WebSocket) -> None:
         state: typing.Optional[WebSocketState] = self.scope.get('websockets')
-        await self.connect(state, websocket)
+        digest: typing.Optional[NotificationDigest] = self.scope.get('digest')
+        await self.connect(state, websocket, digest)
 
     async def on_disconnect(self, websocket: WebSocket, close_code: int) -> None:
         await self.disconnect(websocket)
@@ -1,4 +1,5 @@
 import datetime
+import typing
 
 from pydantic import BaseModel, validator
 
@@ -26,6 +27,21 @@ class UpdateMessage(DeleteMessage):
     msg: str
 
 
+class SyncMessages(BaseModel):
+    """ Sync messages """
+
+    since_id: typing.Optional[int] = None
+    dialogues: dict[int, int] = {}
+
+
+class ReadMessages(BaseModel):
+    """ Read messages """
+
+    sender_id: int
+    dialogue_id: int
+    up_to: typing.Optional[int] = None
+
+
 class GetMessage(BaseModel):
     """ Get message """
 
@@ -33,7 +49,7 @@ class GetMessage(BaseModel):
     msg: str
     dialogue_id: int
     created_at: datetime.datetime
-    viewed: bool
+    viewed: bool = False
     sender_id: int
 
     @validator('created_at')
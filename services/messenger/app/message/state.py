@@ -1,3 +1,5 @@
+import typing
+
 from fastapi import WebSocket
 
 from app.message.service import websocket_error
@@ -87,3 +89,23 @@ class WebSocketState:
                     'data': data,
                 }
             )
+
+    async def broadcast(self, users_ids: typing.Iterable[int], response_type: str, data: dict) -> None:
+        """
+            Send to connected users only
+            :param users_ids: Users IDs
+            :type users_ids: list
+            :param response_type: Response type
+            :type response_type: str
+            :param data: Data
+            :type data: dict
+            :return: None
+        """
+        for user_id in users_ids:
+            for socket in self._websockets.get(user_id, []):
+                await socket.send_json(
+                    {
+                        'type': response_type,
+                        'data': data,
+                    }
+                )
@@ -2,23 +2,27 @@ import json
 import typing
 
 from fastapi import WebSocket
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud import dialogue_crud, message_crud, notification_crud
-from app.message.schemas import CreateMessage, GetMessage, UpdateMessage, DeleteMessage
+from app.crud import dialogue_crud, message_crud, notification_crud, event_crud
+from app.models import Dialogue
+from app.message.schemas import CreateMessage, UpdateMessage, DeleteMessage, SyncMessages, ReadMessages
 from app.message.service import websocket_error
 from app.message.state import WebSocketState
-from app.models import Message
+from app.notification.digest import NotificationDigest
 from app.requests import sender_profile, get_user, get_sender_data
 from app.schemas import UserData
+from app.serializers import json_response, message_serializer, message_row_serializer
 from app.service import paginate, dialogue_exist
-from config import SEND, CHANGE, DELETE, SERVER_MESSENGER_BACKEND, API
+from config import SEND, CHANGE, DELETE, SYNC, READ, SUCCESS, SYNC_LIMIT, SERVER_MESSENGER_BACKEND, API
 from db import async_session
 
 
+@json_response
 @dialogue_exist('dialogue_id', 'user_id')
 @paginate(
-    message_crud.filter,
+    message_crud.for_dialogue,
     message_crud.exist_page,
     f'{SERVER_MESSENGER_BACKEND}{API}/messages/dialogue',
     'dialogue_id'
@@ -30,7 +34,7 @@ async def get_messages_for_dialogue(
     page: int,
     page_size: int,
     dialogue_id: int,
-    queryset: list[Message]
+    queryset: list[Row]
 ):
     """
         Get messages for dialogue
@@ -48,26 +52,71 @@ async def get_messages_for_dialogue(
         :type queryset: list
         :return: Paginate messages
     """
-    return (message.__dict__ for message in queryset)
+    return message_row_serializer.rows(queryset)
+
+
+async def read_dialogue(
+        db: AsyncSession, dialogue: Dialogue, user_id: int, up_to: typing.Optional[int] = None,
+) -> typing.Optional[dict[str, int]]:
+    """
+        Move user read watermark and record read receipt
+        :param db: DB
+        :type db: AsyncSession
+        :param dialogue: Dialogue
+        :type dialogue: Dialogue
+        :param user_id: User ID
+        :type user_id: int
+        :param up_to: Read up to message ID (all messages by default)
+        :type up_to: int
+        :return: Read receipt (None if watermark hasn't moved)
+        :rtype: dict
+    """
+
+    read_id = await dialogue_crud.read(db, dialogue, user_id, up_to)
+    if read_id is None:
+        return None
+
+    await event_crud.create(
+        db,
+        sender_id=user_id,
+        recipient_id=dialogue.get_recipient_id(user_id),
+        message_id=read_id,
+        dialogue_id=dialogue.id,
+        type=READ,
+    )
+    return {'dialogue_id': dialogue.id, 'reader_id': user_id, 'read_id': read_id}
 
 
 @dialogue_exist('dialogue_id', 'user_id')
-async def view_messages(*, db: AsyncSession, user_id: int, ids: list[int], dialogue_id: int) -> dict[str, str]:
+async def view_messages(
+    *,
+    db: AsyncSession,
+    user_id: int,
+    dialogue_id: int,
+    up_to: typing.Optional[int] = None,
+    state: typing.Optional[WebSocketState] = None,
+) -> dict[str, str]:
     """
-        View messages
+        View messages (move read watermark)
         :param db: DB
         :type db: AsyncSession
         :param user_id: User ID
         :type user_id: int
-        :param ids: IDs
-        :type ids: list
         :param dialogue_id: Dialogue ID
         :type dialogue_id: int
+        :param up_to: Read up to message ID (all messages by default)
+        :type up_to: int
+        :param state: Websockets state
+        :type state: WebSocketState
         :return: Message
         :rtype: dict
     """
 
-    await message_crud.view(db, ids, dialogue_id, user_id)
+    dialogue = await dialogue_crud.get(db, id=dialogue_id)
+    receipt = await read_dialogue(db, dialogue, user_id, up_to)
+
+    if receipt is not None and state is not None:
+        await state.broadcast((user_id, dialogue.get_recipient_id(user_id)), READ, receipt)
     return {'msg': 'Messages has been viewed'}
 
 
@@ -75,21 +124,30 @@ class MessengerView:
 
     def __init__(self):
         self._state: typing.Optional[WebSocketState] = None
+        self._digest: typing.Optional[NotificationDigest] = None
         self._user_id: typing.Optional[int] = None
 
-    async def connect(self, state: typing.Optional[WebSocketState], websocket: WebSocket) -> None:
+    async def connect(
+        self,
+        state: typing.Optional[WebSocketState],
+        websocket: WebSocket,
+        digest: typing.Optional[NotificationDigest] = None,
+    ) -> None:
         """
             Connect websocket
             :param state: Websockets state
             :type state: WebSocketState
             :param websocket: Websocket
             :type websocket: WebSocket
+            :param digest: Notification emails digest
+            :type digest: NotificationDigest
             :return: None
             :raise RuntimeError: State not found
         """
         if state is None:
             raise RuntimeError('State not found')
         self._state = state
+        self._digest = digest
 
         await websocket.accept()
 
@@ -137,6 +195,8 @@ class MessengerView:
             SEND: (self.send_message, CreateMessage),
             CHANGE: (self.update_message, UpdateMessage),
             DELETE: (self.delete_message, DeleteMessage),
+            SYNC: (self.sync_messages, SyncMessages),
+            READ: (self.read_messages, ReadMessages),
         }
 
         try:
@@ -212,6 +272,14 @@ class MessengerView:
                 recipient_id=schema.recipient_id,
                 message_id=msg.id
             )
+            await event_crud.create(
+                db,
+                sender_id=schema.sender_id,
+                recipient_id=schema.recipient_id,
+                message_id=msg.id,
+                dialogue_id=dialogue.id,
+            )
+            viewed: bool = dialogue.viewed(msg)
 
         user_data: dict = await get_sender_data(schema.sender_id)
         await self._state.send(
@@ -219,9 +287,12 @@ class MessengerView:
             recipient_id=schema.recipient_id,
             success_msg='Message has been send',
             response_type=SEND,
-            data={**GetMessage(**msg.__dict__).dict(), 'sender': UserData(**user_data).dict()}
+            data={**message_serializer.row(msg), 'viewed': viewed, 'sender': UserData(**user_data).dict()}
         )
 
+        if self._digest is not None:
+            self._digest.add(schema.sender_id, schema.recipient_id, SEND)
+
     async def update_message(self, websocket: WebSocket, schema: UpdateMessage) -> None:
         """
             Update (change) message
@@ -244,7 +315,7 @@ class MessengerView:
             if msg.sender_id != schema.sender_id:
                 await websocket_error(websocket, {'msg': 'You not send this message'})
                 return
-            msg = await message_crud.update(db, {'id': schema.id}, msg=schema.msg, viewed=False)
+            msg = await message_crud.update(db, {'id': schema.id}, msg=schema.msg)
             dialogue = await dialogue_crud.get(db, id=msg.dialogue_id)
             recipient_id: int = dialogue.get_recipient_id(schema.sender_id)
             await notification_crud.create(
@@ -254,6 +325,15 @@ class MessengerView:
                 message_id=msg.id,
                 type=CHANGE,
             )
+            await event_crud.create(
+                db,
+                sender_id=schema.sender_id,
+                recipient_id=recipient_id,
+                message_id=msg.id,
+                dialogue_id=dialogue.id,
+                type=CHANGE,
+            )
+            viewed: bool = dialogue.viewed(msg)
 
         user_data: dict = await get_sender_data(schema.sender_id)
 
@@ -262,9 +342,12 @@ class MessengerView:
             recipient_id=recipient_id,
             success_msg='Message has been changed',
             response_type=CHANGE,
-            data={**GetMessage(**msg.__dict__).dict(), 'sender': UserData(**user_data).dict()}
+            data={**message_serializer.row(msg), 'viewed': viewed, 'sender': UserData(**user_data).dict()}
         )
 
+        if self._digest is not None:
+            self._digest.add(schema.sender_id, recipient_id, CHANGE)
+
     async def delete_message(self, websocket: WebSocket, schema: DeleteMessage) -> None:
         """
             Delete message
@@ -289,6 +372,14 @@ class MessengerView:
             await message_crud.remove(db, id=schema.id)
             dialogue = await dialogue_crud.get(db, id=msg.dialogue_id)
             recipient_id: int = dialogue.get_recipient_id(schema.sender_id)
+            await event_crud.create(
+                db,
+                sender_id=schema.sender_id,
+                recipient_id=recipient_id,
+                message_id=msg.id,
+                dialogue_id=dialogue.id,
+                type=DELETE,
+            )
 
         user_data: dict = await get_sender_data(schema.sender_id)
 
@@ -299,3 +390,92 @@ class MessengerView:
             response_type=DELETE,
             data={'id': msg.id, 'sender': UserData(**user_data).dict()}
         )
+
+    async def read_messages(self, websocket: WebSocket, schema: ReadMessages) -> None:
+        """
+            Read messages (move read watermark, other user gets read receipt)
+            :param websocket: Websocket
+            :type websocket: WebSocket
+            :param schema: Read data
+            :type schema: ReadMessages
+            :return: None
+        """
+
+        if schema.sender_id not in self._state.get_websockets.keys():
+            await websocket_error(websocket, {'msg': 'Sender not found'})
+            return
+
+        async with async_session() as db:
+            if not await dialogue_crud.exist(db, id=schema.dialogue_id):
+                await websocket_error(websocket, {'msg': 'Dialogue not found'})
+                return
+            dialogue = await dialogue_crud.get(db, id=schema.dialogue_id)
+            if f'{schema.sender_id}' not in dialogue.users_ids.split('_'):
+                await websocket_error(websocket, {'msg': 'You are not in this dialogue'})
+                return
+            receipt = await read_dialogue(db, dialogue, schema.sender_id, schema.up_to)
+
+        if receipt is None:
+            # Nothing new to read, receipt isn't repeated
+            await websocket.send_json({'type': SUCCESS, 'data': {'msg': 'Messages has been viewed'}})
+            return
+
+        await self._state.send(
+            sender_id=schema.sender_id,
+            recipient_id=dialogue.get_recipient_id(schema.sender_id),
+            success_msg='Messages has been viewed',
+            response_type=READ,
+            data=receipt,
+        )
+
+    async def sync_messages(self, websocket: WebSocket, schema: SyncMessages) -> None:
+        """
+            Sync messages (stream events missed since watermark)
+            :param websocket: Websocket
+            :type websocket: WebSocket
+            :param schema: Watermarks
+            :type schema: SyncMessages
+            :return: None
+        """
+
+        async with async_session() as db:
+            events = await event_crud.since(
+                db, self._user_id, schema.since_id, schema.dialogues, limit=SYNC_LIMIT + 1,
+            )
+            more: bool = len(events) > SYNC_LIMIT
+            events = events[:SYNC_LIMIT]
+
+            if events:
+                watermark: int = events[-1][0].id
+            else:
+                watermark: int = await event_crud.watermark(db, self._user_id)
+
+        senders: dict[int, dict] = {}
+        for event, msg, viewed in events:
+            if event.type not in (DELETE, READ) and msg is None:
+                # Message was deleted later, its DELETE event is in this stream too
+                continue
+
+            if event.sender_id not in senders:
+                senders[event.sender_id] = UserData(**await get_sender_data(event.sender_id)).dict()
+
+            if event.type == DELETE:
+                data = {'id': event.message_id, 'dialogue_id': event.dialogue_id}
+            elif event.type == READ:
+                data = {'dialogue_id': event.dialogue_id, 'reader_id': event.sender_id, 'read_id': event.message_id}
+            else:
+                data = {**message_serializer.row(msg), 'viewed': viewed}
+
+            await websocket.send_json(
+                {
+                    'type': event.type,
+                    'data': {**data, 'sender': senders[event.sender_id], 'event_id': event.id},
+                }
+            )
+
+        await websocket.send_json(
+            {
+                'type': SYNC,
+                'data': {'watermark': watermark, 'more': more},
+            }
+        )
@@ -12,6 +12,9 @@ class Message(Base):
     """ Message """
 
     __tablename__ = 'message'
+    __table_args__ = (
+        sqlalchemy.Index('ix_message_dialogue_id_id', 'dialogue_id', 'id'),
+    )
 
     id: int = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
     sender_id: int = sqlalchemy.Column(sqlalchemy.Integer, nullable=False)
@@ -19,7 +22,6 @@ class Message(Base):
     created_at: datetime.datetime = sqlalchemy.Column(
         sqlalchemy.DateTime, default=datetime.datetime.utcnow, nullable=False,
     )
-    viewed: bool = sqlalchemy.Column(sqlalchemy.Boolean, default=False, nullable=False)
 
     dialogue_id: int = sqlalchemy.Column(
         sqlalchemy.Integer, sqlalchemy.ForeignKey('dialogue.id', ondelete='CASCADE'), nullable=False,
@@ -40,6 +42,9 @@ class Dialogue(Base):
 
     id: int = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
     users_ids: str = sqlalchemy.Column(sqlalchemy.String, nullable=False, unique=True)
+    # Read watermarks (last read message ID) of the first and second user in users_ids
+    first_read_id: int = sqlalchemy.Column(sqlalchemy.Integer, default=0, nullable=False)
+    second_read_id: int = sqlalchemy.Column(sqlalchemy.Integer, default=0, nullable=False)
 
     messages: typing.Union[relationship, list[Message]] = relationship(
         Message, backref='dialogue', cascade='all, delete',
@@ -63,11 +68,73 @@ class Dialogue(Base):
         del users[users.index(f'{sender_id}')]
         return int(users[0])
 
+    def read_column(self, user_id: int) -> str:
+        """
+            Read watermark column of user
+            :param user_id: User ID
+            :type user_id: int
+            :return: Column name
+            :rtype: str
+        """
+        return 'first_read_id' if self.users_ids.split('_')[0] == f'{user_id}' else 'second_read_id'
+
+    def read_id(self, user_id: int) -> int:
+        """
+            Read watermark of user
+            :param user_id: User ID
+            :type user_id: int
+            :return: Last read message ID
+            :rtype: int
+        """
+        return getattr(self, self.read_column(user_id))
+
+    def viewed(self, message: Message) -> bool:
+        """
+            Message viewed by recipient?
+            :param message: Message
+            :type message: Message
+            :return: Viewed?
+            :rtype: bool
+        """
+        return message.id <= self.read_id(self.get_recipient_id(message.sender_id))
+
+    @classmethod
+    def is_first_of(cls, user_id: typing.Any) -> sqlalchemy.sql.ColumnElement:
+        """
+            User is first in dialogue users (SQL expression)
+            :param user_id: User ID or user ID column
+            :return: Is first?
+        """
+        # Bind user ID as text, asyncpg rejects int for varchar parameter
+        user_id = f'{user_id}' if isinstance(user_id, int) else sqlalchemy.cast(user_id, sqlalchemy.String)
+        return sqlalchemy.func.split_part(cls.users_ids, '_', 1) == user_id
+
+    @classmethod
+    def read_id_of(cls, user_id: typing.Any) -> sqlalchemy.sql.ColumnElement:
+        """
+            Read watermark of user (SQL expression)
+            :param user_id: User ID or user ID column
+            :return: Last read message ID
+        """
+        return sqlalchemy.case((cls.is_first_of(user_id), cls.first_read_id), else_=cls.second_read_id)
+
+    @classmethod
+    def recipient_read_id_of(cls, sender_id: typing.Any) -> sqlalchemy.sql.ColumnElement:
+        """
+            Read watermark of other user than sender (SQL expression)
+            :param sender_id: Sender ID or sender ID column
+            :return: Last read message ID
+        """
+        return sqlalchemy.case((cls.is_first_of(sender_id), cls.second_read_id), else_=cls.first_read_id)
+
 
 class Notification(Base):
     """ Notification """
 
     __tablename__ = 'notification'
+    __table_args__ = (
+        sqlalchemy.Index('ix_notification_recipient_id_id', 'recipient_id', 'id'),
+    )
 
     id: int = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
     type: str = sqlalchemy.Column(sqlalchemy.String, nullable=False, default=SEND)
@@ -77,10 +144,40 @@ class Notification(Base):
         sqlalchemy.Integer, sqlalchemy.ForeignKey('message.id', ondelete='CASCADE'), nullable=False,
     )
 
-    message = relationship('Message', back_populates='notification', uselist=False, lazy='selectin')
+    message = relationship('Message', back_populates='notification', uselist=False, lazy='raise')
 
     def __str__(self):
         return f'<Notification {self.id}>'
 
     def __repr__(self):
         return f'<Notification {self.id}>'
+
+
+class Event(Base):
+    """ Message event (sync log) """
+
+    __tablename__ = 'event'
+    __table_args__ = (
+        sqlalchemy.Index('ix_event_dialogue_id_id', 'dialogue_id', 'id'),
+        sqlalchemy.Index('ix_event_sender_id_id', 'sender_id', 'id'),
+        sqlalchemy.Index('ix_event_recipient_id_id', 'recipient_id', 'id'),
+    )
+
+    id: int = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
+    type: str = sqlalchemy.Column(sqlalchemy.String, nullable=False, default=SEND)
+    message_id: int = sqlalchemy.Column(sqlalchemy.Integer, nullable=False)
+    sender_id: int = sqlalchemy.Column(sqlalchemy.Integer, nullable=False)
+    recipient_id: int = sqlalchemy.Column(sqlalchemy.Integer, nullable=False)
+    created_at: datetime.datetime = sqlalchemy.Column(
+        sqlalchemy.DateTime, default=datetime.datetime.utcnow, nullable=False,
+    )
+
+    dialogue_id: int = sqlalchemy.Column(
+        sqlalchemy.Integer, sqlalchemy.ForeignKey('dialogue.id', ondelete='CASCADE'), nullable=False,
+    )
+
+    def __str__(self):
+        return f'<Event {self.id}>'
+
+    def __repr__(self):
+        return f'<Event {self.id}>'
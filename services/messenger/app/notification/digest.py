@@ -0,0 +1,118 @@
+import asyncio
+import contextlib
+import typing
+
+from app.message.state import WebSocketState
+from app.send_email import send_notification_digest
+from config import NOTIFICATION_DIGEST_WINDOW, NOTIFICATION_DIGEST_RETRY_MAX, SEND, CHANGE
+
+
+class NotificationDigest:
+    """ Coalesce notification emails per recipient over a window """
+
+    def __init__(self, state: WebSocketState, window: int = NOTIFICATION_DIGEST_WINDOW):
+        self._state = state
+        self._window = window
+        self._pending: dict[int, dict] = {}
+        self._attempts: dict[int, int] = {}
+        self._task: typing.Optional[asyncio.Task] = None
+
+    @property
+    def get_pending(self) -> dict[int, dict]:
+        """
+            Get pending notifications
+            :return: Pending notifications per recipient
+            :rtype: dict
+        """
+        return self._pending
+
+    def add(self, sender_id: int, recipient_id: int, notification_type: str = SEND) -> None:
+        """
+            Add notification to digest, skip online recipients
+            :param sender_id: Sender ID
+            :type sender_id: int
+            :param recipient_id: Recipient ID
+            :type recipient_id: int
+            :param notification_type: Notification type
+            :type notification_type: str
+            :return: None
+        """
+        if recipient_id in self._state.get_websockets.keys():
+            return
+
+        if recipient_id not in self._pending.keys():
+            self._pending[recipient_id] = {SEND: 0, CHANGE: 0, 'senders': set()}
+        self._pending[recipient_id][notification_type] += 1
+        self._pending[recipient_id]['senders'].add(sender_id)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        """
+            Flush after window
+            :return: None
+        """
+        await asyncio.sleep(self._window)
+        await self.flush()
+        # Failed digests and notifications added while sending wait for next window
+        if self._pending:
+            self._task = asyncio.create_task(self._flush_later())
+
+    def _merge(self, pending: dict[int, dict], failed: bool = True) -> None:
+        """
+            Return unsent digests to pending (up to NOTIFICATION_DIGEST_RETRY_MAX failed attempts per recipient)
+            :param pending: Unsent notifications per recipient
+            :type pending: dict
+            :param failed: Sending failed? (not counted if it was interrupted)
+            :type failed: bool
+            :return: None
+        """
+        for recipient_id, data in pending.items():
+            self._attempts[recipient_id] = self._attempts.get(recipient_id, 0) + failed
+            if self._attempts[recipient_id] >= NOTIFICATION_DIGEST_RETRY_MAX:
+                print(f'Notification digest for user {recipient_id} has been dropped')
+                del self._attempts[recipient_id]
+                continue
+
+            if recipient_id not in self._pending.keys():
+                self._pending[recipient_id] = {SEND: 0, CHANGE: 0, 'senders': set()}
+            for notification_type in (SEND, CHANGE):
+                self._pending[recipient_id][notification_type] += data[notification_type]
+            self._pending[recipient_id]['senders'] |= data['senders']
+
+    async def flush(self) -> None:
+        """
+            Send digests for pending recipients that are still offline
+            :return: None
+        """
+        pending, self._pending = self._pending, {}
+        pending = {
+            recipient_id: data for recipient_id, data in pending.items()
+            if recipient_id not in self._state.get_websockets.keys()
+        }
+
+        try:
+            await send_notification_digest(pending)
+        except asyncio.CancelledError:
+            self._merge(pending, failed=False)
+            raise
+        except Exception as _ex:
+            print(_ex)
+            self._merge(pending)
+            return
+
+        for recipient_id in pending.keys():
+            self._attempts.pop(recipient_id, None)
+
+    async def close(self) -> None:
+        """
+            Send pending digests now (shutdown)
+            :return: None
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        self._task = None
+        await self.flush()
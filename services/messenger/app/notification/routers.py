@@ -2,7 +2,7 @@ from fastapi import APIRouter, status, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.notification import views
-from app.notification.schemas import GetNotification
+from app.notification.schemas import GetNotification, NotificationsCount
 from app.permission import is_active
 from app.schemas import Message
 from db import get_db
@@ -23,6 +23,19 @@ async def get_notifications(user_id: int = Depends(is_active), db: AsyncSession
     return await views.get_notifications(db, user_id)
 
 
+@notification_router.get(
+    '/count',
+    name='Notifications count',
+    description='Unviewed notifications count',
+    response_description='Count',
+    status_code=status.HTTP_200_OK,
+    response_model=NotificationsCount,
+    tags=['notifications'],
+)
+async def count_notifications(user_id: int = Depends(is_active), db: AsyncSession = Depends(get_db)):
+    return await views.count_notifications(db, user_id)
+
+
 @notification_router.get(
     '/{pk}',
     name='Get notification',
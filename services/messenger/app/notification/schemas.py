@@ -9,3 +9,9 @@ class GetNotification(BaseModel):
     id: int
     type: str
     data: GetMessage
+
+
+class NotificationsCount(BaseModel):
+    """ Notifications count """
+
+    count: int
@@ -1,7 +1,9 @@
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.crud import notification_crud
+from app.models import Notification
 from config import NOTIFICATION_LIMIT
 
 
@@ -19,7 +21,9 @@ async def get_notifications(db: AsyncSession, user_id: int):
         {
             **notification.__dict__,
             'data': notification.message.__dict__
-        } for notification in await notification_crud.filter(db, limit=NOTIFICATION_LIMIT, recipient_id=user_id)
+        } for notification in await notification_crud.filter(
+            db, limit=NOTIFICATION_LIMIT, options=(selectinload(Notification.message),), recipient_id=user_id,
+        )
     )
 
 
@@ -40,7 +44,7 @@ async def get_notification(db: AsyncSession, user_id: int, pk: int) -> dict:
 
     if not await notification_crud.exist(db, id=pk):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Notification not found')
-    notification = await notification_crud.get(db, id=pk)
+    notification = await notification_crud.get(db, id=pk, options=(selectinload(Notification.message),))
 
     if notification.recipient_id != user_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='You not owner this notification')
@@ -51,6 +55,20 @@ async def get_notification(db: AsyncSession, user_id: int, pk: int) -> dict:
     }
 
 
+async def count_notifications(db: AsyncSession, user_id: int) -> dict[str, int]:
+    """
+        Unviewed notifications count
+        :param db: DB
+        :type db: AsyncSession
+        :param user_id: User ID
+        :type user_id: int
+        :return: Count
+        :rtype: dict
+    """
+
+    return {'count': await notification_crud.count(db, user_id)}
+
+
 async def view_notifications(db: AsyncSession, user_id: int) -> dict[str, str]:
     """
         View notifications
@@ -62,9 +80,10 @@ async def view_notifications(db: AsyncSession, user_id: int) -> dict[str, str]:
         :rtype: dict
     """
 
-    await notification_crud.view(db, limit=NOTIFICATION_LIMIT, recipient_id=user_id)
+    viewed = await notification_crud.view(db, limit=NOTIFICATION_LIMIT, recipient_id=user_id)
 
-    if await notification_crud.exist(db, recipient_id=user_id):
+    # Short page means nothing was left
+    if len(viewed) == NOTIFICATION_LIMIT and await notification_crud.exist(db, recipient_id=user_id):
         return {'msg': 'Notifications has been viewed. You have more notifications'}
     return {'msg': 'Notifications has been viewed. You don\'t have more notifications'}
 
@@ -84,12 +103,9 @@ async def view_notification(db: AsyncSession, user_id: int, pk: int) -> dict[str
         :raise HTTPException 400: User not owner this notification
     """
 
+    if await notification_crud.view_one(db, pk, user_id):
+        return {'msg': 'Notification has been viewed'}
+
     if not await notification_crud.exist(db, id=pk):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Notification not found')
-    notification = await notification_crud.get(db, id=pk)
-
-    if notification.recipient_id != user_id:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='You not owner this notification')
-
-    await notification_crud.remove(db, id=pk)
-    return {'msg': 'Notification has been viewed'}
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='You not owner this notification')
@@ -1,3 +1,4 @@
+import asyncio
 import typing
 
 import aiohttp
@@ -36,6 +37,39 @@ async def get_user(user_id: int) -> dict:
     return await get_user_request(user_id)
 
 
+async def get_users_request(ids: list[int]) -> dict[str, dict]:
+    """
+        Get users request
+        :param ids: Users IDs
+        :type ids: list
+        :return: User profiles by ID
+        :rtype: dict
+        :raise ValueError: Bad response
+    """
+
+    async with aiohttp.ClientSession() as session:
+        response = await session.post(url=f'{SERVER_AUTH_BACKEND}{API}/profile/ids', json=ids)
+
+        json = await response.json()
+        if not response.ok:
+            raise ValueError(json['detail'])
+
+    return json
+
+
+async def get_users(ids: list[int]) -> dict[str, dict]:
+    """
+        Get users (one request for all users)
+        :param ids: Users IDs
+        :type ids: list
+        :return: User profiles by ID
+        :rtype: dict
+    """
+    if not ids:
+        return {}
+    return await get_users_request(ids)
+
+
 async def get_sender_data_request(user_id: int) -> dict:
     """
         Get sender data request
@@ -127,3 +161,42 @@ async def get_user_data_and_server_token(user_id: int) -> typing.Optional[tuple[
         response.raise_for_status()
         json = await response.json()
     return access_token, json
+
+
+async def get_users_data_and_server_token(users_ids: list[int]) -> typing.Optional[tuple[str, dict[int, dict]]]:
+    """
+        Get users data and server token (one login for all users, unknown users are skipped)
+        :param users_ids: Users IDs
+        :type users_ids: list
+        :return: Server token and users data per user ID
+        :rtype: tuple
+    """
+    if int(TEST):
+        return
+
+    async with aiohttp.ClientSession() as session:
+        response = await session.post(
+            url=f'{SERVER_AUTH_BACKEND}{API}/login',
+            data={'username': SERVER_USER_USERNAME, 'password': SERVER_USER_PASSWORD}
+        )
+        response.raise_for_status()
+        json = await response.json()
+
+        access_token = json['access_token']
+        headers = {'Authorization': f'Bearer {access_token}'}
+
+        async def get_user_data(user_id: int) -> dict:
+            user_response = await session.get(url=f'{SERVER_AUTH_BACKEND}{API}/admin/user/{user_id}', headers=headers)
+            user_response.raise_for_status()
+            return await user_response.json()
+
+        users = await asyncio.gather(*(get_user_data(user_id) for user_id in users_ids), return_exceptions=True)
+
+    users_data: dict[int, dict] = {}
+    for user_id, user_data in zip(users_ids, users):
+        # One deleted or unknown user doesn't fail the others
+        if isinstance(user_data, Exception):
+            print(f'User {user_id} not found: {user_data}')
+            continue
+        users_data[user_id] = user_data
+    return access_token, users_data
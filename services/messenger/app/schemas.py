@@ -1,6 +1,8 @@
 import typing
 
-from pydantic import BaseModel
+from pydantic import BaseModel, root_validator
+
+from config import SENDER_AVATAR_SIZE
 
 
 class Message(BaseModel):
@@ -16,6 +18,15 @@ class UserData(BaseModel):
     username: str
     avatar: str
 
+    @root_validator(pre=True)
+    def set_avatar(cls, values):
+        """ Thumbnail instead of the original avatar """
+
+        avatars = values.get('avatars') or {}
+        if SENDER_AVATAR_SIZE in avatars:
+            return {**values, 'avatar': avatars[SENDER_AVATAR_SIZE]}
+        return values
+
 
 class Paginate(BaseModel):
     """ Paginate """
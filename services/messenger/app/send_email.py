@@ -1,26 +1,34 @@
-from app.models import Notification
-from app.requests import get_user_data_and_server_token
-from config import TEST, PROJECT_NAME, SERVER_MESSENGER_BACKEND, API
-from send_email import send_email
+from app.requests import get_users_data_and_server_token
+from config import TEST, PROJECT_NAME, SERVER_MESSENGER_BACKEND, API, SEND, CHANGE
+from send_email import send_emails
 
 
-async def send_notification_email(notification: Notification) -> None:
+async def send_notification_digest(pending: dict[int, dict]) -> None:
     """
-        Send notification email
-        :param notification: Notification
-        :type notification: Notification
+        Send notification digest emails
+        :param pending: Pending notifications per recipient
+        :type pending: dict
         :return: None
     """
 
-    if int(TEST):
+    if int(TEST) or not pending:
         return
 
-    server_token, user_data = await get_user_data_and_server_token(notification.recipient_id)
-    await send_email(
+    server_token, users_data = await get_users_data_and_server_token(list(pending.keys()))
+    await send_emails(
         server_token,
-        user_data['email'],
-        f'{notification.type.lower().title()} message email - {PROJECT_NAME}',
-        'notification.html',
-        username=user_data['username'],
-        link=f'{SERVER_MESSENGER_BACKEND}{API}/notifications/{notification.id}',
+        f'New messages - {PROJECT_NAME}',
+        'digest.html',
+        [
+            (
+                user_data['email'],
+                {
+                    'username': user_data['username'],
+                    'messages': pending[user_id][SEND],
+                    'changed': pending[user_id][CHANGE],
+                    'senders': len(pending[user_id]['senders']),
+                    'link': f'{SERVER_MESSENGER_BACKEND}{API}/notifications/',
+                }
+            ) for user_id, user_data in users_data.items()
+        ],
     )
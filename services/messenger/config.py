@@ -21,6 +21,8 @@ SERVER_USER_EMAIL = os.environ.get('SERVER_EMAIL', 'SERVER_EMAIL')
 SERVER_USER_USERNAME = os.environ.get('SERVER_USERNAME', 'SERVER_USERNAME')
 SERVER_USER_PASSWORD = os.environ.get('SERVER_PASSWORD', 'SERVER_PASSWORD')
 
+SENDER_AVATAR_SIZE = os.environ.get('SENDER_AVATAR_SIZE', '64')
+
 # DB
 DB_USER = os.environ.get('DB_USER', 'messenger_user')
 DB_PASSWORD = os.environ.get('DB_PASSWORD', 'messenger_user')
@@ -32,11 +34,20 @@ DATABASE_URL = f'postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT
 SEND = 'SEND'
 CHANGE = 'CHANGE'
 DELETE = 'DELETE'
+SYNC = 'SYNC'
+READ = 'READ'
 SUCCESS = 'SUCCESS'
 ERROR = 'ERROR'
 
 NOTIFICATION_LIMIT = 100
+SYNC_LIMIT = int(os.environ.get('SYNC_LIMIT', 500))
+# Seconds to coalesce notification emails for one recipient
+NOTIFICATION_DIGEST_WINDOW = int(os.environ.get('NOTIFICATION_DIGEST_WINDOW', 300))
+# Windows to retry failed digest for one recipient
+NOTIFICATION_DIGEST_RETRY_MAX = int(os.environ.get('NOTIFICATION_DIGEST_RETRY_MAX', 3))
 
 if int(TEST):
     DATABASE_URL = f'postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}_test'
     NOTIFICATION_LIMIT = 2
+    SYNC_LIMIT = 2
+    NOTIFICATION_DIGEST_WINDOW = 0
@@ -38,3 +38,39 @@ async def send_email(server_token: str, recipient: str, subject: str, template:
                 'client_name': f'{CLIENT_NAME}',
             }
         )
+
+
+async def send_emails(server_token: str, subject: str, template: str, emails: list[tuple[str, dict]]) -> None:
+    """
+        Send emails (one batch request for all emails)
+        :param server_token: Server token
+        :type server_token: str
+        :param subject: Subject
+        :type subject: str
+        :param template: Template
+        :type template: str
+        :param emails: Recipients with their data
+        :type emails: list
+        :return: None
+    """
+    if int(TEST) or not emails:
+        return
+
+    async with aiohttp.ClientSession() as session:
+        response = await session.post(
+            url=f'{SERVER_EMAIL}{API}/clients/name?client_name={CLIENT_NAME}',
+            headers={'Authorization': f'Bearer {server_token}'}
+        )
+        response.raise_for_status()
+        json = await response.json()
+
+        response = await session.post(
+            url=f'{SERVER_EMAIL}{API}/send/batch', json={
+                'recipients': [{'recipient': recipient, 'data': data} for recipient, data in emails],
+                'subject': subject,
+                'template': template,
+                'secret': json['secret'],
+                'client_name': f'{CLIENT_NAME}',
+            }
+        )
+        response.raise_for_status()
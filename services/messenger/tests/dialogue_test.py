@@ -1,6 +1,7 @@
 from unittest import TestCase, mock
 
-from app.crud import dialogue_crud
+from app.crud import dialogue_crud, message_crud
+from config import SERVER_MESSENGER_BACKEND, API
 from tests import BaseTest, async_loop
 
 
@@ -89,3 +90,76 @@ class DialogueTestCase(BaseTest, TestCase):
                     {'id': 1, 'users_ids': '2_1'},
                 ]
             )
+
+    def test_inbox(self):
+        headers = {'Authorization': 'Bearer Token'}
+
+        async_loop(message_crud.create(self.session, sender_id=2, msg='Hello', dialogue_id=1))
+        async_loop(message_crud.create(self.session, sender_id=2, msg='Are you here?', dialogue_id=1))
+        async_loop(message_crud.create(self.session, sender_id=4, msg='Hi', dialogue_id=2))
+        async_loop(message_crud.create(self.session, sender_id=1, msg='Yes', dialogue_id=1))
+        async_loop(message_crud.create(self.session, sender_id=11, msg='Not for 1', dialogue_id=4))
+
+        def last_message(pk: int) -> dict:
+            message = async_loop(message_crud.get(self.session, id=pk))
+            return {
+                'id': message.id,
+                'msg': message.msg,
+                'sender_id': message.sender_id,
+                'created_at': f'{message.created_at}Z'.replace(' ', 'T'),
+                'viewed': False,
+            }
+
+        users = {'2': self.get_new_user(2), '4': self.get_new_user(4)}
+
+        with mock.patch('app.permission.permission', return_value=1) as _:
+            with mock.patch('app.requests.get_users_request', return_value=users) as get_users:
+                response = self.client.get(f'{self.url}/dialogues/inbox', headers=headers)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(get_users.call_count, 1)
+                self.assertEqual(
+                    response.json(), {
+                        'next': None,
+                        'cursor': None,
+                        'results': [
+                            {
+                                'id': 1,
+                                'users_ids': '2_1',
+                                'last_message': last_message(4),
+                                'unread': 2,
+                                'user': self.get_new_user(2),
+                            },
+                            {
+                                'id': 2,
+                                'users_ids': '1_4',
+                                'last_message': last_message(3),
+                                'unread': 1,
+                                'user': self.get_new_user(4),
+                            },
+                        ],
+                    }
+                )
+
+                # Cursor
+                response = self.client.get(f'{self.url}/dialogues/inbox?page_size=1', headers=headers)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual([dialogue['id'] for dialogue in response.json()['results']], [1])
+                self.assertEqual(response.json()['cursor'], 4)
+                self.assertEqual(
+                    response.json()['next'], f'{SERVER_MESSENGER_BACKEND}{API}/dialogues/inbox?cursor=4&page_size=1',
+                )
+
+                response = self.client.get(f'{self.url}/dialogues/inbox?page_size=1&cursor=4', headers=headers)
+                self.assertEqual([dialogue['id'] for dialogue in response.json()['results']], [2])
+                self.assertEqual(response.json()['cursor'], 3)
+
+                response = self.client.get(f'{self.url}/dialogues/inbox?page_size=1&cursor=3', headers=headers)
+                self.assertEqual(response.json(), {'next': None, 'cursor': None, 'results': []})
+
+        # Last message changes order
+        async_loop(message_crud.create(self.session, sender_id=4, msg='Hello again', dialogue_id=2))
+        with mock.patch('app.permission.permission', return_value=1) as _:
+            with mock.patch('app.requests.get_users_request', return_value=users) as _:
+                response = self.client.get(f'{self.url}/dialogues/inbox', headers=headers)
+                self.assertEqual([dialogue['id'] for dialogue in response.json()['results']], [2, 1])
+                self.assertEqual(response.json()['results'][0]['unread'], 2)
@@ -0,0 +1,85 @@
+from unittest import TestCase, mock
+
+from app.message.state import WebSocketState
+from app.notification.digest import NotificationDigest
+from config import SEND, CHANGE, NOTIFICATION_DIGEST_RETRY_MAX
+from tests import async_loop
+
+
+class NotificationDigestTestCase(TestCase):
+
+    def setUp(self) -> None:
+        self.state = WebSocketState()
+        self.digest = NotificationDigest(self.state, window=3600)
+
+    def test_coalesce(self):
+        async def add():
+            self.digest.add(1, 2, SEND)
+            self.digest.add(1, 2, SEND)
+            self.digest.add(3, 2, SEND)
+            self.digest.add(1, 2, CHANGE)
+            self.digest.add(2, 3, SEND)
+
+        async_loop(add())
+        self.assertEqual(
+            self.digest.get_pending,
+            {
+                2: {SEND: 3, CHANGE: 1, 'senders': {1, 3}},
+                3: {SEND: 1, CHANGE: 0, 'senders': {2}},
+            }
+        )
+
+        with mock.patch('app.notification.digest.send_notification_digest') as send:
+            async_loop(self.digest.flush())
+            send.assert_called_once_with(
+                {
+                    2: {SEND: 3, CHANGE: 1, 'senders': {1, 3}},
+                    3: {SEND: 1, CHANGE: 0, 'senders': {2}},
+                }
+            )
+        self.assertEqual(self.digest.get_pending, {})
+
+    def test_skip_online_recipient(self):
+        self.state.add(2, mock.Mock())
+
+        async def add():
+            self.digest.add(1, 2, SEND)
+            self.digest.add(2, 3, SEND)
+
+        async_loop(add())
+        self.assertEqual(self.digest.get_pending, {3: {SEND: 1, CHANGE: 0, 'senders': {2}}})
+
+        self.state.add(3, mock.Mock())
+        with mock.patch('app.notification.digest.send_notification_digest') as send:
+            async_loop(self.digest.flush())
+            send.assert_called_once_with({})
+
+    def test_send_failure(self):
+        async def add():
+            self.digest.add(1, 2, SEND)
+
+        async_loop(add())
+        with mock.patch('app.notification.digest.send_notification_digest', side_effect=ValueError) as send:
+            async_loop(self.digest.flush())
+            send.assert_called_once_with({2: {SEND: 1, CHANGE: 0, 'senders': {1}}})
+        self.assertEqual(self.digest.get_pending, {2: {SEND: 1, CHANGE: 0, 'senders': {1}}})
+
+        # Notifications added after failure are merged
+        async_loop(add())
+        self.assertEqual(self.digest.get_pending, {2: {SEND: 2, CHANGE: 0, 'senders': {1}}})
+
+        with mock.patch('app.notification.digest.send_notification_digest', side_effect=ValueError) as send:
+            for _ in range(NOTIFICATION_DIGEST_RETRY_MAX - 1):
+                async_loop(self.digest.flush())
+            self.assertEqual(send.call_count, NOTIFICATION_DIGEST_RETRY_MAX - 1)
+        self.assertEqual(self.digest.get_pending, {})
+
+    def test_close(self):
+        async def add():
+            self.digest.add(1, 2, SEND)
+
+        async_loop(add())
+        with mock.patch('app.notification.digest.send_notification_digest') as send:
+            async_loop(self.digest.close())
+            send.assert_called_once_with({2: {SEND: 1, CHANGE: 0, 'senders': {1}}})
+        self.assertEqual(self.digest.get_pending, {})
@@ -21,82 +21,70 @@ class MessageTestCase(BaseTest, TestCase):
 
     def test_view_messages(self):
         self.assertEqual(len(async_loop(message_crud.all(self.session))), 2)
-        self.assertEqual(async_loop(message_crud.get(self.session, id=1)).viewed, False)
-        self.assertEqual(async_loop(message_crud.get(self.session, id=2)).viewed, False)
+        self.assertEqual(async_loop(dialogue_crud.get(self.session, id=1)).read_id(2), 0)
 
         async_loop(
-            message_crud.create(self.session, dialogue_id=2, sender_id=1, msg='Hello world!')
+            message_crud.create(self.session, dialogue_id=2, sender_id=3, msg='Hello world!')
+        )
+        async_loop(
+            message_crud.create(self.session, dialogue_id=1, sender_id=2, msg='Hello world!')
         )
-        self.assertEqual(async_loop(message_crud.get(self.session, id=3)).viewed, False)
 
         headers = {'Authorization': 'Bearer Token'}
 
+        # Own messages only, watermark doesn't move
         with mock.patch('app.permission.permission', return_value=1) as _:
-            response = self.client.put(
-                f'{self.url}/messages/view?dialogue_id=1', json=[1], headers=headers
-            )
+            response = self.client.put(f'{self.url}/messages/view?dialogue_id=1', headers=headers)
             self.assertEqual(response.status_code, 200)
             self.assertEqual(response.json(), {'msg': 'Messages has been viewed'})
             async_loop(self.session.commit())
-            self.assertEqual(async_loop(message_crud.get(self.session, id=1)).viewed, False)
-            self.assertEqual(async_loop(message_crud.get(self.session, id=2)).viewed, False)
+            self.assertEqual(async_loop(dialogue_crud.get(self.session, id=1)).read_id(1), 4)
+            self.assertEqual(async_loop(dialogue_crud.get(self.session, id=1)).read_id(2), 0)
 
         with mock.patch('app.permission.permission', return_value=2) as _:
-            response = self.client.put(
-                f'{self.url}/messages/view?dialogue_id=143', json=[1, 2], headers=headers
-            )
+            response = self.client.put(f'{self.url}/messages/view?dialogue_id=143', headers=headers)
             self.assertEqual(response.status_code, 400)
             self.assertEqual(response.json(), {'detail': 'Dialogue not found'})
-            async_loop(self.session.commit())
-            self.assertEqual(async_loop(message_crud.get(self.session, id=1)).viewed, False)
-            self.assertEqual(async_loop(message_crud.get(self.session, id=2)).viewed, False)
 
         with mock.patch('app.permission.permission', return_value=143) as _:
-            response = self.client.put(
-                f'{self.url}/messages/view?dialogue_id=1', json=[1, 2], headers=headers
-            )
+            response = self.client.put(f'{self.url}/messages/view?dialogue_id=1', headers=headers)
             self.assertEqual(response.status_code, 400)
             self.assertEqual(response.json(), {'detail': 'You are not in this dialogue'})
-            async_loop(self.session.commit())
-            self.assertEqual(async_loop(message_crud.get(self.session, id=1)).viewed, False)
-            self.assertEqual(async_loop(message_crud.get(self.session, id=2)).viewed, False)
 
         with mock.patch('app.permission.permission', return_value=2) as _:
-            response = self.client.put(
-                f'{self.url}/messages/view?dialogue_id=1', json=[1], headers=headers
-            )
+            # Up to message
+            response = self.client.put(f'{self.url}/messages/view?dialogue_id=1&up_to=1', headers=headers)
             self.assertEqual(response.status_code, 200)
             self.assertEqual(response.json(), {'msg': 'Messages has been viewed'})
             async_loop(self.session.commit())
-            self.assertEqual(async_loop(message_crud.get(self.session, id=1)).viewed, True)
-            self.assertEqual(async_loop(message_crud.get(self.session, id=2)).viewed, False)
+            self.assertEqual(async_loop(dialogue_crud.get(self.session, id=1)).read_id(2), 1)
 
-            response = self.client.put(
-                f'{self.url}/messages/view?dialogue_id=1', json=[1, 2], headers=headers
+            response = self.client.get(
+                f'{self.url}/messages/dialogue?page=1&page_size=3&dialogue_id=1', headers=headers,
             )
+            self.assertEqual([message['viewed'] for message in response.json()['results']], [True, False, True])
+
+            # All, watermark never moves back
+            response = self.client.put(f'{self.url}/messages/view?dialogue_id=1', headers=headers)
             self.assertEqual(response.status_code, 200)
-            self.assertEqual(response.json(), {'msg': 'Messages has been viewed'})
             async_loop(self.session.commit())
-            self.assertEqual(async_loop(message_crud.get(self.session, id=1)).viewed, True)
-            self.assertEqual(async_loop(message_crud.get(self.session, id=2)).viewed, True)
+            self.assertEqual(async_loop(dialogue_crud.get(self.session, id=1)).read_id(2), 2)
 
-            response = self.client.put(
-                f'{self.url}/messages/view?dialogue_id=1', json=[3], headers=headers
-            )
+            response = self.client.put(f'{self.url}/messages/view?dialogue_id=1&up_to=1', headers=headers)
             self.assertEqual(response.status_code, 200)
-            self.assertEqual(response.json(), {'msg': 'Messages has been viewed'})
             async_loop(self.session.commit())
-            self.assertEqual(async_loop(message_crud.get(self.session, id=3)).viewed, False)
+            self.assertEqual(async_loop(dialogue_crud.get(self.session, id=1)).read_id(2), 2)
 
-        with mock.patch('app.permission.permission', return_value=2) as _:
-            response = self.client.put(
-                f'{self.url}/messages/view?dialogue_id=2', json=[3], headers=headers
+            response = self.client.get(
+                f'{self.url}/messages/dialogue?page=1&page_size=3&dialogue_id=1', headers=headers,
             )
+            self.assertEqual([message['viewed'] for message in response.json()['results']], [True, True, True])
+
+            response = self.client.put(f'{self.url}/messages/view?dialogue_id=2', headers=headers)
             self.assertEqual(response.status_code, 200)
-            self.assertEqual(response.json(), {'msg': 'Messages has been viewed'})
             async_loop(self.session.commit())
-
-        self.assertEqual(async_loop(message_crud.get(self.session, id=3)).viewed, True)
+            self.assertEqual(async_loop(dialogue_crud.get(self.session, id=2)).read_id(2), 3)
+            self.assertEqual(async_loop(dialogue_crud.get(self.session, id=2)).read_id(3), 0)
 
     def test_messages_paginate(self):
         headers = {'Authorization': 'Bearer Token'}
@@ -194,6 +194,17 @@ class NotificationTestCase(BaseTest, TestCase):
         self.assertEqual(len(async_loop(notification_crud.filter(self.session, recipient_id=2))), 3)
         self.assertEqual(len(response.json()), 2)
 
+        # Count
+        with mock.patch('app.permission.permission', return_value=2) as _:
+            response = self.client.get(f'{self.url}/notifications/count', headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), {'count': 3})
+
+        with mock.patch('app.permission.permission', return_value=1) as _:
+            response = self.client.get(f'{self.url}/notifications/count', headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), {'count': 1})
+
         # Get
         with mock.patch('app.permission.permission', return_value=2) as _:
             response = self.client.get(f'{self.url}/notifications/1', headers=headers)
@@ -261,6 +272,11 @@ class NotificationTestCase(BaseTest, TestCase):
         self.assertEqual(async_loop(notification_crud.exist(self.session, id=2)), False)
         self.assertEqual(async_loop(notification_crud.exist(self.session, id=1)), False)
 
+        with mock.patch('app.permission.permission', return_value=2) as _:
+            response = self.client.get(f'{self.url}/notifications/count', headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), {'count': 0})
+
         # View only 1
         with mock.patch('app.permission.permission', return_value=1) as _:
             response = self.client.delete(f'{self.url}/notifications/3', headers=headers)
@@ -0,0 +1,81 @@
+from unittest import mock, TestCase
+
+from app.crud import message_crud, dialogue_crud, event_crud
+from config import ERROR, SUCCESS, READ
+from db import engine
+from tests import BaseTest, async_loop
+
+
+class ReadMessageTestCase(BaseTest, TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        async_loop(dialogue_crud.create(self.session, users_ids='1_2'))
+        async_loop(message_crud.create(self.session, dialogue_id=1, sender_id=1, msg='Hello world!'))
+        async_loop(message_crud.create(self.session, dialogue_id=1, sender_id=2, msg='Hello world 2!'))
+        async_loop(message_crud.create(self.session, dialogue_id=1, sender_id=1, msg='Hello world 3!'))
+        async_loop(engine.dispose())
+
+    def test_sender_and_recipient_connections(self):
+        with mock.patch('app.requests.sender_profile_request', return_value=self.get_new_user(2)) as _:
+            with self.client.websocket_connect(f'{self.url}/messages/ws/token') as socket_reader:
+                with mock.patch('app.requests.sender_profile_request', return_value=self.get_new_user(1)) as _:
+                    with self.client.websocket_connect(f'{self.url}/messages/ws/token') as socket_sender:
+                        socket_reader.send_json({'type': READ, 'dialogue_id': 1, 'up_to': 2})
+                        response = socket_reader.receive_json()
+                        self.assertEqual(response, {'type': SUCCESS, 'data': {'msg': 'Messages has been viewed'}})
+
+                        receipt = {'type': READ, 'data': {'dialogue_id': 1, 'reader_id': 2, 'read_id': 1}}
+                        self.assertEqual(socket_reader.receive_json(), receipt)
+                        self.assertEqual(socket_sender.receive_json(), receipt)
+
+                        socket_reader.send_json({'type': READ, 'dialogue_id': 1})
+                        self.assertEqual(socket_reader.receive_json()['type'], SUCCESS)
+                        receipt = {'type': READ, 'data': {'dialogue_id': 1, 'reader_id': 2, 'read_id': 3}}
+                        self.assertEqual(socket_reader.receive_json(), receipt)
+                        self.assertEqual(socket_sender.receive_json(), receipt)
+
+                        # Watermark hasn't moved, no receipt
+                        socket_reader.send_json({'type': READ, 'dialogue_id': 1, 'up_to': 1})
+                        self.assertEqual(
+                            socket_reader.receive_json(),
+                            {'type': SUCCESS, 'data': {'msg': 'Messages has been viewed'}},
+                        )
+
+        async_loop(engine.dispose())
+        async_loop(self.session.commit())
+        dialogue = async_loop(dialogue_crud.get(self.session, id=1))
+        self.assertEqual(dialogue.read_id(2), 3)
+        self.assertEqual(dialogue.read_id(1), 0)
+        self.assertEqual([event.message_id for event in async_loop(event_crud.all(self.session))], [3, 1])
+
+        socket_reader.close()
+        socket_sender.close()
+
+    def test_bad_dialogue(self):
+        async_loop(dialogue_crud.create(self.session, users_ids='3_4'))
+        async_loop(engine.dispose())
+
+        with mock.patch('app.requests.sender_profile_request', return_value=self.get_new_user(2)) as _:
+            with self.client.websocket_connect(f'{self.url}/messages/ws/token') as socket:
+                socket.send_json({'type': READ, 'dialogue_id': 143})
+                self.assertEqual(
+                    socket.receive_json(), {'type': ERROR, 'data': {'detail': {'msg': 'Dialogue not found'}}},
+                )
+
+                socket.send_json({'type': READ, 'dialogue_id': 2})
+                self.assertEqual(
+                    socket.receive_json(), {'type': ERROR, 'data': {'detail': {'msg': 'You are not in this dialogue'}}},
+                )
+
+                socket.send_json({'type': READ})
+                self.assertEqual(
+                    socket.receive_json(), {'type': ERROR, 'data': {'detail': {'msg': f'Invalid {READ} data'}}},
+                )
+
+        async_loop(engine.dispose())
+        async_loop(self.session.commit())
+        self.assertEqual(async_loop(dialogue_crud.get(self.session, id=1)).read_id(2), 0)
+        self.assertEqual(len(async_loop(event_crud.all(self.session))), 0)
+
+        socket.close()
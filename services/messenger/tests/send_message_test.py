@@ -43,7 +43,8 @@ class SendMessageTestCase(BaseTest, TestCase):
         self.assertEqual(len(async_loop(message_crud.all(self.session))), 1)
         self.assertEqual(len(async_loop(dialogue_crud.all(self.session))), 1)
 
-        self.assertEqual(async_loop(message_crud.get(self.session, id=1)).viewed, False)
+        dialogue = async_loop(dialogue_crud.get(self.session, id=1))
+        self.assertEqual(dialogue.viewed(async_loop(message_crud.get(self.session, id=1))), False)
         self.assertEqual(async_loop(dialogue_crud.get(self.session, id=1)).users_ids, '1_2')
         socket.close()
         self.assertEqual(async_loop(message_crud.get(self.session, id=1)).dialogue_id, 1)
@@ -110,7 +111,8 @@ class SendMessageTestCase(BaseTest, TestCase):
         self.assertEqual(len(async_loop(message_crud.all(self.session))), 1)
         self.assertEqual(len(async_loop(dialogue_crud.all(self.session))), 1)
 
-        self.assertEqual(async_loop(message_crud.get(self.session, id=1)).viewed, False)
+        dialogue = async_loop(dialogue_crud.get(self.session, id=1))
+        self.assertEqual(dialogue.viewed(async_loop(message_crud.get(self.session, id=1))), False)
         self.assertEqual(async_loop(dialogue_crud.get(self.session, id=1)).users_ids, '1_2')
         socket_1.close()
         socket_2.close()
@@ -172,7 +174,8 @@ class SendMessageTestCase(BaseTest, TestCase):
         self.assertEqual(len(async_loop(dialogue_crud.all(self.session))), 1)
         self.assertEqual(len(async_loop(notification_crud.all(self.session))), 1)
 
-        self.assertEqual(async_loop(message_crud.get(self.session, id=1)).viewed, False)
+        dialogue = async_loop(dialogue_crud.get(self.session, id=1))
+        self.assertEqual(dialogue.viewed(async_loop(message_crud.get(self.session, id=1))), False)
         self.assertEqual(async_loop(dialogue_crud.get(self.session, id=1)).users_ids, '1_2')
         socket_sender.close()
         socket_recipient.close()
@@ -277,7 +280,8 @@ class SendMessageTestCase(BaseTest, TestCase):
         self.assertEqual(len(async_loop(dialogue_crud.all(self.session))), 1)
         self.assertEqual(len(async_loop(notification_crud.all(self.session))), 1)
 
-        self.assertEqual(async_loop(message_crud.get(self.session, id=1)).viewed, False)
+        dialogue = async_loop(dialogue_crud.get(self.session, id=1))
+        self.assertEqual(dialogue.viewed(async_loop(message_crud.get(self.session, id=1))), False)
         self.assertEqual(async_loop(dialogue_crud.get(self.session, id=1)).users_ids, '1_2')
         self.assertEqual(async_loop(message_crud.get(self.session, id=1)).dialogue_id, 1)
         socket_sender_1.close()
@@ -326,8 +330,9 @@ class SendMessageTestCase(BaseTest, TestCase):
         self.assertEqual(len(async_loop(message_crud.all(self.session))), 2)
         self.assertEqual(len(async_loop(dialogue_crud.all(self.session))), 1)
 
-        self.assertEqual(async_loop(message_crud.get(self.session, id=1)).viewed, False)
-        self.assertEqual(async_loop(message_crud.get(self.session, id=2)).viewed, False)
+        dialogue = async_loop(dialogue_crud.get(self.session, id=1))
+        self.assertEqual(dialogue.viewed(async_loop(message_crud.get(self.session, id=1))), False)
+        self.assertEqual(dialogue.viewed(async_loop(message_crud.get(self.session, id=2))), False)
         self.assertEqual(async_loop(dialogue_crud.get(self.session, id=1)).users_ids, '1_2')
         socket.close()
         self.assertEqual(async_loop(message_crud.get(self.session, id=2)).dialogue_id, 1)
@@ -374,8 +379,9 @@ class SendMessageTestCase(BaseTest, TestCase):
         self.assertEqual(len(async_loop(message_crud.all(self.session))), 2)
         self.assertEqual(len(async_loop(dialogue_crud.all(self.session))), 1)
 
-        self.assertEqual(async_loop(message_crud.get(self.session, id=1)).viewed, False)
-        self.assertEqual(async_loop(message_crud.get(self.session, id=2)).viewed, False)
+        dialogue = async_loop(dialogue_crud.get(self.session, id=1))
+        self.assertEqual(dialogue.viewed(async_loop(message_crud.get(self.session, id=1))), False)
+        self.assertEqual(dialogue.viewed(async_loop(message_crud.get(self.session, id=2))), False)
         self.assertEqual(async_loop(dialogue_crud.get(self.session, id=1)).users_ids, '1_2')
         socket.close()
         self.assertEqual(async_loop(message_crud.get(self.session, id=2)).dialogue_id, 1)
@@ -0,0 +1,169 @@
+from unittest import mock, TestCase
+
+from app.crud import message_crud, dialogue_crud, event_crud
+from app.message.schemas import GetMessage
+from app.schemas import UserData
+from config import ERROR, SEND, CHANGE, DELETE, SYNC, READ
+from db import engine
+from tests import BaseTest, async_loop
+
+
+class SyncMessageTestCase(BaseTest, TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        async_loop(dialogue_crud.create(self.session, users_ids='1_2'))
+        async_loop(dialogue_crud.create(self.session, users_ids='2_3'))
+        async_loop(message_crud.create(self.session, dialogue_id=1, sender_id=1, msg='Hello world!'))
+        async_loop(message_crud.create(self.session, dialogue_id=1, sender_id=1, msg='Hello world 2!'))
+        async_loop(message_crud.create(self.session, dialogue_id=2, sender_id=3, msg='Hello world 3!'))
+        async_loop(event_crud.create(self.session, message_id=1, sender_id=1, recipient_id=2, dialogue_id=1))
+        async_loop(event_crud.create(self.session, message_id=2, sender_id=1, recipient_id=2, dialogue_id=1))
+        async_loop(event_crud.create(self.session, message_id=3, sender_id=3, recipient_id=2, dialogue_id=2))
+        async_loop(
+            event_crud.create(self.session, message_id=1, sender_id=1, recipient_id=2, dialogue_id=1, type=CHANGE)
+        )
+        async_loop(engine.dispose())
+
+    def test_sync_since_id(self):
+        message = GetMessage(**async_loop(message_crud.get(self.session, id=2)).__dict__).dict()
+        async_loop(engine.dispose())
+
+        with mock.patch('app.requests.sender_profile_request', return_value=self.get_new_user(2)) as _:
+            with mock.patch('app.requests.get_sender_data_request', return_value=self.get_new_user(1)) as _:
+                with self.client.websocket_connect(f'{self.url}/messages/ws/token') as socket:
+                    socket.send_json({'type': SYNC, 'since_id': 1})
+
+                    response = socket.receive_json()
+                    self.assertEqual(
+                        response,
+                        {
+                            'type': SEND,
+                            'data': {
+                                **message,
+                                'sender': UserData(**self.get_new_user(1)).dict(),
+                                'event_id': 2,
+                            }
+                        }
+                    )
+                    response = socket.receive_json()
+                    self.assertEqual(response['type'], SEND)
+                    self.assertEqual(response['data']['id'], 3)
+                    self.assertEqual(response['data']['event_id'], 3)
+
+                    response = socket.receive_json()
+                    self.assertEqual(response, {'type': SYNC, 'data': {'watermark': 3, 'more': True}})
+
+                    socket.send_json({'type': SYNC, 'since_id': 3})
+                    response = socket.receive_json()
+                    self.assertEqual(response['type'], CHANGE)
+                    self.assertEqual(response['data']['id'], 1)
+                    self.assertEqual(response['data']['event_id'], 4)
+
+                    response = socket.receive_json()
+                    self.assertEqual(response, {'type': SYNC, 'data': {'watermark': 4, 'more': False}})
+
+                    socket.send_json({'type': SYNC, 'since_id': 4})
+                    response = socket.receive_json()
+                    self.assertEqual(response, {'type': SYNC, 'data': {'watermark': 4, 'more': False}})
+
+                    socket.send_json({'type': SYNC})
+                    response = socket.receive_json()
+                    self.assertEqual(response, {'type': SYNC, 'data': {'watermark': 4, 'more': False}})
+
+    def test_sync_dialogues(self):
+        with mock.patch('app.requests.sender_profile_request', return_value=self.get_new_user(2)) as _:
+            with mock.patch('app.requests.get_sender_data_request', return_value=self.get_new_user(1)) as _:
+                with self.client.websocket_connect(f'{self.url}/messages/ws/token') as socket:
+                    socket.send_json({'type': SYNC, 'dialogues': {'1': 2}})
+
+                    response = socket.receive_json()
+                    self.assertEqual(response['type'], CHANGE)
+                    self.assertEqual(response['data']['event_id'], 4)
+
+                    response = socket.receive_json()
+                    self.assertEqual(response, {'type': SYNC, 'data': {'watermark': 4, 'more': False}})
+
+                    socket.send_json({'type': SYNC, 'since_id': 0, 'dialogues': {'1': 4}})
+                    response = socket.receive_json()
+                    self.assertEqual(response['type'], SEND)
+                    self.assertEqual(response['data']['dialogue_id'], 2)
+                    self.assertEqual(response['data']['event_id'], 3)
+
+                    response = socket.receive_json()
+                    self.assertEqual(response, {'type': SYNC, 'data': {'watermark': 3, 'more': False}})
+
+    def test_sync_deleted_message(self):
+        async_loop(message_crud.remove(self.session, id=2))
+        async_loop(
+            event_crud.create(self.session, message_id=2, sender_id=1, recipient_id=2, dialogue_id=1, type=DELETE)
+        )
+        async_loop(engine.dispose())
+
+        with mock.patch('app.requests.sender_profile_request', return_value=self.get_new_user(2)) as _:
+            with mock.patch('app.requests.get_sender_data_request', return_value=self.get_new_user(1)) as _:
+                with self.client.websocket_connect(f'{self.url}/messages/ws/token') as socket:
+                    socket.send_json({'type': SYNC, 'dialogues': {'1': 1}})
+
+                    response = socket.receive_json()
+                    self.assertEqual(response['type'], CHANGE)
+                    self.assertEqual(response['data']['event_id'], 4)
+
+                    response = socket.receive_json()
+                    self.assertEqual(response, {'type': SYNC, 'data': {'watermark': 4, 'more': True}})
+
+                    socket.send_json({'type': SYNC, 'dialogues': {'1': 4}})
+                    response = socket.receive_json()
+                    self.assertEqual(
+                        response,
+                        {
+                            'type': DELETE,
+                            'data': {
+                                'id': 2,
+                                'dialogue_id': 1,
+                                'sender': UserData(**self.get_new_user(1)).dict(),
+                                'event_id': 5,
+                            }
+                        }
+                    )
+
+                    response = socket.receive_json()
+                    self.assertEqual(response, {'type': SYNC, 'data': {'watermark': 5, 'more': False}})
+
+    def test_sync_read(self):
+        async_loop(dialogue_crud.update(self.session, {'id': 1}, second_read_id=2))
+        async_loop(
+            event_crud.create(self.session, message_id=2, sender_id=2, recipient_id=1, dialogue_id=1, type=READ)
+        )
+        async_loop(engine.dispose())
+
+        with mock.patch('app.requests.sender_profile_request', return_value=self.get_new_user(1)) as _:
+            with mock.patch('app.requests.get_sender_data_request', return_value=self.get_new_user(1)) as _:
+                with self.client.websocket_connect(f'{self.url}/messages/ws/token') as socket:
+                    socket.send_json({'type': SYNC, 'dialogues': {'1': 3}})
+
+                    response = socket.receive_json()
+                    self.assertEqual(response['type'], CHANGE)
+                    self.assertEqual(response['data']['id'], 1)
+                    self.assertEqual(response['data']['viewed'], True)
+
+                    response = socket.receive_json()
+                    self.assertEqual(response['type'], READ)
+                    self.assertEqual(
+                        {key: response['data'][key] for key in ('dialogue_id', 'reader_id', 'read_id', 'event_id')},
+                        {'dialogue_id': 1, 'reader_id': 2, 'read_id': 2, 'event_id': 5},
+                    )
+
+                    response = socket.receive_json()
+                    self.assertEqual(response, {'type': SYNC, 'data': {'watermark': 5, 'more': False}})
+
+    def test_sync_other_user(self):
+        with mock.patch('app.requests.sender_profile_request', return_value=self.get_new_user(143)) as _:
+            with self.client.websocket_connect(f'{self.url}/messages/ws/token') as socket:
+                socket.send_json({'type': SYNC, 'since_id': 0})
+                response = socket.receive_json()
+                self.assertEqual(response, {'type': SYNC, 'data': {'watermark': 0, 'more': False}})
+
+                socket.send_json({'type': SYNC, 'since_id': 'bad'})
+                response = socket.receive_json()
+                self.assertEqual(response, {'type': ERROR, 'data': {'detail': {'msg': f'Invalid {SYNC} data'}}})
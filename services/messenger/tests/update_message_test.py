@@ -12,9 +12,9 @@ class UpdateMessageTestCase(BaseTest, TestCase):
 
     def setUp(self) -> None:
         super().setUp()
-        self.dialogue = async_loop(dialogue_crud.create(self.session, users_ids='1_2'))
+        self.dialogue = async_loop(dialogue_crud.create(self.session, users_ids='1_2', second_read_id=1))
         self.msg = async_loop(
-            message_crud.create(self.session, dialogue_id=1, sender_id=1, msg='Hello world!', viewed=True)
+            message_crud.create(self.session, dialogue_id=1, sender_id=1, msg='Hello world!')
         )
 
     def test_get_recipient_id(self):
@@ -25,7 +25,7 @@ class UpdateMessageTestCase(BaseTest, TestCase):
         self.assertEqual(len(async_loop(dialogue_crud.all(self.session))), 1)
         self.assertEqual(len(async_loop(message_crud.all(self.session))), 1)
         self.assertEqual(len(async_loop(notification_crud.all(self.session))), 0)
-        self.assertEqual(self.msg.viewed, True)
+        self.assertEqual(self.dialogue.viewed(self.msg), True)
 
         with mock.patch('app.requests.sender_profile_request', return_value=self.get_new_user(1)) as _:
             with mock.patch('app.requests.get_user_request', return_value=self.get_new_user(2)) as _:
@@ -46,7 +46,7 @@ class UpdateMessageTestCase(BaseTest, TestCase):
                                     'sender': UserData(**self.get_new_user(1)).dict(), **GetMessage(
                                         **{
                                             **async_loop(message_crud.get(self.session, id=1)).__dict__,
-                                            'viewed': False,
+                                            'viewed': True,
                                             'msg': 'Hello python!'
                                         },
                                     ).dict()
@@ -59,7 +59,8 @@ class UpdateMessageTestCase(BaseTest, TestCase):
 
         async_loop(engine.dispose())
         async_loop(self.session.commit())
-        self.assertEqual(async_loop(message_crud.get(self.session, id=1)).viewed, False)
+        dialogue = async_loop(dialogue_crud.get(self.session, id=1))
+        self.assertEqual(dialogue.viewed(async_loop(message_crud.get(self.session, id=1))), True)
         self.assertEqual(async_loop(notification_crud.get(self.session, id=1)).recipient_id, 2)
         self.assertEqual(async_loop(notification_crud.get(self.session, id=1)).sender_id, 1)
         self.assertEqual(async_loop(notification_crud.get(self.session, id=1)).type, CHANGE)
@@ -71,7 +72,7 @@ class UpdateMessageTestCase(BaseTest, TestCase):
         self.assertEqual(len(async_loop(dialogue_crud.all(self.session))), 1)
         self.assertEqual(len(async_loop(message_crud.all(self.session))), 1)
         self.assertEqual(len(async_loop(notification_crud.all(self.session))), 0)
-        self.assertEqual(self.msg.viewed, True)
+        self.assertEqual(self.dialogue.viewed(self.msg), True)
 
         with mock.patch('app.requests.sender_profile_request', return_value=self.get_new_user(1)) as _:
             with mock.patch('app.requests.get_user_request', return_value=self.get_new_user(2)) as _:
@@ -95,7 +96,7 @@ class UpdateMessageTestCase(BaseTest, TestCase):
                                         'sender': UserData(**self.get_new_user(1)).dict(), **GetMessage(
                                             **{
                                                 **async_loop(message_crud.get(self.session, id=1)).__dict__,
-                                                'viewed': False,
+                                                'viewed': True,
                                                 'msg': 'Hello python!'
                                             },
                                         ).dict()
@@ -117,7 +118,7 @@ class UpdateMessageTestCase(BaseTest, TestCase):
                                         'sender': UserData(**self.get_new_user(1)).dict(), **GetMessage(
                                             **{
                                                 **async_loop(message_crud.get(self.session, id=1)).__dict__,
-                                                'viewed': False,
+                                                'viewed': True,
                                                 'msg': 'Hello python!'
                                             },
                                         ).dict()
@@ -130,7 +131,8 @@ class UpdateMessageTestCase(BaseTest, TestCase):
 
         async_loop(engine.dispose())
         async_loop(self.session.commit())
-        self.assertEqual(async_loop(message_crud.get(self.session, id=1)).viewed, False)
+        dialogue = async_loop(dialogue_crud.get(self.session, id=1))
+        self.assertEqual(dialogue.viewed(async_loop(message_crud.get(self.session, id=1))), True)
         self.assertEqual(async_loop(notification_crud.get(self.session, id=1)).recipient_id, 2)
         self.assertEqual(async_loop(notification_crud.get(self.session, id=1)).sender_id, 1)
         self.assertEqual(async_loop(notification_crud.get(self.session, id=1)).type, CHANGE)
@@ -143,7 +145,7 @@ class UpdateMessageTestCase(BaseTest, TestCase):
         self.assertEqual(len(async_loop(dialogue_crud.all(self.session))), 1)
         self.assertEqual(len(async_loop(message_crud.all(self.session))), 1)
         self.assertEqual(len(async_loop(notification_crud.all(self.session))), 0)
-        self.assertEqual(self.msg.viewed, True)
+        self.assertEqual(self.dialogue.viewed(self.msg), True)
 
         with mock.patch('app.requests.sender_profile_request', return_value=self.get_new_user(1)) as _:
             with mock.patch('app.requests.get_user_request', return_value=self.get_new_user(2)) as _:
@@ -168,7 +170,7 @@ class UpdateMessageTestCase(BaseTest, TestCase):
                                             'sender': UserData(**self.get_new_user(1)).dict(), **GetMessage(
                                                 **{
                                                     **async_loop(message_crud.get(self.session, id=1)).__dict__,
-                                                    'viewed': False,
+                                                    'viewed': True,
                                                     'msg': 'Hello python!'
                                                 },
                                             ).dict()
@@ -184,7 +186,7 @@ class UpdateMessageTestCase(BaseTest, TestCase):
                                             'sender': UserData(**self.get_new_user(1)).dict(), **GetMessage(
                                                 **{
                                                     **async_loop(message_crud.get(self.session, id=1)).__dict__,
-                                                    'viewed': False,
+                                                    'viewed': True,
                                                     'msg': 'Hello python!'
                                                 },
                                             ).dict()
@@ -197,7 +199,8 @@ class UpdateMessageTestCase(BaseTest, TestCase):
 
         async_loop(engine.dispose())
         async_loop(self.session.commit())
-        self.assertEqual(async_loop(message_crud.get(self.session, id=1)).viewed, False)
+        dialogue = async_loop(dialogue_crud.get(self.session, id=1))
+        self.assertEqual(dialogue.viewed(async_loop(message_crud.get(self.session, id=1))), True)
         self.assertEqual(async_loop(notification_crud.get(self.session, id=1)).recipient_id, 2)
         self.assertEqual(async_loop(notification_crud.get(self.session, id=1)).sender_id, 1)
         self.assertEqual(async_loop(notification_crud.get(self.session, id=1)).type, CHANGE)
@@ -210,7 +213,7 @@ class UpdateMessageTestCase(BaseTest, TestCase):
         self.assertEqual(len(async_loop(dialogue_crud.all(self.session))), 1)
         self.assertEqual(len(async_loop(message_crud.all(self.session))), 1)
         self.assertEqual(len(async_loop(notification_crud.all(self.session))), 0)
-        self.assertEqual(self.msg.viewed, True)
+        self.assertEqual(self.dialogue.viewed(self.msg), True)
 
         with mock.patch('app.requests.sender_profile_request', return_value=self.get_new_user(1)) as _:
             with mock.patch('app.requests.get_user_request', return_value=self.get_new_user(2)) as _:
@@ -244,7 +247,7 @@ class UpdateMessageTestCase(BaseTest, TestCase):
                                                     'sender': UserData(**self.get_new_user(1)).dict(), **GetMessage(
                                                         **{
                                                             **async_loop(message_crud.get(self.session, id=1)).__dict__,
-                                                            'viewed': False,
+                                                            'viewed': True,
                                                             'msg': 'Hello python!'
                                                         },
                                                     ).dict()
@@ -260,7 +263,7 @@ class UpdateMessageTestCase(BaseTest, TestCase):
                                                     'sender': UserData(**self.get_new_user(1)).dict(), **GetMessage(
                                                         **{
                                                             **async_loop(message_crud.get(self.session, id=1)).__dict__,
-                                                            'viewed': False,
+                                                            'viewed': True,
                                                             'msg': 'Hello python!'
                                                         },
                                                     ).dict()
@@ -282,7 +285,7 @@ class UpdateMessageTestCase(BaseTest, TestCase):
                                                     'sender': UserData(**self.get_new_user(1)).dict(), **GetMessage(
                                                         **{
                                                             **async_loop(message_crud.get(self.session, id=1)).__dict__,
-                                                            'viewed': False,
+                                                            'viewed': True,
                                                             'msg': 'Hello python!'
                                                         },
                                                     ).dict()
@@ -298,7 +301,7 @@ class UpdateMessageTestCase(BaseTest, TestCase):
                                                     'sender': UserData(**self.get_new_user(1)).dict(), **GetMessage(
                                                         **{
                                                             **async_loop(message_crud.get(self.session, id=1)).__dict__,
-                                                            'viewed': False,
+                                                            'viewed': True,
                                                             'msg': 'Hello python!'
                                                         },
                                                     ).dict()
@@ -312,7 +315,8 @@ class UpdateMessageTestCase(BaseTest, TestCase):
 
         async_loop(engine.dispose())
         async_loop(self.session.commit())
-        self.assertEqual(async_loop(message_crud.get(self.session, id=1)).viewed, False)
+        dialogue = async_loop(dialogue_crud.get(self.session, id=1))
+        self.assertEqual(dialogue.viewed(async_loop(message_crud.get(self.session, id=1))), True)
         self.assertEqual(async_loop(notification_crud.get(self.session, id=1)).recipient_id, 2)
         self.assertEqual(async_loop(notification_crud.get(self.session, id=1)).sender_id, 1)
         self.assertEqual(async_loop(notification_crud.get(self.session, id=1)).type, CHANGE)
@@ -328,9 +332,9 @@ class BadUpdateMessageTestCase(BaseTest, TestCase):
 
     def setUp(self) -> None:
         super().setUp()
-        self.dialogue = async_loop(dialogue_crud.create(self.session, users_ids='1_2'))
+        self.dialogue = async_loop(dialogue_crud.create(self.session, users_ids='1_2', second_read_id=1))
         self.msg = async_loop(
-            message_crud.create(self.session, dialogue_id=1, sender_id=1, msg='Hello world!', viewed=True)
+            message_crud.create(self.session, dialogue_id=1, sender_id=1, msg='Hello world!')
         )
 
     def test_invalid_data_schema(self):
@@ -352,7 +356,8 @@ class BadUpdateMessageTestCase(BaseTest, TestCase):
         self.assertEqual(len(async_loop(dialogue_crud.all(self.session))), 1)
         self.assertEqual(len(async_loop(notification_crud.all(self.session))), 0)
         async_loop(self.session.commit())
-        self.assertEqual(async_loop(message_crud.get(self.session, id=1)).viewed, True)
+        dialogue = async_loop(dialogue_crud.get(self.session, id=1))
+        self.assertEqual(dialogue.viewed(async_loop(message_crud.get(self.session, id=1))), True)
         self.assertEqual(async_loop(message_crud.get(self.session, id=1)).msg, 'Hello world!')
 
         socket.close()
@@ -377,7 +382,8 @@ class BadUpdateMessageTestCase(BaseTest, TestCase):
         self.assertEqual(len(async_loop(notification_crud.all(self.session))), 0)
         async_loop(engine.dispose())
         async_loop(self.session.commit())
-        self.assertEqual(async_loop(message_crud.get(self.session, id=1)).viewed, True)
+        dialogue = async_loop(dialogue_crud.get(self.session, id=1))
+        self.assertEqual(dialogue.viewed(async_loop(message_crud.get(self.session, id=1))), True)
         self.assertEqual(async_loop(message_crud.get(self.session, id=1)).msg, 'Hello world!')
 
         socket.close()
@@ -402,7 +408,8 @@ class BadUpdateMessageTestCase(BaseTest, TestCase):
         self.assertEqual(len(async_loop(notification_crud.all(self.session))), 0)
         async_loop(engine.dispose())
         async_loop(self.session.commit())
-        self.assertEqual(async_loop(message_crud.get(self.session, id=1)).viewed, True)
+        dialogue = async_loop(dialogue_crud.get(self.session, id=1))
+        self.assertEqual(dialogue.viewed(async_loop(message_crud.get(self.session, id=1))), True)
         self.assertEqual(async_loop(message_crud.get(self.session, id=1)).msg, 'Hello world!')
 
         socket.close()
@@ -2,19 +2,37 @@ import sqlalchemy
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.feedback.schemas import CreateFeedback
+from app.feedback.schemas import CreateFeedback, GetFeedback
 from app.models import Feedback, Review
-from app.review.schemas import CreateReview
+from app.review.schemas import CreateReview, GetReview
 from crud import CRUD
 
 
 class FeedbackCRUD(CRUD[Feedback, CreateFeedback, CreateFeedback]):
     """ Feedback CRUD """
 
-    @staticmethod
-    async def sorting(db: AsyncSession, skip: int = 0, limit: int = 100, desc: bool = False) -> list[Feedback]:
+    # Feedback lists render only these columns
+    columns = tuple(getattr(Feedback, field) for field in GetFeedback.__fields__)
+
+    async def all_rows(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> list[sqlalchemy.engine.Row]:
+        """
+            All feedbacks (read-only rows)
+            :param db: DB
+            :type db: AsyncSession
+            :param skip: Skip
+            :type skip: int
+            :param limit: Limit
+            :type limit: int
+            :return: Feedbacks
+            :rtype: list
         """
-            Sort
+        return await self.rows(db, self.columns, skip=skip, limit=limit)
+
+    async def sorting(
+            self, db: AsyncSession, skip: int = 0, limit: int = 100, desc: bool = False,
+    ) -> list[sqlalchemy.engine.Row]:
+        """
+            Sort (read-only rows)
             :param db: DB
             :type db: AsyncSession
             :param skip: Skip
@@ -30,10 +48,7 @@ class FeedbackCRUD(CRUD[Feedback, CreateFeedback, CreateFeedback]):
         if desc:
             sort = Feedback.status.desc()
 
-        query = await db.execute(
-            sqlalchemy.select(Feedback).order_by(sort, Feedback.id.desc()).offset(skip).limit(limit)
-        )
-        return query.scalars().all()
+        return await self.rows(db, self.columns, order_by=(sort, Feedback.id.desc()), skip=skip, limit=limit)
 
     @staticmethod
     async def exist_sorting(db: AsyncSession, skip: int = 0, limit: int = 100, desc: bool = False, **kwargs) -> bool:
@@ -67,6 +82,9 @@ class FeedbackCRUD(CRUD[Feedback, CreateFeedback, CreateFeedback]):
 class ReviewCRUD(CRUD[Review, CreateReview, CreateReview]):
     """ Review CRUD """
 
+    # Review lists render only these columns
+    columns = tuple(getattr(Review, field) for field in GetReview.__fields__)
+
     @staticmethod
     def get_sort_variant(sort: str):
         """
@@ -87,9 +105,11 @@ class ReviewCRUD(CRUD[Review, CreateReview, CreateReview]):
         except KeyError:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Sort not found')
 
-    async def sorting(self, db: AsyncSession, sort: str, skip: int = 0, limit: int = 100) -> list[Review]:
+    async def sorting(
+            self, db: AsyncSession, sort: str, skip: int = 0, limit: int = 100,
+    ) -> list[sqlalchemy.engine.Row]:
         """
-            Sorting reviews
+            Sorting reviews (read-only rows)
             :param db: DB
             :type db: AsyncSession
             :param sort: Sort
@@ -101,10 +121,7 @@ class ReviewCRUD(CRUD[Review, CreateReview, CreateReview]):
             :return: Reviews
             :rtype: list
         """
-        query = await db.execute(
-            sqlalchemy.select(Review).order_by(self.get_sort_variant(sort)).offset(skip).limit(limit)
-        )
-        return query.scalars().all()
+        return await self.rows(db, self.columns, order_by=(self.get_sort_variant(sort),), skip=skip, limit=limit)
 
     async def exist_sorting(self, db: AsyncSession, sort: str, skip: int = 0, limit: int = 100) -> bool:
         """
@@ -127,6 +144,36 @@ class ReviewCRUD(CRUD[Review, CreateReview, CreateReview]):
         )
         return query.scalar()
 
+    @staticmethod
+    async def histogram(db: AsyncSession) -> dict[int, int]:
+        """
+            Reviews count per appraisal
+            :param db: DB
+            :type db: AsyncSession
+            :return: Histogram
+            :rtype: dict
+        """
+        query = await db.execute(
+            sqlalchemy.select(Review.appraisal, sqlalchemy.func.count(Review.id)).group_by(Review.appraisal)
+        )
+        return dict(query.all())
+
+    @staticmethod
+    async def recent(db: AsyncSession, limit: int = 20) -> dict[int, int]:
+        """
+            Latest reviews appraisals
+            :param db: DB
+            :type db: AsyncSession
+            :param limit: Limit
+            :type limit: int
+            :return: Appraisal per review ID
+            :rtype: dict
+        """
+        query = await db.execute(
+            sqlalchemy.select(Review.id, Review.appraisal).order_by(Review.id.desc()).limit(limit)
+        )
+        return dict(query.all())
+
 
 feedback_crud = FeedbackCRUD(Feedback)
 review_crud = ReviewCRUD(Review)
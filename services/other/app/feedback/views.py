@@ -1,9 +1,10 @@
 from fastapi import HTTPException, status
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud import feedback_crud
 from app.feedback.schemas import CreateFeedback, UpdateFeedback
-from app.models import Feedback
+from app.serializers import json_response, feedback_serializer
 from app.service import paginate
 from config import SERVER_OTHER_BACKEND, API
 
@@ -25,12 +26,13 @@ async def create_feedback(db: AsyncSession, user_id: int, schema: CreateFeedback
     return {'msg': 'Thanks for your feedback. Feedback has been created!'}
 
 
+@json_response
 @paginate(
-    feedback_crud.all,
+    feedback_crud.all_rows,
     feedback_crud.exist_page,
     f'{SERVER_OTHER_BACKEND}{API}/feedbacks/',
 )
-async def get_all_feedbacks(*, db: AsyncSession, page: int, page_size: int, queryset: list[Feedback]):
+async def get_all_feedbacks(*, db: AsyncSession, page: int, page_size: int, queryset: list[Row]):
     """
         Get all feedbacks
         :param db: DB
@@ -43,16 +45,17 @@ async def get_all_feedbacks(*, db: AsyncSession, page: int, page_size: int, quer
         :type queryset: list
         :return: Feedbacks
     """
-    return (feedback.__dict__ for feedback in queryset)
+    return feedback_serializer.rows(queryset)
 
 
+@json_response
 @paginate(
     feedback_crud.sorting,
     feedback_crud.exist_sorting,
     f'{SERVER_OTHER_BACKEND}{API}/feedbacks/sort',
     'desc',
 )
-async def sort_feedbacks(*, db: AsyncSession, page: int, page_size: int, queryset: list[Feedback], desc: bool):
+async def sort_feedbacks(*, db: AsyncSession, page: int, page_size: int, queryset: list[Row], desc: bool):
     """
         Sort feedbacks
         :param db: DB
@@ -68,7 +71,7 @@ async def sort_feedbacks(*, db: AsyncSession, page: int, page_size: int, queryse
         :return: Feedbacks
     """
 
-    return (feedback.__dict__ for feedback in queryset)
+    return feedback_serializer.rows(queryset)
 
 
 async def get_feedback(db: AsyncSession, pk: int) -> dict:
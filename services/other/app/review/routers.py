@@ -1,9 +1,9 @@
-from fastapi import APIRouter, status, Depends, Query
+from fastapi import APIRouter, status, Depends, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.permission import is_active, is_superuser
 from app.review import views
-from app.review.schemas import CreateReview, GetReview, ReviewPaginate, UpdateReview
+from app.review.schemas import CreateReview, GetReview, GetReviewStats, ReviewPaginate, UpdateReview
 from app.schemas import Message
 from db import get_db
 
@@ -44,6 +44,19 @@ async def get_all_reviews(
     return await views.get_all_reviews(db=db, page=page, page_size=page_size, sort=sort)
 
 
+@review_router.get(
+    '/stats',
+    name='Get review stats',
+    description='Get review stats (count, mean appraisal, histogram and recent trend), supports If-None-Match',
+    response_description='Review stats',
+    status_code=status.HTTP_200_OK,
+    response_model=GetReviewStats,
+    tags=['reviews'],
+)
+async def get_review_stats(request: Request, db: AsyncSession = Depends(get_db)):
+    return await views.get_review_stats(db, request)
+
+
 @review_router.get(
     '/{pk}',
     name='Get review',
@@ -1,4 +1,5 @@
 import datetime
+import typing
 
 from pydantic import BaseModel, Field, validator
 
@@ -34,3 +35,13 @@ class ReviewPaginate(Paginate):
     """ Reviews paginate """
 
     results: list[GetReview]
+
+
+class GetReviewStats(BaseModel):
+    """ Get review stats """
+
+    count: int
+    mean: typing.Optional[float]
+    histogram: dict[int, int]
+    recent_mean: typing.Optional[float]
+    trend: typing.Optional[float]
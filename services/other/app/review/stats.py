@@ -0,0 +1,176 @@
+import contextlib
+import hashlib
+import json
+import typing
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import review_crud
+from app.review.schemas import GetReviewStats
+from config import RECENT_REVIEWS
+
+APPRAISALS = range(1, 6)
+
+
+class Snapshot(typing.NamedTuple):
+    """ Review stats snapshot """
+
+    body: bytes
+    etag: str
+
+
+class ReviewStats:
+    """ In-process review stats (histogram and recent appraisals, updated on every review write) """
+
+    def __init__(self):
+        self._histogram: typing.Optional[dict[int, int]] = None
+        self._recent: dict[int, int] = {}
+        self._snapshot: typing.Optional[Snapshot] = None
+        self._version: int = 0
+        self._writes: int = 0
+
+    @staticmethod
+    def build(histogram: dict[int, int], recent: dict[int, int]) -> Snapshot:
+        """
+            Build snapshot
+            :param histogram: Reviews count per appraisal
+            :type histogram: dict
+            :param recent: Latest reviews appraisals
+            :type recent: dict
+            :return: Snapshot
+            :rtype: Snapshot
+        """
+        count = sum(histogram.values())
+        mean = round(sum(appraisal * total for appraisal, total in histogram.items()) / count, 2) if count else None
+        recent_mean = round(sum(recent.values()) / len(recent), 2) if recent else None
+        stats = GetReviewStats(
+            count=count,
+            mean=mean,
+            histogram=histogram,
+            recent_mean=recent_mean,
+            trend=round(recent_mean - mean, 2) if count else None,
+        )
+        body = json.dumps(
+            stats.dict(), ensure_ascii=False, allow_nan=False, indent=None, separators=(',', ':'),
+        ).encode('utf-8')
+        return Snapshot(body=body, etag=f'"{hashlib.sha1(body).hexdigest()}"')
+
+    async def load(self, db: AsyncSession) -> Snapshot:
+        """
+            Load review stats from DB
+            :param db: DB
+            :type db: AsyncSession
+            :return: Snapshot
+            :rtype: Snapshot
+        """
+        version = self._version
+        histogram = {appraisal: 0 for appraisal in APPRAISALS}
+        histogram.update(await review_crud.histogram(db))
+        recent = await review_crud.recent(db, RECENT_REVIEWS)
+        snapshot = self.build(histogram, recent)
+        # Don't publish stats that were changed while loading, they could count a write twice
+        if version == self._version and not self._writes:
+            self._histogram, self._recent, self._snapshot = histogram, recent, snapshot
+        return snapshot
+
+    def invalidate(self) -> None:
+        """
+            Invalidate stats, next access reloads reviews
+            :return: None
+        """
+        self._version += 1
+        self._histogram = None
+        self._recent = {}
+        self._snapshot = None
+
+    @contextlib.asynccontextmanager
+    async def writing(self) -> typing.AsyncIterator[None]:
+        """
+            Review write (loads aren't published until it ends)
+            :return: None
+        """
+        self._version += 1
+        self._writes += 1
+        try:
+            yield
+        finally:
+            self._writes -= 1
+
+    def _changed(self) -> bool:
+        """
+            Stats changed, snapshot is rebuilt on next access
+            :return: Stats are loaded?
+            :rtype: bool
+        """
+        self._version += 1
+        self._snapshot = None
+        return self._histogram is not None
+
+    def add(self, pk: int, appraisal: int) -> None:
+        """
+            Review created
+            :param pk: Review ID
+            :type pk: int
+            :param appraisal: Appraisal
+            :type appraisal: int
+            :return: None
+        """
+        if not self._changed():
+            return
+        self._histogram[appraisal] += 1
+        self._recent[pk] = appraisal
+        if len(self._recent) > RECENT_REVIEWS:
+            del self._recent[min(self._recent)]
+
+    def change(self, pk: int, old: int, new: int) -> None:
+        """
+            Review appraisal changed
+            :param pk: Review ID
+            :type pk: int
+            :param old: Old appraisal
+            :type old: int
+            :param new: New appraisal
+            :type new: int
+            :return: None
+        """
+        if not self._changed():
+            return
+        self._histogram[old] -= 1
+        self._histogram[new] += 1
+        if pk in self._recent:
+            self._recent[pk] = new
+
+    def remove(self, pk: int, appraisal: int) -> None:
+        """
+            Review deleted
+            :param pk: Review ID
+            :type pk: int
+            :param appraisal: Appraisal
+            :type appraisal: int
+            :return: None
+        """
+        if not self._changed():
+            return
+        if pk in self._recent:
+            # Next older review joins recent reviews, only DB knows it
+            self.invalidate()
+            return
+        self._histogram[appraisal] -= 1
+
+    async def get(self, db: AsyncSession) -> Snapshot:
+        """
+            Get snapshot
+            :param db: DB
+            :type db: AsyncSession
+            :return: Snapshot
+            :rtype: Snapshot
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            if self._histogram is None:
+                return await self.load(db)
+            snapshot = self._snapshot = self.build(self._histogram, self._recent)
+        return snapshot
+
+
+review_stats = ReviewStats()
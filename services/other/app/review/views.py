@@ -1,9 +1,12 @@
-from fastapi import HTTPException, status
+from fastapi import HTTPException, status, Request
+from fastapi.responses import Response
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud import review_crud
-from app.models import Review
 from app.review.schemas import CreateReview, UpdateReview
+from app.review.stats import review_stats
+from app.serializers import json_response, review_serializer
 from app.service import paginate
 from config import SERVER_OTHER_BACKEND, API
 
@@ -24,12 +27,15 @@ async def create_review(db: AsyncSession, user_id: int, schema: CreateReview) ->
 
     if await review_crud.exist(db, user_id=user_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Review exist')
-    review = await review_crud.create(db, user_id=user_id, **schema.dict())
+    async with review_stats.writing():
+        review = await review_crud.create(db, user_id=user_id, **schema.dict())
+        review_stats.add(review.id, review.appraisal)
     return review.__dict__
 
 
+@json_response
 @paginate(review_crud.sorting, review_crud.exist_sorting, f'{SERVER_OTHER_BACKEND}{API}/reviews/', 'sort')
-async def get_all_reviews(*, db: AsyncSession, page: int, page_size: int, sort: str, queryset: list[Review]):
+async def get_all_reviews(*, db: AsyncSession, page: int, page_size: int, sort: str, queryset: list[Row]):
     """
         Get all reviews
         :param db: DB
@@ -44,7 +50,26 @@ async def get_all_reviews(*, db: AsyncSession, page: int, page_size: int, sort:
         :type queryset: list
         :return: Reviews
     """
-    return (review.__dict__ for review in queryset)
+    return review_serializer.rows(queryset)
+
+
+async def get_review_stats(db: AsyncSession, request: Request) -> Response:
+    """
+        Get review stats (from in-process stats snapshot)
+        :param db: DB
+        :type db: AsyncSession
+        :param request: Request
+        :type request: Request
+        :return: Review stats or not modified
+        :rtype: Response
+    """
+
+    snapshot = await review_stats.get(db)
+    headers = {'etag': snapshot.etag, 'cache-control': 'no-cache'}
+    tags = {tag.strip().removeprefix('W/') for tag in request.headers.get('if-none-match', '').split(',')}
+    if snapshot.etag in tags or '*' in tags:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(snapshot.body, media_type='application/json', headers=headers)
 
 
 async def get_review(db: AsyncSession, pk: int) -> dict:
@@ -90,7 +115,10 @@ async def update_review(db: AsyncSession, pk: int, schema: UpdateReview, user_id
 
     if (review.user_id != user_id) and (not is_admin):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='User not owner this review')
-    review = await review_crud.update(db, {'id': pk}, **schema.dict())
+    appraisal = review.appraisal
+    async with review_stats.writing():
+        review = await review_crud.update(db, {'id': pk}, **schema.dict())
+        review_stats.change(pk, appraisal, review.appraisal)
     return review.__dict__
 
 
@@ -117,5 +145,7 @@ async def delete_review(db: AsyncSession, pk: int, user_id: int, is_admin: bool
 
     if (review.user_id != user_id) and (not is_admin):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='User not owner this review')
-    await review_crud.remove(db, id=pk)
+    async with review_stats.writing():
+        await review_crud.remove(db, id=pk)
+        review_stats.remove(pk, review.appraisal)
     return {'msg': 'Review has been deleted'}
@@ -27,5 +27,8 @@ DATABASE_URL = f'postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT
 COMPLETED = True
 NEW = False
 
+# Reviews in recent trend
+RECENT_REVIEWS = int(os.environ.get('RECENT_REVIEWS', 20))
+
 if int(TEST):
     DATABASE_URL = f'postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}_test'
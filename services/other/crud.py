@@ -3,6 +3,7 @@ import typing
 import sqlalchemy
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Load
 
 from db import Base
 
@@ -29,15 +30,17 @@ class CRUD(typing.Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         query = await db.execute(sqlalchemy.exists(sqlalchemy.select(self.__model.id).filter_by(**kwargs)).select())
         return query.scalar()
 
-    async def get(self, db: AsyncSession, **kwargs) -> typing.Optional[ModelType]:
+    async def get(self, db: AsyncSession, options: typing.Sequence[Load] = (), **kwargs) -> typing.Optional[ModelType]:
         """
             Get
             :param db: DB
             :type db: AsyncSession
+            :param options: Loader options (relationships aren't loaded by default)
+            :type options: list
             :param kwargs: kwargs
             :return: Instance
         """
-        query = await db.execute(sqlalchemy.select(self.__model).filter_by(**kwargs))
+        query = await db.execute(sqlalchemy.select(self.__model).options(*options).filter_by(**kwargs))
         return query.scalars().first()
 
     async def create(self, db: AsyncSession, **kwargs) -> ModelType:
@@ -54,13 +57,17 @@ class CRUD(typing.Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         await db.commit()
         return instance
 
-    async def update(self, db: AsyncSession, filter_by: dict, **kwargs) -> ModelType:
+    async def update(
+            self, db: AsyncSession, filter_by: dict, options: typing.Sequence[Load] = (), **kwargs,
+    ) -> ModelType:
         """
             Update instance
             :param db: DB
             :type db: AsyncSession
             :param filter_by: Filter by
             :type filter_by: dict
+            :param options: Loader options (relationships aren't loaded by default)
+            :type options: list
             :param kwargs: kwargs
             :return: Instance
         """
@@ -68,7 +75,7 @@ class CRUD(typing.Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         query.execution_options(synchronize_session="fetch")
         await db.execute(query)
         await db.commit()
-        return await self.get(db, **filter_by)
+        return await self.get(db, options, **filter_by)
 
     async def remove(self, db: AsyncSession, **kwargs) -> None:
         """
@@ -81,7 +88,9 @@ class CRUD(typing.Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         await db.execute(sqlalchemy.delete(self.__model).filter_by(**kwargs))
         await db.commit()
 
-    async def all(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> list[ModelType]:
+    async def all(
+            self, db: AsyncSession, skip: int = 0, limit: int = 100, options: typing.Sequence[Load] = (),
+    ) -> list[ModelType]:
         """
             All
             :param db: DB
@@ -90,15 +99,21 @@ class CRUD(typing.Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             :type skip: int
             :param limit: Limit
             :type limit: int
+            :param options: Loader options (relationships aren't loaded by default)
+            :type options: list
             :return: Instances
             :rtype: list
         """
         query = await db.execute(
-            sqlalchemy.select(self.__model).order_by(self.__model.id.desc()).offset(skip).limit(limit)
+            sqlalchemy.select(self.__model).options(*options).order_by(
+                self.__model.id.desc()
+            ).offset(skip).limit(limit)
         )
         return query.scalars().all()
 
-    async def filter(self, db: AsyncSession, skip: int = 0, limit: int = 100, **kwargs) -> list[ModelType]:
+    async def filter(
+            self, db: AsyncSession, skip: int = 0, limit: int = 100, options: typing.Sequence[Load] = (), **kwargs,
+    ) -> list[ModelType]:
         """
             Filter
             :param db: DB
@@ -107,12 +122,14 @@ class CRUD(typing.Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             :type skip: int
             :param limit: Limit
             :type limit: int
+            :param options: Loader options (relationships aren't loaded by default)
+            :type options: list
             :param kwargs: Filter params
             :return: Instances
             :rtype: list
         """
         query = await db.execute(
-            sqlalchemy.select(self.__model).filter_by(
+            sqlalchemy.select(self.__model).options(*options).filter_by(
                 **kwargs
             ).order_by(self.__model.id.desc()).offset(skip).limit(limit)
         )
@@ -138,3 +155,38 @@ class CRUD(typing.Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             ).select()
         )
         return query.scalar()
+
+    async def rows(
+            self,
+            db: AsyncSession,
+            columns: typing.Sequence[typing.Any],
+            *criteria: typing.Any,
+            order_by: typing.Optional[typing.Sequence[typing.Any]] = None,
+            skip: int = 0,
+            limit: int = 100,
+            **kwargs,
+    ) -> list[sqlalchemy.engine.Row]:
+        """
+            Read-only rows with selected columns only (no ORM instances: no identity map, unit of work
+            or relationship loads)
+            :param db: DB
+            :type db: AsyncSession
+            :param columns: Columns
+            :type columns: list
+            :param criteria: Filter criteria
+            :param order_by: Order by (ID DESC by default)
+            :type order_by: list
+            :param skip: Skip
+            :type skip: int
+            :param limit: Limit
+            :type limit: int
+            :param kwargs: Filter params
+            :return: Rows
+            :rtype: list
+        """
+        query = await db.execute(
+            sqlalchemy.select(*columns).filter(*criteria).filter_by(**kwargs).order_by(
+                *(order_by if order_by is not None else (self.__model.id.desc(),))
+            ).offset(skip).limit(limit)
+        )
+        return query.all()
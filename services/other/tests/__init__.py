@@ -3,6 +3,7 @@ import asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.testclient import TestClient
 
+from app.review.stats import review_stats
 from config import API
 from db import Base, engine
 from main import app
@@ -38,6 +39,7 @@ class BaseTest:
         self.session = AsyncSession(engine)
         self.client = TestClient(app)
         self.url = f'/{API}'
+        review_stats.invalidate()
         async_loop(create_all())
 
     def tearDown(self) -> None:
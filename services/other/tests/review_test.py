@@ -2,6 +2,7 @@ from unittest import TestCase, mock
 
 from app.crud import review_crud
 from app.review.schemas import GetReview
+from app.review.stats import review_stats
 from config import SERVER_OTHER_BACKEND, API
 from tests import BaseTest, async_loop
 
@@ -218,6 +219,102 @@ class ReviewTestCase(BaseTest, TestCase):
             self.assertEqual(response.status_code, 400)
             self.assertEqual(response.json(), {'detail': 'Review not found'})
 
+    def test_review_stats(self):
+        headers = {'Authorization': 'Bearer Token'}
+
+        response = self.client.get(f'{self.url}/reviews/stats')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                'count': 0,
+                'mean': None,
+                'histogram': {'1': 0, '2': 0, '3': 0, '4': 0, '5': 0},
+                'recent_mean': None,
+                'trend': None,
+            }
+        )
+
+        with mock.patch('app.review.stats.RECENT_REVIEWS', 2) as _:
+            for user_id, appraisal in ((1, 1), (2, 5), (3, 3), (4, 4)):
+                with mock.patch('app.permission.permission', return_value=user_id) as _:
+                    response = self.client.post(
+                        f'{self.url}/reviews/',
+                        headers=headers,
+                        json={'appraisal': appraisal, 'text': 'Good site!'}
+                    )
+                    self.assertEqual(response.status_code, 201)
+
+            response = self.client.get(f'{self.url}/reviews/stats')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                response.json(),
+                {
+                    'count': 4,
+                    'mean': 3.25,
+                    'histogram': {'1': 1, '2': 0, '3': 1, '4': 1, '5': 1},
+                    'recent_mean': 3.5,
+                    'trend': 0.25,
+                }
+            )
+            etag = response.headers['etag']
+
+            response = self.client.get(f'{self.url}/reviews/stats', headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.headers['etag'], etag)
+
+            # Update
+            with mock.patch('app.permission.permission', return_value=3) as _:
+                response = self.client.put(
+                    f'{self.url}/reviews/3', headers=headers, json={'appraisal': 5, 'text': 'Good site!'}
+                )
+                self.assertEqual(response.status_code, 200)
+
+            response = self.client.get(f'{self.url}/reviews/stats', headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response.headers['etag'], etag)
+            self.assertEqual(
+                response.json(),
+                {
+                    'count': 4,
+                    'mean': 3.75,
+                    'histogram': {'1': 1, '2': 0, '3': 0, '4': 1, '5': 2},
+                    'recent_mean': 4.5,
+                    'trend': 0.75,
+                }
+            )
+
+            # Delete (old and recent review)
+            with mock.patch('app.permission.permission', return_value=1) as _:
+                response = self.client.delete(f'{self.url}/reviews/1', headers=headers)
+                self.assertEqual(response.status_code, 200)
+
+            response = self.client.get(f'{self.url}/reviews/stats')
+            self.assertEqual(response.json()['count'], 3)
+            self.assertEqual(response.json()['mean'], 4.67)
+
+            with mock.patch('app.permission.permission', return_value=4) as _:
+                response = self.client.delete(f'{self.url}/reviews/4', headers=headers)
+                self.assertEqual(response.status_code, 200)
+
+            response = self.client.get(f'{self.url}/reviews/stats')
+            body = response.json()
+            self.assertEqual(
+                body,
+                {
+                    'count': 2,
+                    'mean': 5.0,
+                    'histogram': {'1': 0, '2': 0, '3': 0, '4': 0, '5': 2},
+                    'recent_mean': 5.0,
+                    'trend': 0.0,
+                }
+            )
+
+            # Incremental stats are the same as loaded from DB
+            review_stats.invalidate()
+            response = self.client.get(f'{self.url}/reviews/stats')
+            self.assertEqual(response.json(), body)
+
     def test_reviews_paginate(self):
         headers = {'Authorization': 'Bearer Token'}
 